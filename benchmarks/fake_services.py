@@ -0,0 +1,473 @@
+"""
+In-process stand-ins for the GitHub REST API, OpenAI chat completions and the
+Google Sheets values API, served from one local HTTP server.
+
+Point the tracker at them with
+    GITHUB_API_URL=<url>/github
+    OPENAI_BASE_URL=<url>/openai/v1
+    SHEETS_API_ENDPOINT=<url>/sheets/
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from itertools import islice
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote, urlencode
+
+_A1 = re.compile(r"^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+# GitHub returns the combined diff of a compare for at most this many files.
+COMPARE_MAX_FILES = 300
+_GRAPHQL_OBJECT = re.compile(r'(\w+): object\(oid: "([0-9a-f]+)"\)')
+_SEARCH_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def _column_index(letters):
+    index = 0
+    for ch in letters:
+        index = index * 26 + (ord(ch) - 64)
+    return index - 1
+
+
+def _iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FakeServices:
+    """
+    Serve synthetic repositories, a task sheet and a chat model over HTTP.
+
+    Args:
+        repos (list): SyntheticRepo instances.
+        sheet_rows (list): The task sheet including its header row.
+        openai_latency (float): Seconds each chat completion takes.
+        openai_429_ratio (float): Share of chat completions answered with 429.
+    """
+
+    def __init__(self, repos, sheet_rows, openai_latency=0.0, openai_429_ratio=0.0,
+                 github_latency=0.0, seed=1):
+        self.repos = {(r.owner, r.name): r for r in repos}
+        self.sheet = [list(row) for row in sheet_rows]
+        self.openai_latency = openai_latency
+        self.openai_429_ratio = openai_429_ratio
+        self.github_latency = github_latency
+        self.requests = Counter()
+        self.tokens = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._files = {}
+        self._batches = {}
+        self._batch_outputs = {}
+        self._message_words = {}
+        self._server = None
+        self._thread = None
+
+    # --- lifecycle ---------------------------------------------------------
+
+    def start(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                services._dispatch(self, "GET")
+
+            def do_POST(self):
+                services._dispatch(self, "POST")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def snapshot(self):
+        """Copy of the request and token counters, for per-stage deltas."""
+        with self._lock:
+            return Counter(self.requests), Counter(self.tokens)
+
+    def _count(self, key, amount=1, counter=None):
+        with self._lock:
+            (counter if counter is not None else self.requests)[key] += amount
+
+    # --- plumbing ----------------------------------------------------------
+
+    def _dispatch(self, handler, method):
+        parts = urlsplit(handler.path)
+        query = parse_qs(parts.query)
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else None
+        if body is not None and "multipart/" not in (handler.headers.get("Content-Type") or ""):
+            body = json.loads(body)
+        try:
+            if parts.path == "/github/graphql":
+                status, headers, payload = self._graphql(body)
+            elif parts.path.startswith("/github/"):
+                status, headers, payload = self._github(handler, parts.path[len("/github"):], query)
+            elif parts.path.startswith("/openai/"):
+                status, headers, payload = self._openai(handler, method, parts.path[len("/openai"):], body)
+            elif parts.path.startswith("/sheets/"):
+                status, headers, payload = self._sheets(method, parts.path[len("/sheets"):], query, body)
+            else:
+                status, headers, payload = 404, {}, {"message": "Not Found"}
+        except Exception as e:
+            status, headers, payload = 500, {}, {"message": str(e)}
+
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        headers.setdefault("Content-Type", "application/json")
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    # --- GitHub ------------------------------------------------------------
+
+    def _rate_headers(self, resource="core"):
+        return {"X-RateLimit-Remaining": "4999", "X-RateLimit-Reset": str(int(time.time()) + 3600),
+                "X-RateLimit-Resource": resource}
+
+    def _commit_json(self, repo, commit, with_files=False):
+        data = {
+            "sha": commit["sha"],
+            "commit": {
+                "message": commit["message"],
+                "author": {"name": commit["author"], "date": _iso(commit["date"])},
+                "committer": {"name": commit["author"], "date": _iso(commit["date"])},
+            },
+        }
+        if with_files:
+            data["files"] = repo.files(commit["sha"])
+        return data
+
+    def _resolve(self, repo, ref):
+        """Index just past `ref` in the head history (0 for the base branch)."""
+        if ref in ("main", repo.base_sha):
+            return 0
+        if ref in (repo.branch, repo.head_sha):
+            return len(repo.commits)
+        return repo._by_sha[ref] + 1
+
+    def _paginate(self, handler, path, query, items, resource="core"):
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        chunk = items[(page - 1) * per_page: page * per_page]
+        headers = self._rate_headers(resource)
+        if page * per_page < len(items):
+            params = urlencode({k: v[0] for k, v in query.items() if k != "page"})
+            headers["Link"] = f'<{self.url}/github{path}?{params}&page={page + 1}>; rel="next"'
+        return chunk, headers
+
+    def _github(self, handler, path, query):
+        if self.github_latency:
+            time.sleep(self.github_latency)
+        segments = path.strip("/").split("/")
+        if segments == ["search", "commits"]:
+            return self._search_commits(handler, path, query)
+        if len(segments) < 3 or segments[0] != "repos":
+            return 404, {}, {"message": "Not Found"}
+        repo = self.repos.get((segments[1], segments[2]))
+        if repo is None:
+            return 404, {}, {"message": "Not Found"}
+        if len(segments) == 3:
+            self._count("github.repo")
+            payload = {"full_name": f"{repo.owner}/{repo.name}", "default_branch": repo.branch}
+            return self._etagged(handler, payload, self._rate_headers())
+        kind = segments[3]
+
+        if kind == "compare":
+            self._count("github.compare")
+            base, head = unquote("/".join(segments[4:])).split("...")
+            start, end = self._resolve(repo, base), self._resolve(repo, head)
+            commits = repo.commits[start:end]
+            chunk, headers = self._paginate(handler, path, query, commits)
+            payload = {
+                "status": "ahead" if end >= start else "diverged",
+                "total_commits": len(commits),
+                "base_commit": {"sha": base},
+                "merge_base_commit": {"sha": base},
+                "commits": [self._commit_json(repo, c) for c in chunk],
+                # Like GitHub, the combined diff of the range rides along (capped), used or not.
+                "files": list(islice((f for c in chunk for f in repo.files(c["sha"])), COMPARE_MAX_FILES)),
+            }
+            return self._etagged(handler, payload, headers)
+
+        if kind == "commits" and len(segments) == 4:
+            self._count("github.commits_list")
+            end = self._resolve(repo, query.get("sha", [repo.branch])[0])
+            commits = list(reversed(repo.commits[:end]))
+            if "since" in query:
+                since = query["since"][0]
+                commits = [c for c in commits if _iso(c["date"]) >= since]
+            chunk, headers = self._paginate(handler, path, query, commits)
+            return self._etagged(handler, [self._commit_json(repo, c) for c in chunk], headers)
+
+        if kind == "commits":
+            ref = unquote("/".join(segments[4:]))
+            if handler.headers.get("Accept") == "application/vnd.github.sha":
+                self._count("github.branch_sha")
+                sha = repo.base_sha if ref == "main" else repo.head_sha if ref == repo.branch else ref
+                return 200, dict(self._rate_headers(), **{"Content-Type": "text/plain"}), sha.encode()
+            self._count("github.commit")
+            commit = repo.commits[repo._by_sha[ref]]
+            return self._etagged(handler, self._commit_json(repo, commit, with_files=True), self._rate_headers())
+
+        return 404, {}, {"message": "Not Found"}
+
+    def _search_commits(self, handler, path, query):
+        """Whole-word commit message search with repo:/user:/committer-date:>= qualifiers."""
+        self._count("github.search")
+        terms, scopes, since = [], [], ""
+        for quoted, bare in _SEARCH_TERM.findall(query.get("q", [""])[0]):
+            if quoted:
+                terms.append(re.findall(r"\w+", quoted.lower()))
+            elif bare.startswith("repo:"):
+                scopes.append(tuple(bare[5:].split("/", 1)))
+            elif bare.startswith("user:"):
+                scopes.extend(key for key in self.repos if key[0] == bare[5:])
+            elif bare.startswith("committer-date:>="):
+                since = bare[len("committer-date:>="):]
+            elif bare != "OR":
+                terms.append([bare.lower()])
+
+        items = []
+        for key in scopes:
+            repo = self.repos.get(key)
+            if repo is None:
+                continue
+            for commit in repo.commits:
+                if since and _iso(commit["date"])[:10] < since:
+                    continue
+                words = self._message_words.get(commit["sha"])
+                if words is None:
+                    words = self._message_words[commit["sha"]] = set(re.findall(r"\w+", commit["message"].lower()))
+                if any(term and all(w in words for w in term) for term in terms):
+                    item = self._commit_json(repo, commit)
+                    item["repository"] = {"name": repo.name, "owner": {"login": repo.owner}}
+                    items.append(item)
+        items.sort(key=lambda item: item["commit"]["committer"]["date"], reverse=True)
+        chunk, headers = self._paginate(handler, path, query, items[:1000], resource="search")
+        return 200, headers, {"total_count": len(items), "incomplete_results": False, "items": chunk}
+
+    def _graphql(self, body):
+        """The commit stats query of modules/github_graphql.py: aliased `object(oid:)` lookups."""
+        self._count("github.graphql")
+        variables = body.get("variables") or {}
+        repo = self.repos.get((variables.get("owner"), variables.get("name")))
+        nodes = {}
+        for alias, sha in _GRAPHQL_OBJECT.findall(body.get("query", "")):
+            index = repo._by_sha.get(sha) if repo else None
+            if index is None:
+                nodes[alias] = None
+                continue
+            commit, files = repo.commits[index], repo.files(sha)
+            nodes[alias] = {
+                "oid": sha,
+                "message": commit["message"],
+                "additions": sum(f["additions"] for f in files),
+                "deletions": sum(f["deletions"] for f in files),
+                "changedFilesIfAvailable": len(files),
+                "author": {"name": commit["author"], "date": _iso(commit["date"])},
+            }
+        data = {"repository": nodes if repo else None, "rateLimit": {"cost": 1, "remaining": 4999}}
+        return 200, self._rate_headers("graphql"), {"data": data}
+
+    def _etagged(self, handler, payload, headers):
+        data = json.dumps(payload).encode("utf-8")
+        etag = '"' + hashlib.md5(data).hexdigest() + '"'
+        headers["ETag"] = etag
+        if handler.headers.get("If-None-Match") == etag:
+            self._count("github.not_modified")
+            return 304, headers, b""
+        return 200, headers, data
+
+    # --- OpenAI ------------------------------------------------------------
+
+    def _openai(self, handler, method, path, body):
+        path = path.rstrip("/")
+        segments = path.strip("/").split("/")
+        if path == "/v1/chat/completions":
+            self._count("openai.chat")
+            time.sleep(self.openai_latency)
+            with self._lock:
+                throttled = self._rng.random() < self.openai_429_ratio
+            if throttled:
+                self._count("openai.rate_limited")
+                return 429, {"retry-after-ms": "50"}, {"error": {"message": "Rate limit reached", "type": "requests"}}
+            return 200, {}, self._chat_completion(body)
+        if path == "/v1/files" and method == "POST":
+            return self._upload_file(handler, body)
+        if segments[:2] == ["v1", "files"] and segments[3:] == ["content"]:
+            data = self._files.get(segments[2])
+            if data is None:
+                return 404, {}, {"error": {"message": "No such file"}}
+            return 200, {"Content-Type": "application/octet-stream"}, data
+        if path == "/v1/batches" and method == "POST":
+            return self._create_batch(body)
+        if segments[:2] == ["v1", "batches"] and len(segments) == 3:
+            return self._retrieve_batch(segments[2])
+        return 404, {}, {"error": {"message": "Not Found"}}
+
+    def _upload_file(self, handler, body):
+        """Multipart upload of a batch input file; only the `file` part is kept."""
+        boundary = handler.headers.get("Content-Type", "").split("boundary=")[-1].strip('"').encode()
+        content = b""
+        for part in body.split(b"--" + boundary):
+            head, _, data = part.partition(b"\r\n\r\n")
+            if b'name="file"' in head:
+                content = data[:-2] if data.endswith(b"\r\n") else data
+        with self._lock:
+            file_id = f"file-{len(self._files) + 1}"
+            self._files[file_id] = content
+        self._count("openai.files")
+        return 200, {}, {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                         "filename": "batch.jsonl", "purpose": "batch", "status": "processed"}
+
+    def _create_batch(self, body):
+        """Run every request of the input file at once; the batch reports completion on the next poll."""
+        self._count("openai.batches")
+        lines = []
+        for line in self._files.get(body.get("input_file_id"), b"").decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            self._count("openai.batch_request")
+            lines.append(json.dumps({
+                "id": f"batch_req_{len(lines) + 1}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": self._chat_completion(request["body"])},
+                "error": None,
+            }))
+        with self._lock:
+            output_id = f"file-{len(self._files) + 1}"
+            self._files[output_id] = ("\n".join(lines) + "\n").encode("utf-8")
+            batch_id = f"batch_{len(self._batches) + 1}"
+            self._batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": body.get("endpoint"), "errors": None,
+                "input_file_id": body.get("input_file_id"), "completion_window": body.get("completion_window"),
+                "status": "in_progress", "output_file_id": None, "error_file_id": None,
+                "created_at": int(time.time()), "metadata": body.get("metadata"),
+                "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+            }
+            self._batch_outputs[batch_id] = output_id
+            return 200, {}, dict(self._batches[batch_id])
+
+    def _retrieve_batch(self, batch_id):
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            if batch is None:
+                return 404, {}, {"error": {"message": "No such batch"}}
+            batch.update(status="completed", output_file_id=self._batch_outputs[batch_id])
+            batch["request_counts"]["completed"] = batch["request_counts"]["total"]
+            return 200, {}, json.loads(json.dumps(batch))
+
+    def _chat_completion(self, body):
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        if "project reviewer" in prompt:
+            content = ("1. Status: 😎 On Track\n2. Reason: Core work is committed.\n"
+                       "3. AI Evaluation Score: 70\n4. AI Estimated Completion Time: 4–8 hours\n"
+                       "5. Completion: 60% complete ✅, 40% remaining ⏳")
+        else:
+            content = "The developer updated the handlers and added tests for the affected module."
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        self._count("prompt", prompt_tokens, self.tokens)
+        self._count("completion", completion_tokens, self.tokens)
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    # --- Sheets ------------------------------------------------------------
+
+    def _parse_range(self, a1):
+        a1 = unquote(a1)
+        if "!" not in a1:
+            # A bare sheet name covers the whole grid
+            return 0, len(self.sheet) - 1, 0, max(max((len(row) for row in self.sheet), default=0) - 1, 0)
+        ref = a1.split("!")[-1]
+        match = _A1.match(ref)
+        if not match:
+            raise ValueError(f"Unsupported range: {a1}")
+        c1, r1, c2, r2 = match.groups()
+        width = max((len(row) for row in self.sheet), default=0)
+        has_end = ":" in ref
+        col_start = _column_index(c1) if c1 else 0
+        col_end = _column_index(c2) if c2 else (col_start if c1 and not has_end else max(width - 1, 0))
+        row_start = int(r1) - 1 if r1 else 0
+        row_end = int(r2) - 1 if r2 else (row_start if r1 and not has_end else len(self.sheet) - 1)
+        return row_start, row_end, col_start, col_end
+
+    def _read(self, a1, major="ROWS"):
+        row_start, row_end, col_start, col_end = self._parse_range(a1)
+        rows = []
+        for row in self.sheet[row_start:row_end + 1]:
+            cells = row[col_start:col_end + 1]
+            rows.append(cells)
+        if major == "COLUMNS":
+            width = max((len(r) for r in rows), default=0)
+            values = [[r[c] if c < len(r) else "" for r in rows] for c in range(width)]
+        else:
+            values = rows
+        # The API trims trailing empty cells and rows.
+        values = [list(v) for v in values]
+        for v in values:
+            while v and v[-1] == "":
+                v.pop()
+        while values and not values[-1]:
+            values.pop()
+        return {"range": unquote(a1), "majorDimension": major, "values": values}
+
+    def _write(self, a1, values):
+        row_start, _, col_start, _ = self._parse_range(a1)
+        for i, row_values in enumerate(values):
+            r = row_start + i
+            while len(self.sheet) <= r:
+                self.sheet.append([])
+            row = self.sheet[r]
+            for j, value in enumerate(row_values):
+                c = col_start + j
+                while len(row) <= c:
+                    row.append("")
+                row[c] = value
+
+    def _sheets(self, method, path, query, body):
+        match = re.match(r"^/v4/spreadsheets/([^/]+)/values(?::(batchGet|batchUpdate)|/(.+))$", path)
+        if not match:
+            return 404, {}, {"error": {"message": "Not Found"}}
+        sheet_id, action, a1 = match.groups()
+        major = query.get("majorDimension", ["ROWS"])[0]
+        with self._lock:
+            self.requests[f"sheets.{action or 'get'}"] += 1
+            if action == "batchGet":
+                return 200, {}, {"spreadsheetId": sheet_id,
+                                 "valueRanges": [self._read(r, major) for r in query.get("ranges", [])]}
+            if action == "batchUpdate":
+                for item in body.get("data", []):
+                    self._write(item["range"], item["values"])
+                return 200, {}, {"spreadsheetId": sheet_id, "totalUpdatedRanges": len(body.get("data", []))}
+            return 200, {}, self._read(a1, major)
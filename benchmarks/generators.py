@@ -0,0 +1,157 @@
+"""
+Synthetic inputs for the benchmarks: a large repository and a large task sheet.
+
+Everything is derived from a seed, so two runs with the same arguments see
+the same commits, diffs and tasks.
+"""
+import hashlib
+import random
+import re
+from datetime import datetime, timedelta
+
+TASK_COLUMNS = ["Task Name", "Owner", "Start Date", "End Date", "Git Keyword"]
+
+_VERBS = ["Add", "Fix", "Refactor", "Update", "Remove", "Improve", "Rework", "Document", "Test", "Tune"]
+_AREAS = ["auth", "billing", "search", "export", "profile", "dashboard", "webhooks", "reports",
+          "settings", "onboarding", "notifications", "uploads", "audit", "sync", "invoices"]
+_SYLLABLES = ["zor", "vak", "quil", "let", "mir", "dax", "pel", "tum", "brek", "sol", "nix", "ora", "kel", "fen"]
+_SOURCE_FILES = ["api/{area}.py", "services/{area}_service.py", "web/src/{area}/index.tsx",
+                 "web/src/{area}/{area}.css", "tests/test_{area}.py", "docs/{area}.md"]
+_NOISE_FILES = ["package-lock.json", "web/dist/bundle.min.js", "assets/{area}.png"]
+# GitHub lists at most this many files per commit page and per compare.
+MEGA_COMMIT_FILES = 300
+_HUNK_HEADER = re.compile(r"^@@ -(\d+),(\d+) \+(\d+),(\d+) @@", re.MULTILINE)
+
+
+def _sha(seed, *parts):
+    return hashlib.sha1(":".join([str(seed)] + [str(p) for p in parts]).encode("utf-8")).hexdigest()
+
+
+def _codename(rng):
+    return "".join(rng.choice(_SYLLABLES) for _ in range(3))
+
+
+def _patch(rng, lines, distinct=None):
+    """A one-hunk patch; only `distinct` lines are random, the rest repeat them (cheap long patches)."""
+    start = rng.randint(1, 400)
+    body = []
+    for i in range(min(lines, distinct or lines)):
+        sign = "+" if rng.random() < 0.7 else "-"
+        body.append(f"{sign}    value_{rng.randint(0, 9999)} = compute_{rng.choice(_AREAS)}({i}, ctx)")
+    body = (body * (lines // len(body) + 1))[:lines]
+    return f"@@ -{start},{lines} +{start},{lines} @@\n" + "\n".join(body)
+
+
+class SyntheticRepo:
+    """
+    A repository with `commits` commits on a feature branch ahead of `main`.
+
+    Commits are generated lazily from their index; only the compact metadata
+    (sha, message, author, date) is kept in memory, and the changed files of
+    a commit are rebuilt on demand. A `cherry_pick_ratio` share of commits
+    re-applies an earlier commit: same message and changes, new SHA, hunks
+    shifted to other line numbers. A `mega_commit_ratio` share of changes
+    touches MEGA_COMMIT_FILES files with long patches (vendored drops,
+    mass reformatting), and an `empty_commit_ratio` share changes no lines
+    (empty or permission-only commits).
+    """
+
+    def __init__(self, owner, name, branch="dev", commits=10000, tasks=None, seed=1,
+                 start=datetime(2025, 1, 1), related_ratio=0.3, files_per_commit=4, cherry_pick_ratio=0.0,
+                 mega_commit_ratio=0.0, empty_commit_ratio=0.0):
+        self.owner = owner
+        self.name = name
+        self.branch = branch
+        self.seed = seed
+        self.files_per_commit = files_per_commit
+        self.mega_commit_ratio = mega_commit_ratio
+        self.empty_commit_ratio = empty_commit_ratio
+        self.base_sha = _sha(seed, owner, name, "base")
+        rng = random.Random(seed)
+        keywords = [t[4] for t in (tasks or [])]
+
+        self.commits = []
+        step = timedelta(minutes=max(1, int(180 * 24 * 60 / max(commits, 1))))
+        for i in range(commits):
+            if i and rng.random() < cherry_pick_ratio:
+                picked = self.commits[rng.randrange(i)]
+                self.commits.append(dict(picked, sha=_sha(seed, name, i), date=start + step * i,
+                                         source=picked["source"]))
+                continue
+            area = rng.choice(_AREAS)
+            if keywords and rng.random() < related_ratio:
+                message = f"{rng.choice(keywords)}: {rng.choice(_VERBS).lower()} {area} handling"
+            else:
+                message = f"{rng.choice(_VERBS)} {area} {rng.choice(['edge case', 'cleanup', 'logging', 'types'])}"
+            self.commits.append({
+                "sha": _sha(seed, name, i),
+                "message": message,
+                "author": f"dev{rng.randint(1, 25)}",
+                "date": start + step * i,
+                "area": area,
+                "source": i,
+            })
+        self.head_sha = self.commits[-1]["sha"] if self.commits else self.base_sha
+        self._by_sha = {c["sha"]: i for i, c in enumerate(self.commits)}
+
+    def files(self, sha):
+        """Changed files of a commit in the shape of the GitHub commit API's `files`."""
+        index = self._by_sha[sha]
+        source = self.commits[index]["source"]
+        rng = random.Random(f"{self.seed}:{source}")
+        area = self.commits[index]["area"]
+        shift = index - source
+        if self.empty_commit_ratio and random.Random(f"{self.seed}:empty:{source}").random() < self.empty_commit_ratio:
+            return []
+        mega = self.mega_commit_ratio and random.Random(f"{self.seed}:mega:{source}").random() < self.mega_commit_ratio
+        files = []
+        for n in range(MEGA_COMMIT_FILES if mega else self.files_per_commit):
+            template = rng.choice(_SOURCE_FILES if rng.random() < 0.85 else _NOISE_FILES)
+            filename = template.format(area=area)
+            if mega:
+                filename = f"{n}/{filename}"
+            lines = rng.randint(400, 1000) if mega else rng.randint(3, 60)
+            binary = filename.endswith(".png")
+            files.append({
+                "filename": filename,
+                # Same source change, same blob (cherry-picks included).
+                "sha": hashlib.sha1(f"{self.seed}:{source}:{n}:{filename}".encode()).hexdigest(),
+                "status": rng.choice(["modified", "modified", "added", "removed"]),
+                "additions": lines,
+                "deletions": rng.randint(0, lines),
+                **({} if binary else {"patch": _patch(rng, lines, 20 if mega else None)}),
+            })
+        if shift:
+            for f in files:
+                if "patch" in f:
+                    f["patch"] = _HUNK_HEADER.sub(
+                        lambda m: f"@@ -{int(m[1]) + shift},{m[2]} +{int(m[3]) + shift},{m[4]} @@", f["patch"])
+        return files
+
+
+def generate_tasks(rows=1000, seed=1, start=datetime(2025, 1, 1)):
+    """
+    Task sheet rows as the Google Sheet holds them (strings, header excluded).
+
+    Every task has a unique codename keyword, so commit messages that mention
+    it are matched to exactly that task.
+    """
+    rng = random.Random(seed)
+    tasks = []
+    used = set()
+    for i in range(rows):
+        keyword = _codename(rng)
+        while keyword in used:
+            keyword = _codename(rng) + str(i)
+        used.add(keyword)
+        task_start = start + timedelta(days=rng.randint(0, 120))
+        task_end = task_start + timedelta(days=rng.randint(7, 60))
+        tasks.append([
+            # Only the keyword overlaps with commit messages, keeping matches task-specific.
+            f"{rng.choice(['Ship', 'Deliver', 'Finish'])} {keyword} for {rng.choice(_AREAS)}",
+            f"dev{rng.randint(1, 25)}",
+            task_start.strftime("%Y-%m-%d"),
+            task_end.strftime("%Y-%m-%d"),
+            keyword,
+        ])
+    return tasks
@@ -0,0 +1,74 @@
+"""
+Replay recorded GitHub webhook payloads against a running `main.py --watch`.
+
+    python -m benchmarks.replay_webhooks push.json
+    python -m benchmarks.replay_webhooks pushes.jsonl --url http://127.0.0.1:8787/webhook --delay 0.5
+
+A `.json` file holds one payload; a `.jsonl` file holds one payload per
+line. Payloads are signed with WEBHOOK_SECRET (or --secret) the way GitHub
+signs them, so the receiver's signature check is exercised too.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+import uuid
+import urllib.error
+import urllib.request
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="+", help="recorded payloads (.json or .jsonl)")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{os.getenv('WEBHOOK_PORT', '8787')}"
+                                         f"{os.getenv('WEBHOOK_PATH', '/webhook')}")
+    parser.add_argument("--event", default="push", help="X-GitHub-Event header to send")
+    parser.add_argument("--secret", default=os.getenv("WEBHOOK_SECRET", ""), help="HMAC secret (default: env)")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait between deliveries")
+    return parser.parse_args(argv)
+
+
+def load_payloads(path):
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return [json.load(f)]
+
+
+def deliver(url, event, payload, secret=""):
+    """POST one payload like GitHub does; returns (status, response body)."""
+    body = json.dumps(payload).encode("utf-8")
+    headers = {
+        "Content-Type": "application/json",
+        "X-GitHub-Event": event,
+        "X-GitHub-Delivery": str(uuid.uuid4()),
+    }
+    if secret:
+        headers["X-Hub-Signature-256"] = "sha256=" + hmac.new(secret.encode("utf-8"), body,
+                                                               hashlib.sha256).hexdigest()
+    request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, response.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode("utf-8")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    failures = 0
+    for path in args.files:
+        for payload in load_payloads(path):
+            status, body = deliver(args.url, args.event, payload, args.secret)
+            print(f"{status} {path} {payload.get('ref', '')} {body}")
+            failures += status >= 400
+            if args.delay:
+                time.sleep(args.delay)
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
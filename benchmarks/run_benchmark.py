@@ -0,0 +1,340 @@
+"""
+End-to-end throughput benchmark against local fake GitHub, OpenAI and Sheets.
+
+    python -m benchmarks.run_benchmark --commits 10000 --tasks 1000
+    python -m benchmarks.run_benchmark --runs 2 --output data/bench.json
+    python -m benchmarks.run_benchmark --repos 60 --discovery search
+
+Each pipeline stage (sheet read, commit fetch, matching, summarize, predict,
+sheet write) is reported with wall time, requests per service, model tokens
+and peak traced memory. With --runs > 1 later runs reuse the cache and run
+state of the first, which measures the warm/incremental path.
+
+Startup is checked first: `main.py --check-startup` runs in a fresh
+interpreter and the benchmark exits non-zero if it misses its budget.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from benchmarks.fake_services import FakeServices
+from benchmarks.generators import SyntheticRepo, generate_tasks, TASK_COLUMNS
+
+REPO_OWNER = "bench-org"
+REPO_NAME = "bench-repo"
+REPO_BRANCH = "dev"
+SHEET_ID = "bench-sheet"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commits", type=int, default=10000, help="commits across all synthetic branches")
+    parser.add_argument("--repos", type=int, default=1, help="synthetic repositories (listed in a registry file)")
+    parser.add_argument("--discovery", choices=("full", "search"), default="full",
+                        help="download every commit, or find candidates with the commit search API")
+    parser.add_argument("--tasks", type=int, default=1000, help="rows in the synthetic task sheet")
+    parser.add_argument("--related-ratio", type=float, default=0.3,
+                        help="share of commits that mention a task keyword")
+    parser.add_argument("--cherry-pick-ratio", type=float, default=0.1,
+                        help="share of commits that re-apply an earlier commit under a new SHA")
+    parser.add_argument("--mega-commit-ratio", type=float, default=0.0,
+                        help="share of commits touching 300 files with long patches")
+    parser.add_argument("--empty-commit-ratio", type=float, default=0.0,
+                        help="share of commits that change no lines")
+    parser.add_argument("--openai-mode", choices=("interactive", "batch"), default="interactive",
+                        help="per-request calls, or main.py's OpenAI Batch API path against the fake batch endpoints")
+    parser.add_argument("--graphql", action="store_true",
+                        help="look up commit line stats with batched GraphQL first (GITHUB_GRAPHQL=true)")
+    parser.add_argument("--openai-latency-ms", type=float, default=20.0)
+    parser.add_argument("--openai-429-ratio", type=float, default=0.02)
+    parser.add_argument("--github-latency-ms", type=float, default=0.0)
+    parser.add_argument("--runs", type=int, default=1, help="repeat the pipeline with warm cache/state")
+    parser.add_argument("--incremental", action="store_true", help="set INCREMENTAL_MODE for the runs")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="skip per-stage peak memory tracing")
+    parser.add_argument("--log-level", default="WARNING", help="tracker log level during the runs")
+    parser.add_argument("--startup-budget", type=float,
+                        help="seconds main.py may take to start (default: its STARTUP_BUDGET_SECONDS)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--keep-data", action="store_true", help="keep the temporary data directory")
+    return parser.parse_args(argv)
+
+
+def configure_environment(services, data_dir, incremental, repos=None, discovery="full", graphql=False,
+                          openai_mode="interactive"):
+    """Point every module at the fakes; must run before the tracker modules are imported."""
+    registry = os.path.join(data_dir, "repositories.json")
+    with open(registry, "w", encoding="utf-8") as f:
+        # The synthetic repos have no commits merged in from the base, so they can all opt in to search.
+        json.dump([{"owner": r.owner, "name": r.name, "branch": r.branch, "discovery": discovery}
+                   for r in repos or []], f)
+    os.environ.update({
+        "GITHUB_API_URL": f"{services.url}/github",
+        "GITHUB_TOKEN": "bench-token",
+        "GITHUB_GRAPHQL": "true" if graphql else "false",
+        "GITHUB_GRAPHQL_URL": f"{services.url}/github/graphql",
+        "OPENAI_BASE_URL": f"{services.url}/openai/v1",
+        "OPENAI_API_KEY": "bench-key",
+        "OPENAI_MODE": openai_mode,
+        "OPENAI_BATCH_POLL_SECONDS": "0.05",
+        "SHEETS_API_ENDPOINT": f"{services.url}/sheets/",
+        "SHEET_ID": SHEET_ID,
+        "SHEET_RANGE": "Sheet1!A:E",
+        "REPO_1_OWNER": REPO_OWNER,
+        "REPO_1_NAME": REPO_NAME,
+        "REPO_1_BRANCH": REPO_BRANCH,
+        "REPO_1_BACKEND": "rest",
+        "REPO_1_DISCOVERY": discovery,
+        "REPO_2_OWNER": "",
+        "REPO_3_OWNER": "",
+        "REPOSITORIES_FILE": registry if repos else "",
+        "COMMIT_DISCOVERY": discovery,
+        "CACHE_PATH": os.path.join(data_dir, "cache.sqlite"),
+        "RUN_STATE_PATH": os.path.join(data_dir, "run_state.json"),
+        "SHEET_SNAPSHOT_PATH": os.path.join(data_dir, "sheet_snapshot.json"),
+        "INCREMENTAL_MODE": "true" if incremental else "false",
+    })
+
+
+def measure_startup(budget=None):
+    """Start `main.py --check-startup` in a fresh interpreter, as a cron run would."""
+    env = dict(os.environ)
+    if budget is not None:
+        env["STARTUP_BUDGET_SECONDS"] = str(budget)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "main.py", "--check-startup"], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    startup = {"process_seconds": round(time.perf_counter() - started, 3), "ok": result.returncode == 0}
+    try:
+        startup.update(json.loads(result.stdout.strip().splitlines()[-1]))
+    except (IndexError, ValueError):
+        startup["error"] = result.stderr.strip()[-2000:]
+    return startup
+
+
+class StageRecorder:
+    """Collects wall time, request/token deltas and peak memory per stage."""
+
+    def __init__(self, services, trace_memory=True):
+        self.services = services
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, run, spans=()):
+        """
+        Record one stage; each name in `spans` adds a row timed by the
+        modules.metrics span of that name, for steps interleaved inside it.
+        """
+        from modules.metrics import metrics
+
+        spans_before = metrics.snapshot()["spans"]
+        requests_before, tokens_before = self.services.snapshot()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            requests_after, tokens_after = self.services.snapshot()
+            self.stages.append({
+                "run": run,
+                "stage": name,
+                "seconds": round(seconds, 3),
+                "requests": dict(requests_after - requests_before),
+                "tokens": dict(tokens_after - tokens_before),
+                "peak_mb": round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1) if self.trace_memory else None,
+            })
+            spans_after = metrics.snapshot()["spans"]
+            for span_name in spans:
+                span_seconds = (spans_after.get(span_name, {}).get("seconds", 0.0)
+                                - spans_before.get(span_name, {}).get("seconds", 0.0))
+                self.stages.append({"run": run, "stage": f"  {span_name}", "seconds": round(span_seconds, 3),
+                                    "requests": {}, "tokens": {}, "peak_mb": None})
+
+    def print_table(self):
+        print(f"\n{'run':>3}  {'stage':<14}{'seconds':>9}  {'peak MB':>8}  {'tokens':>9}  requests")
+        for s in self.stages:
+            tokens = sum(s["tokens"].values())
+            requests = ", ".join(f"{k}={v}" for k, v in sorted(s["requests"].items())) or "-"
+            peak = f"{s['peak_mb']:.1f}" if s["peak_mb"] is not None else "-"
+            print(f"{s['run']:>3}  {s['stage']:<14}{s['seconds']:>9.3f}  {peak:>8}  {tokens:>9}  {requests}")
+
+
+def run_pipeline(recorder, run):
+    # Imported lazily: module-level settings are read from the environment set above.
+    import main as tracker
+    from modules.backends import register_repositories
+    from modules.cache import CommitCache
+    from modules.commit_search import commit_source
+    from modules.commit_store import CommitStore
+    from modules.pipeline import SummaryPipeline
+    from modules.predictor import TIER_RULES, TIER_LLM
+    from modules.run_state import RunState, INCREMENTAL_MODE
+    from modules.sheet_reader import read_task_sheet, SheetSnapshot
+    from modules.sheet_writer import write_task_updates
+
+    job = tracker.default_job()
+    repositories = tracker.valid_repositories(job["repositories"])
+
+    with recorder.stage("sheet_read", run):
+        snapshot = SheetSnapshot()
+        sheet = read_task_sheet(job["sheet_id"], job["sheet_range"], snapshot)
+    run_state = RunState()
+
+    with recorder.stage("commit_fetch", run):
+        register_repositories(repositories, tracker.GITHUB_TOKEN)
+        since = tracker.earliest_task_start(sheet.tasks)
+        commit_store = CommitStore(token=tracker.GITHUB_TOKEN, base_branch="main", run_state=run_state,
+                                   incremental=INCREMENTAL_MODE, since=since)
+        source = commit_source(commit_store, sheet.tasks, repositories, tracker.GITHUB_TOKEN, since)
+        for repo in repositories:
+            source.commits_since(repo, since)
+
+    with recorder.stage("matching", run):
+        pending = list(zip(sheet.tasks, tracker.match_tasks(sheet.tasks, source, repositories)))
+
+    cache = CommitCache()
+    pipeline = SummaryPipeline(cache, tracker.GITHUB_TOKEN, tracker.OPENAI_API_KEY)
+    task_updates = {}
+    tiers = {TIER_RULES: 0, TIER_LLM: 0}
+    if tracker.OPENAI_MODE == "batch":
+        run_batch_stages(recorder, run, tracker, pending, pipeline, run_state, task_updates, tiers)
+    else:
+        run_interactive_stages(recorder, run, tracker, pending, pipeline, run_state, task_updates, tiers)
+
+    with recorder.stage("sheet_write", run):
+        write_task_updates(job["sheet_id"], job["worksheet"], task_updates)
+
+    pipeline.close()
+    dedup = pipeline.report()
+    cache.close()
+    run_state.save()
+    snapshot.update(sheet.columns, sheet.hashes)
+    snapshot.save()
+    return {"tasks": len(sheet.tasks), "matched_commits": sum(len(m) for _, m in pending),
+            "predicted_by": tiers, "distinct_changes": dedup["changes"]}
+
+
+def pending_tasks(tracker, pending, run_state, task_updates):
+    """main.py's incremental check: tasks whose inputs are unchanged reuse their stored result."""
+    from modules.run_state import INCREMENTAL_MODE, task_fingerprint
+
+    tasks = []
+    for task, matched in pending:
+        fingerprint = task_fingerprint(task.name, task.end_date, [c["sha"] for c in matched])
+        previous = run_state.get_task_result(task.name, fingerprint) if INCREMENTAL_MODE else None
+        if previous:
+            task_updates[task.name] = previous
+        else:
+            tasks.append(tracker.pending_task(task, matched, fingerprint))
+    return tasks
+
+
+def run_interactive_stages(recorder, run, tracker, pending, pipeline, run_state, task_updates, tiers):
+    """OPENAI_MODE=interactive: main.py's per-task path; summarize/predict times come from its metrics spans."""
+    tasks = pending_tasks(tracker, pending, run_state, task_updates)
+    with recorder.stage("openai", run, spans=("summarize", "predict")):
+        results = tracker.summarize_and_predict(pipeline, tasks)
+        for tier in tracker.record_predictions(tasks, results, run_state, task_updates).values():
+            tiers[tier] += 1
+
+
+def run_batch_stages(recorder, run, tracker, pending, pipeline, run_state, task_updates, tiers):
+    """OPENAI_MODE=batch: main.py's Batch API path, summaries in one batch and escalated predictions in another."""
+    tasks = pending_tasks(tracker, pending, run_state, task_updates)
+    with recorder.stage("openai_batch", run):
+        results = tracker.batch_summarize_and_predict(pipeline, tasks)
+        for tier in tracker.record_predictions(tasks, results, run_state, task_updates).values():
+            tiers[tier] += 1
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    startup = measure_startup(args.startup_budget)
+    data_dir = tempfile.mkdtemp(prefix="tracker-bench-")
+
+    generated = time.perf_counter()
+    tasks = generate_tasks(args.tasks, seed=args.seed)
+    repos = [
+        SyntheticRepo(REPO_OWNER, REPO_NAME if args.repos == 1 else f"{REPO_NAME}-{i + 1}", REPO_BRANCH,
+                      commits=args.commits // args.repos, tasks=tasks, seed=args.seed + i,
+                      related_ratio=args.related_ratio, cherry_pick_ratio=args.cherry_pick_ratio,
+                      mega_commit_ratio=args.mega_commit_ratio, empty_commit_ratio=args.empty_commit_ratio)
+        for i in range(args.repos)
+    ]
+    generated = time.perf_counter() - generated
+
+    services = FakeServices(
+        repos, [TASK_COLUMNS] + tasks,
+        openai_latency=args.openai_latency_ms / 1000.0,
+        openai_429_ratio=args.openai_429_ratio,
+        github_latency=args.github_latency_ms / 1000.0,
+        seed=args.seed,
+    ).start()
+    configure_environment(services, data_dir, args.incremental, repos if args.repos > 1 else None, args.discovery,
+                          args.graphql, args.openai_mode)
+
+    from google.auth.credentials import AnonymousCredentials
+    from modules.google_service import get_sheets_service
+    from modules.metrics import metrics
+    from logger_config import logger
+    logger.setLevel(args.log_level.upper())
+    get_sheets_service(credentials=AnonymousCredentials())
+
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+    recorder = StageRecorder(services, trace_memory=not args.no_tracemalloc)
+    runs = []
+    try:
+        for run in range(1, args.runs + 1):
+            started = time.perf_counter()
+            counts = run_pipeline(recorder, run)
+            runs.append(dict(counts, run=run, seconds=round(time.perf_counter() - started, 3)))
+    finally:
+        services.stop()
+        if not args.no_tracemalloc:
+            tracemalloc.stop()
+        if not args.keep_data:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        "config": vars(args),
+        "startup": startup,
+        "generate_seconds": round(generated, 3),
+        "runs": runs,
+        "stages": recorder.stages,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "instrumentation": metrics.snapshot(),
+    }
+    recorder.print_table()
+    for r in runs:
+        print(f"run {r['run']}: {r['tasks']} tasks, {r['matched_commits']} matched commits in {r['seconds']:.2f}s "
+              f"({r['distinct_changes']} distinct changes; "
+              f"predicted by rules: {r['predicted_by']['rules']}, model: {r['predicted_by']['llm']})")
+    print(f"max RSS: {report['max_rss_mb']} MB")
+    print(f"startup: {startup.get('startup_seconds', '?')}s imports, {startup['process_seconds']}s process "
+          f"(budget {startup.get('budget_seconds', '?')}s) {'ok' if startup['ok'] else 'OVER BUDGET'}")
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"report written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main()["startup"]["ok"] else 1)
@@ -1,8 +1,18 @@
 import os
+import json
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
-from datetime import datetime
-import sys
+import itertools
+import multiprocessing.util
+from queue import SimpleQueue
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "text" (default) or "json" for one compact JSON object per line.
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Per-commit detail is logged at DEBUG; at INFO only every Nth commit (0 = none).
+LOG_COMMIT_SAMPLE = int(os.getenv("LOG_COMMIT_SAMPLE", "0"))
 
 # Define a custom logging filter to add the 'tags' attribute
 class ContextFilter(logging.Filter):
@@ -10,36 +20,124 @@ class ContextFilter(logging.Filter):
         if not hasattr(record, 'tags'):
             record.tags = ''  # or set a default value
         return True
-        
-log_dir = 'logs'
 
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
+
+class JsonLinesFormatter(logging.Formatter):
+    """One compact JSON object per record: ts, level, msg and tags/exc when present."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, 'tags', ''):
+            entry["tags"] = record.tags
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+class _ThreadQueueHandler(QueueHandler):
+    """
+    Hand records to the listener thread untouched.
+
+    The queue never leaves the process, so nothing needs pickling and the
+    `%`-interpolation happens on the listener thread instead of the caller's.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class _LazyRotatingFileHandler(RotatingFileHandler):
+    """Create the log directory and open the file on the first record, not at import."""
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self):
+        directory = os.path.dirname(self.baseFilename)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        return super()._open()
+
+log_dir = os.getenv("LOG_DIR", "logs")
 
 # Get the current date for the log file name
 current_date = datetime.now().strftime('%Y-%m-%d')
 log_file = os.path.join(log_dir, f'log_{current_date}.log')
 
+# Create a formatter shared by the console and file handlers
+if LOG_FORMAT == "json":
+    formatter = JsonLinesFormatter()
+else:
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(tags)s - %(message)s')
+
 # Create a stream handler for logging to the console
 stream_handler = logging.StreamHandler()
-stream_handler.setLevel(logging.INFO)
-
-# Create a formatter and add it to the stream handler
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(tags)s - %(message)s')
 stream_handler.setFormatter(formatter)
-
-# Configure the logger
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-logger.addHandler(stream_handler)
-
-# Add the custom filter to the stream handler
 stream_handler.addFilter(ContextFilter())
 
 # Create a file handler for logging to a file
-file_handler = RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=10)
-file_handler.setLevel(logging.INFO)
+file_handler = _LazyRotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=10)
 file_handler.setFormatter(formatter)
+file_handler.addFilter(ContextFilter())
+
+# Configure the logger: callers only enqueue, a background thread does the I/O.
+logger = logging.getLogger(__name__)
+logger.setLevel(LOG_LEVEL)
+queue_handler = _ThreadQueueHandler(SimpleQueue())
+logger.addHandler(queue_handler)
+
+listener = QueueListener(queue_handler.queue, stream_handler, file_handler, respect_handler_level=True)
+listener.start()
+
+
+def _stop_listener():
+    # Drain whatever is still queued; safe to call more than once.
+    if listener._thread is not None:
+        listener.stop()
+
+
+atexit.register(_stop_listener)
+
+
+def _restart_listener_in_child():
+    # A forked worker (e.g. the shard process pool) inherits the queue but not
+    # the listener thread; give it its own of both.
+    global listener
+    queue_handler.queue = SimpleQueue()
+    listener = QueueListener(queue_handler.queue, stream_handler, file_handler, respect_handler_level=True)
+    listener.start()
+
+
+def _drain_at_process_exit(_handler):
+    # multiprocessing children leave through os._exit, which skips atexit.
+    multiprocessing.util.Finalize(None, _stop_listener, exitpriority=0)
+
+
+os.register_at_fork(after_in_child=_restart_listener_in_child)
+multiprocessing.util.register_after_fork(queue_handler, _drain_at_process_exit)
+
+
+def log_details(items, msg, fields):
+    """
+    Log per-item detail (e.g. one line per commit) without flooding the handlers.
+
+    Every item is logged at DEBUG. At INFO only every LOG_COMMIT_SAMPLE-th item
+    is, and with sampling off nothing is formatted at all.
 
-# Add the file handler to the logger
-logger.addHandler(file_handler)
\ No newline at end of file
+    Args:
+        items (iterable): The items to describe.
+        msg (str): `%`-style message.
+        fields (callable): Maps an item to the tuple of `msg` arguments.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        level, step = logging.DEBUG, 1
+    elif LOG_COMMIT_SAMPLE > 0 and logger.isEnabledFor(logging.INFO):
+        level, step = logging.INFO, LOG_COMMIT_SAMPLE
+    else:
+        return
+    for item in itertools.islice(items, 0, None, step):
+        logger.log(level, msg, *fields(item))
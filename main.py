@@ -1,15 +1,34 @@
+import time
+# Taken before the imports below so the startup budget covers them.
+_STARTUP_STARTED = time.perf_counter()
+import argparse
+import json
 import os
-import pandas as pd
+import queue
+import signal
+import sys
+import traceback
 from datetime import datetime
 from dotenv import load_dotenv
-from modules.sheet_reader import read_google_sheet
-from modules.github_analyzer import get_commit_diff, get_unique_commits as get_unique_commits_analyzer
-from modules.commit_summarizer import summarize_commit
+from modules.sheet_reader import read_task_sheet, SheetSnapshot, SHEET_SNAPSHOT_PATH
+from modules.commit_store import CommitStore
+from modules.commit_search import commit_source
+from modules.cache import CommitCache
+from modules.history import HistoryStore, HISTORY_ENABLED
+from modules.pipeline import SummaryPipeline, block_failed, GITHUB_CONCURRENCY, OPENAI_CONCURRENCY
+from modules.shard_runner import load_jobs, run_sharded, SHARD_WORKERS, PREFETCH_STATE_PATH
+from modules.backends import register_repositories, refresh_mirrors
+from modules.repo_registry import load_repositories, REPOSITORIES_FILE, DISCOVERY_FULL
+from modules.run_state import RunState, INCREMENTAL_MODE, RUN_STATE_PATH, task_fingerprint
 from modules.timeline_checker import check_timeline_status
 from modules.sheet_writer import write_task_updates
-from modules.predictor import predict_delay_status
+from modules.predictor import predict_delay_status, rule_based_status, TIER_RULES, TIER_LLM
+from modules.batch_mode import summarize_tasks_batch, predict_tasks_batch, NO_COMMITS_SUMMARY
 from modules.utils import compile_task_pattern
-from logger_config import logger
+from modules.task_matcher import TaskMatcher
+from modules.webhook_receiver import WebhookReceiver, Debouncer, WATCH_DEBOUNCE_SECONDS, WATCH_REFRESH_SECONDS
+from modules.metrics import metrics, span, write_report
+from logger_config import logger, log_details
 
 # === Load environment variables ===
 load_dotenv()
@@ -18,156 +37,583 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 SHEET_ID = os.getenv("SHEET_ID")
 SHEET_RANGE = os.getenv("SHEET_RANGE", "Sheet1!A:E")  # default range
+# "interactive" (per-request calls) or "batch" (OpenAI Batch API, for nightly runs)
+OPENAI_MODE = os.getenv("OPENAI_MODE", "interactive").lower()
+# Import + setup time a run may spend before doing any work (see --check-startup).
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "1.0"))
 
 HEADERS = {
     "Authorization": f"Bearer {GITHUB_TOKEN}",
     "Accept": "application/vnd.github.v3+json"
 }
 
-REPOSITORIES = [
+REPOSITORIES = load_repositories(REPOSITORIES_FILE) if REPOSITORIES_FILE else [
     {
         "owner": os.getenv("REPO_1_OWNER", "default-owner-1"),
         "name": os.getenv("REPO_1_NAME", "default-repo-1"),
-        "branch": os.getenv("REPO_1_BRANCH", "main")
+        "branch": os.getenv("REPO_1_BRANCH", "main"),
+        "backend": os.getenv("REPO_1_BACKEND", "rest"),
+        "remote": os.getenv("REPO_1_REMOTE", ""),
+        "discovery": os.getenv("REPO_1_DISCOVERY", DISCOVERY_FULL)
     },
     {
         "owner": os.getenv("REPO_2_OWNER", "default-owner-2"),
         "name": os.getenv("REPO_2_NAME", "default-repo-2"),
-        "branch": os.getenv("REPO_2_BRANCH", "main")
+        "branch": os.getenv("REPO_2_BRANCH", "main"),
+        "backend": os.getenv("REPO_2_BACKEND", "rest"),
+        "remote": os.getenv("REPO_2_REMOTE", ""),
+        "discovery": os.getenv("REPO_2_DISCOVERY", DISCOVERY_FULL)
     },
     {
         "owner": os.getenv("REPO_3_OWNER", "default-owner-3"),
         "name": os.getenv("REPO_3_NAME", "default-repo-3"),
-        "branch": os.getenv("REPO_3_BRANCH", "main")
+        "branch": os.getenv("REPO_3_BRANCH", "main"),
+        "backend": os.getenv("REPO_3_BACKEND", "rest"),
+        "remote": os.getenv("REPO_3_REMOTE", ""),
+        "discovery": os.getenv("REPO_3_DISCOVERY", DISCOVERY_FULL)
     },
 ]
 
 def print_commit_info(commits):
-    for commit in commits:
-        message = commit['commit']['message']
-        created = commit['commit']['author']['date']
-        updated = commit['commit']['committer']['date']
-        logger.info(f"Commit: {message}")
-        logger.info(f"  Created: {created}")
-        logger.info(f"  Updated: {updated}\n")
-
-def is_related(task_name, keyword, commit_msg):
-    import re
-    commit_msg_lower = commit_msg.lower()
-    task_tokens = [w for w in re.findall(r'\w+', task_name.lower()) if len(w) > 2]
-    match_score = sum(1 for token in task_tokens if token in commit_msg_lower)
-    return match_score >= 2 or (keyword and keyword.lower() in commit_msg_lower)
-
-def main():
-    logger.info("🔄 Fetching tasks from Google Sheet...")
-    df = read_google_sheet(SHEET_ID, SHEET_RANGE)
-
-    if df.empty:
-        logger.warning("⚠️ No data found in the sheet.")
+    log_details(commits, "Commit: %s (created %sZ)", lambda c: (c.message, c.date.isoformat()))
+
+def earliest_task_start(tasks):
+    """Oldest valid 'Start Date' in the sheet; commits before it are never needed."""
+    starts = []
+    for task in tasks:
+        try:
+            starts.append(datetime.strptime(str(task.start_date), "%Y-%m-%d"))
+        except ValueError:
+            continue
+    return min(starts) if starts else None
+
+def valid_repositories(repositories):
+    return [repo for repo in repositories if all(repo[k] for k in ("owner", "name", "branch"))]
+
+def match_tasks(tasks, commit_store, repositories=REPOSITORIES):
+    """
+    Return the related commits of every task, scanning each repository once.
+
+    All tasks are compiled into one TaskMatcher and every commit since the
+    earliest task start is matched against all of them in a single pass;
+    a commit is kept for a task only if it was authored on or after that
+    task's start date.
+
+    Returns:
+        list: One list of matched commit dicts per task, in `tasks` order.
+    """
+    matched = [[] for _ in tasks]
+    starts = {}
+    for index, task in enumerate(tasks):
+        try:
+            starts[index] = datetime.strptime(str(task.start_date), "%Y-%m-%d")
+        except ValueError:
+            logger.warning("⚠️ Invalid Start Date '%s' for task: %s", task.start_date, task.name)
+    if not starts:
+        return matched
+
+    matcher = TaskMatcher((index, tasks[index].name, tasks[index].keyword) for index in starts)
+    since = min(starts.values())
+    for repo in valid_repositories(repositories):
+        unique_commits = commit_store.commits_since(repo, since)
+
+        if not unique_commits:
+            logger.warning("⚠️ No unique commits in %s after task start.", repo['name'])
+            continue
+
+        print_commit_info(unique_commits)
+
+        for commit in unique_commits:
+            for hit in matcher.match(commit.message):
+                if commit.date < starts[hit.task]:
+                    continue
+                matched[hit.task].append(matched_commit(commit, tasks[hit.task].keyword))
+    return matched
+
+def matched_commit(commit, keyword):
+    """The per-task record of a related CompactCommit used for summaries and fingerprints."""
+    return {
+        'sha': commit.sha,
+        'date': commit.date.strftime("%Y-%m-%d"),
+        'author': commit.author,
+        'message': commit.message,
+        'keyword': keyword if isinstance(keyword, str) else "",
+        'repo_name': commit.repo_name,
+        'repo_owner': commit.repo_owner
+    }
+
+def summarize_and_predict(pipeline, pending_tasks):
+    """
+    Interactive path: per-task concurrent summaries, then one prediction call
+    per task the rule-based tier left open. Time spent in each is recorded
+    under the "summarize" and "predict" spans.
+
+    Returns:
+        dict: task_name -> (prediction, summary, complete); `complete` is False
+              when a commit of the task could not be fetched or summarized.
+    """
+    with span("summarize"):
+        pipeline.prefetch_stats(c for task in pending_tasks for c in task['matched_commits'])
+    results = {}
+    for task in pending_tasks:
+        task_name = task['task_name']
+        complete = True
+        with span("summarize"):
+            if not task['matched_commits']:
+                summary = NO_COMMITS_SUMMARY
+            else:
+                blocks = pipeline.summarize(task['matched_commits'])
+                complete = not any(block_failed(block) for block in blocks)
+                summary = pipeline.digest(task['matched_commits'], blocks, task_name) if blocks else NO_COMMITS_SUMMARY
+
+        with span("predict"):
+            ai_prediction = task['rule_status'] or predict_delay_status(
+                task_description=task_name,
+                end_date=task['end_date'],
+                commit_summary=summary,
+                openai_api_key=OPENAI_API_KEY
+            )
+        results[task_name] = (ai_prediction, summary, complete)
+    return results
+
+def batch_summarize_and_predict(pipeline, pending_tasks):
+    """Batch path: all summaries in one Batch API job, then all predictions in a second."""
+    summaries, failed = summarize_tasks_batch(pipeline, pending_tasks, OPENAI_API_KEY)
+    escalated = [task for task in pending_tasks if not task['rule_status']]
+    predictions = predict_tasks_batch(escalated, summaries, OPENAI_API_KEY) if escalated else {}
+    results = {}
+    for task in pending_tasks:
+        task_name = task['task_name']
+        results[task_name] = (task['rule_status'] or predictions[task_name], summaries[task_name],
+                              task_name not in failed)
+    return results
+
+def default_job():
+    """The single job described by SHEET_ID / SHEET_RANGE / REPO_* in the environment."""
+    return {
+        "name": "default",
+        "sheet_id": SHEET_ID,
+        "sheet_range": SHEET_RANGE,
+        "worksheet": SHEET_RANGE.split("!")[0],
+        "repositories": REPOSITORIES,
+        "state_dir": None,
+    }
+
+def job_state_path(job, filename, default):
+    return os.path.join(job['state_dir'], filename) if job.get('state_dir') else default
+
+def pending_task(task, matched_commits, fingerprint):
+    """A task to summarize and predict; `rule_status` is set when the rule tier already settled it."""
+    return {
+        'task_name': task.name,
+        'end_date': task.end_date,
+        'matched_commits': matched_commits,
+        'fingerprint': fingerprint,
+        'rule_status': rule_based_status(task, matched_commits),
+    }
+
+def record_predictions(pending_tasks, results, run_state, task_updates):
+    """
+    Add each prediction to `task_updates` and remember successful ones, with their tier, in the run state.
+    A result whose prediction or summary holds an error is written but not
+    remembered, and the task's older result is dropped, so the next run
+    retries it instead of reusing an older or failed one.
+
+    Returns:
+        dict: task_name -> tier that produced the prediction.
+    """
+    tiers = {}
+    for task in pending_tasks:
+        task_name = task['task_name']
+        ai_prediction, summary, complete = results[task_name]
+        tier = tiers[task_name] = TIER_RULES if task['rule_status'] else TIER_LLM
+        metrics.incr("predictions", tier=tier)
+        logger.info("📝 Prediction for '%s' (%s): %s", task_name, tier, ai_prediction)
+        task_updates[task_name] = (ai_prediction, summary)
+        if complete and (tier == TIER_RULES or not ai_prediction.startswith("⚠️")):
+            run_state.set_task_result(task_name, task['fingerprint'], ai_prediction, summary, tier=tier)
+        else:
+            # The "task and repos unchanged" fast path would otherwise serve a result from older commits.
+            run_state.drop_tasks([task_name])
+    return tiers
+
+def record_history(history, job, task_updates, tiers, matches, commits=()):
+    """Append the run to the local history store; a failure there never fails the run."""
+    if history is None:
         return
+    try:
+        history.record_run(job['name'], task_updates, tiers, matches, commits)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not record run history: {e}")
 
-    logger.info("✅ Tasks fetched successfully.")
+def run_job(job, sheet, snapshot, run_state, commit_store, pipeline, history=None):
+    """Match, summarize and predict every task of one sheet, then write the results back."""
+    repositories = valid_repositories(job['repositories'])
     task_updates = {}
+    run_state.drop_tasks(sheet.removed)
 
-    for _, task in df.iterrows():
-        task_name = task['Task Name']
-        start_date = task['Start Date']
-        end_date = task['End Date']
-        keyword = task['Git Keyword']
-        task_pattern = compile_task_pattern(keyword)
+    source = commit_source(commit_store, sheet.tasks, repositories, GITHUB_TOKEN, earliest_task_start(sheet.tasks))
+    # Fast path: neither the task rows nor any repo moved, so previous results still hold.
+    repos_unchanged = source.unchanged(repositories)
+
+    to_match = []
+    for task in sheet.tasks:
+        task_name = task.name
+        task_pattern = compile_task_pattern(task.keyword)
 
         if not task_pattern:
-            logger.debug(f"Skipping task without valid pattern: {task_name}")
+            logger.debug("Skipping task without valid pattern: %s", task_name)
             continue
 
-        matched_commits = []
-        task_start = datetime.strptime(str(start_date), "%Y-%m-%d")
-
-        for repo in REPOSITORIES:
-            if not all(repo.values()):
+        if repos_unchanged and task_name not in sheet.added and task_name not in sheet.changed:
+            previous = run_state.get_last_task_result(task_name)
+            if previous:
+                logger.info("⏭️ Task '%s' and its repos are unchanged, reusing previous prediction.", task_name)
+                task_updates[task_name] = previous
                 continue
 
-            logger.info(f"\n📦 Analyzing Repo: {repo['name']} ({repo['branch']})")
+        to_match.append(task)
 
+    pending_tasks = []
+    matches = {}
+    for task, matched_commits in zip(to_match, match_tasks(to_match, source, repositories)):
+        task_name = task.name
+        end_date = task.end_date
+        matches[task_name] = matched_commits
 
+        fingerprint = task_fingerprint(task_name, end_date, [c['sha'] for c in matched_commits])
+        previous = run_state.get_task_result(task_name, fingerprint) if INCREMENTAL_MODE else None
+        if previous:
+            logger.info("⏭️ Inputs unchanged for task '%s', reusing previous prediction.", task_name)
+            task_updates[task_name] = previous
+            continue
+
+        if not matched_commits:
+            logger.info("❌ No matching commits for task: %s", task_name)
+        else:
+            logger.info("✅ %d matching commits found for task: %s", len(matched_commits), task_name)
+            log_details(matched_commits, "🔹 [%s] %s - %s (%s)",
+                        lambda c: (c['date'], c['author'], c['message'], c['keyword']))
+
+        pending_tasks.append(pending_task(task, matched_commits, fingerprint))
+
+    if OPENAI_MODE == "batch":
+        results = batch_summarize_and_predict(pipeline, pending_tasks)
+    else:
+        results = summarize_and_predict(pipeline, pending_tasks)
+
+    tiers = record_predictions(pending_tasks, results, run_state, task_updates)
+
+    write_task_updates(job['sheet_id'], job['worksheet'], task_updates)
+    logger.info("✅ Sheet updated with AI predictions and summaries.")
+    run_state.save()
+    snapshot.update(sheet.columns, sheet.hashes)
+    snapshot.save()
+
+    start = earliest_task_start(to_match)
+    # Unchanged repos were recorded by an earlier run.
+    commits = [c for repo in repositories for c in source.commits_since(repo, start)] if start else []
+    record_history(history, job, task_updates, tiers, matches, commits)
+    return {"tasks": len(sheet.tasks), "predicted": len(pending_tasks),
+            "reused": len(task_updates) - len(pending_tasks)}
+
+def prefetch_repositories(repositories, path=PREFETCH_STATE_PATH):
+    """
+    Fetch repositories shared by several sharded jobs once, before the shards
+    start, into a run state the shards then read instead of fetching them again.
+
+    Returns:
+        str: Path of the saved run state, holding only this run's comparisons.
+    """
+    metrics.reset()
+    try:
+        with span("prefetch"):
+            register_repositories(repositories, GITHUB_TOKEN)
+            prefetch_state = RunState(path=path)
+            commit_store = CommitStore(token=GITHUB_TOKEN, base_branch="main",
+                                       run_state=prefetch_state, incremental=INCREMENTAL_MODE)
+            fetched = []
+            for repo in repositories:
+                if commit_store.get(repo) is not None:
+                    fetched.append(prefetch_state.repo_key(repo['owner'], repo['name'], "main", repo['branch']))
+            # Failed or no longer shared repositories must not be served from an older run.
+            prefetch_state.keep_repos(fetched)
+            prefetch_state.save()
+            return path
+    finally:
+        write_report("prefetch")
+
+def run_shard(jobs, github_concurrency=GITHUB_CONCURRENCY, openai_concurrency=OPENAI_CONCURRENCY,
+              prefetched=None):
+    """
+    Run jobs in one process: every repository is fetched once into a shared
+    commit store and served to all of them. `prefetched` is the path of a run
+    state whose comparisons were already fetched for this run.
+    Timings and counters of the run are written under logs/ when it ends.
+
+    Returns:
+        dict: job name -> {"status": "ok" | "skipped" | "failed", ...}.
+    """
+    metrics.reset()
+    try:
+        with span("run"):
+            return run_jobs(jobs, github_concurrency, openai_concurrency, prefetched)
+    finally:
+        write_report("+".join(job['name'] for job in jobs))
+
+def run_jobs(jobs, github_concurrency, openai_concurrency, prefetched=None):
+    results = {}
+    loaded = []
+    for job in jobs:
+        logger.info(f"🔄 Fetching tasks from Google Sheet for job '{job['name']}'...")
+        snapshot = SheetSnapshot(path=job_state_path(job, "sheet_snapshot.json", SHEET_SNAPSHOT_PATH))
+        sheet = read_task_sheet(job['sheet_id'], job['sheet_range'], snapshot)
+        metrics.set_gauge("sheet_tasks", len(sheet.tasks), job=job['name'])
+        if not sheet.tasks:
+            logger.warning("⚠️ No data found in the sheet.")
+            results[job['name']] = {"status": "skipped", "error": "no tasks read from sheet"}
+            continue
+        logger.info(f"✅ Tasks fetched successfully: {len(sheet.added)} added, "
+                    f"{len(sheet.changed)} changed, {len(sheet.removed)} removed since last run.")
+        run_state = RunState(path=job_state_path(job, "run_state.json", RUN_STATE_PATH))
+        loaded.append((job, sheet, snapshot, run_state))
+
+    if not loaded:
+        return results
+
+    repositories = []
+    for job, _, _, _ in loaded:
+        repositories.extend(r for r in valid_repositories(job['repositories']) if r not in repositories)
+    register_repositories(repositories, GITHUB_TOKEN)
+
+    # Shards hold one job (see plan_shards), whose run state also keeps the repo comparisons.
+    repo_state = loaded[0][3]
+    starts = [earliest_task_start(sheet.tasks) for _, sheet, _, _ in loaded]
+    starts = [start for start in starts if start is not None]
+    # One comparison per repo/branch for the whole shard, shared by every task.
+    commit_store = CommitStore(token=GITHUB_TOKEN, base_branch="main",
+                               run_state=repo_state, incremental=INCREMENTAL_MODE,
+                               since=min(starts) if starts else None,
+                               prefetched=RunState(path=prefetched) if prefetched else None)
+    cache = CommitCache()
+    history = HistoryStore() if HISTORY_ENABLED else None
+    pipeline = SummaryPipeline(cache, GITHUB_TOKEN, OPENAI_API_KEY,
+                               github_concurrency=github_concurrency, openai_concurrency=openai_concurrency)
+    try:
+        for job, sheet, snapshot, run_state in loaded:
+            started = time.monotonic()
             try:
-                all_commits = get_unique_commits_analyzer(
-                    repo_owner=repo['owner'],
-                    repo_name=repo['name'],
-                    base_branch="main",
-                    head_branch=repo['branch'],
-                    token=GITHUB_TOKEN
-                )
+                outcome = run_job(job, sheet, snapshot, run_state, commit_store, pipeline, history)
+                results[job['name']] = {"status": "ok", **outcome}
             except Exception as e:
-                logger.error(f"❌ Failed to fetch commits: {e}")
-                continue
+                logger.error(f"❌ Job '{job['name']}' failed: {e}")
+                logger.debug(traceback.format_exc())
+                results[job['name']] = {"status": "failed", "error": str(e)}
+            results[job['name']]["seconds"] = round(time.monotonic() - started, 1)
+    finally:
+        pipeline.close()
+        pipeline.report()
+        cache.report()
+        cache.close()
+        if history is not None:
+            history.close()
+    return results
+
+def load_watched_tasks(job, snapshot, run_state, repositories):
+    """
+    Read the sheet and match every task against the repositories once.
 
-            unique_commits = [commit for commit in all_commits if datetime.strptime(commit['commit']['author']['date'][:10], "%Y-%m-%d") >= task_start]
+    Returns:
+        tuple: (task name -> {"task", "start", "matched", "shas"}, TaskMatcher
+               over the same tasks for matching pushed commits).
+    """
+    # Git mirrors were fetched when first opened; bring them up to date for this pass.
+    refresh_mirrors((repo['owner'], repo['name']) for repo in repositories)
+    sheet = read_task_sheet(job['sheet_id'], job['sheet_range'], snapshot)
+    tasks = [task for task in sheet.tasks if compile_task_pattern(task.keyword)]
+    since = earliest_task_start(tasks)
+    commit_store = CommitStore(token=GITHUB_TOKEN, base_branch="main", run_state=run_state,
+                               incremental=INCREMENTAL_MODE, since=since)
+    source = commit_source(commit_store, tasks, repositories, GITHUB_TOKEN, since)
+    watched = {}
+    for task, matched in zip(tasks, match_tasks(tasks, source, repositories)):
+        try:
+            start = datetime.strptime(str(task.start_date), "%Y-%m-%d")
+        except ValueError:
+            start = None
+        watched[task.name] = {"task": task, "start": start, "matched": matched,
+                              "shas": {c['sha'] for c in matched}}
+    run_state.save()
+    logger.info("👀 Watching %d tasks across %d repositories.", len(watched), len(repositories))
+    return watched, TaskMatcher((task.name, task.name, task.keyword) for task in tasks)
 
-            if not unique_commits:
-                logger.warning(f"⚠️ No unique commits in {repo['name']} after task start.")
+def apply_pushed_commits(commits, watched, matcher, debouncer):
+    """Add pushed commits to the tasks they match and (re)start those tasks' debounce timers."""
+    # The pushed commits are not in a git mirror until it is fetched again.
+    refresh_mirrors((commit.repo_owner, commit.repo_name) for commit in commits)
+    for commit in commits:
+        for hit in matcher.match(commit.message):
+            entry = watched.get(hit.task)
+            if entry is None or entry['start'] is None or commit.sha in entry['shas']:
+                continue
+            if commit.date < entry['start']:
                 continue
+            entry['matched'].append(matched_commit(commit, entry['task'].keyword))
+            entry['shas'].add(commit.sha)
+            logger.info("📬 Pushed commit %.7s matches task: %s", commit.sha, hit.task)
+            debouncer.touch(hit.task)
 
-            print_commit_info(unique_commits)
+def flush_watched_tasks(job, names, watched, run_state, pipeline, history=None):
+    """Summarize only the new commits, re-predict and write the given tasks in one sheet update."""
+    pending_tasks = []
+    for name in names:
+        entry = watched.get(name)
+        if entry is None:
+            continue
+        task = entry['task']
+        fingerprint = task_fingerprint(name, task.end_date, [c['sha'] for c in entry['matched']])
+        if run_state.get_task_result(name, fingerprint):
+            continue
+        pending_tasks.append(pending_task(task, entry['matched'], fingerprint))
+    if not pending_tasks:
+        return
 
-            for commit in unique_commits:
-                try:
-                    commit_msg = commit['commit']['message']
-                    keyword_str = str(keyword) if isinstance(keyword, str) and not pd.isna(keyword) else ""
-
-                    if is_related(task_name, keyword_str, commit_msg):
-                        matched_commits.append({
-                            'sha': commit['sha'],
-                            'date': commit['commit']['author']['date'][:10],
-                            'author': commit['commit']['author']['name'],
-                            'message': commit_msg.strip(),
-                            'keyword': keyword_str,
-                            'repo_name': repo['name'],
-                            'repo_owner': repo['owner']
-                        })
-                except (KeyError, ValueError) as e:
-                    logger.warning(f"⚠️ Commit processing error: {e}")
-                    continue
+    # Summaries of previously seen changes come from the cache; only new ones reach the model.
+    results = summarize_and_predict(pipeline, pending_tasks)
+    task_updates = {}
+    tiers = record_predictions(pending_tasks, results, run_state, task_updates)
+    write_task_updates(job['sheet_id'], job['worksheet'], task_updates)
+    run_state.save()
+    logger.info("✅ Sheet updated for %d task(s) after pushes.", len(task_updates))
+    record_history(history, job, task_updates, tiers,
+                   {task['task_name']: task['matched_commits'] for task in pending_tasks})
 
-        if not matched_commits:
-            logger.info(f"❌ No matching commits for task: {task_name}")
-            summary = "No relevant commits found."
-        else:
-            logger.info(f"✅ Matching commits found for task: {task_name}")
-            for commit in matched_commits:
-                print(f"🔹 [{commit['date']}] {commit['author']} - {commit['message']} ({commit['keyword']})")
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
 
-            summaries = []
-            for c in matched_commits:
-                try:
-                    logger.info(f"🧠 Summarizing commit {c['sha']} from {c['repo_name']}...")
-                    diff = get_commit_diff(c['repo_owner'], c['repo_name'], c['sha'], GITHUB_TOKEN)
+def run_watch(job, github_concurrency=GITHUB_CONCURRENCY, openai_concurrency=OPENAI_CONCURRENCY):
+    """
+    Long-running mode driven by GitHub `push` webhooks instead of polling.
 
-                    if diff.strip():
-                        part_summary = summarize_commit(diff, OPENAI_API_KEY, task_name=str(task_name))
-                    else:
-                        part_summary = "⚠️ Empty diff or no content to summarize."
+    Every task's matched commits are loaded once and kept in memory. Pushed
+    commits are matched with the same rules as a regular run; a task that
+    gained commits is re-predicted once no push has touched it for
+    WATCH_DEBOUNCE_SECONDS, and all tasks due together go out in one sheet
+    update. The sheet and repositories are re-read every WATCH_REFRESH_SECONDS
+    to pick up edited tasks and missed deliveries. Pending tasks are flushed
+    on Ctrl-C / SIGTERM.
+    """
+    metrics.reset()
+    signal.signal(signal.SIGTERM, _interrupt)
+    repositories = valid_repositories(job['repositories'])
+    register_repositories(repositories, GITHUB_TOKEN)
+    run_state = RunState(path=job_state_path(job, "run_state.json", RUN_STATE_PATH))
+    # Compared against, never saved: the regular run still owns the snapshot.
+    snapshot = SheetSnapshot(path=job_state_path(job, "sheet_snapshot.json", SHEET_SNAPSHOT_PATH))
+    cache = CommitCache()
+    history = HistoryStore() if HISTORY_ENABLED else None
+    pipeline = SummaryPipeline(cache, GITHUB_TOKEN, OPENAI_API_KEY,
+                               github_concurrency=github_concurrency, openai_concurrency=openai_concurrency)
+    pushes = queue.SimpleQueue()
+    debouncer = Debouncer(WATCH_DEBOUNCE_SECONDS)
+    watched, matcher = load_watched_tasks(job, snapshot, run_state, repositories)
+    next_refresh = time.monotonic() + WATCH_REFRESH_SECONDS
+    receiver = WebhookReceiver(pushes.put, repositories).start()
 
-                    summaries.append(f"🔹 Commit {c['sha'][:7]}:\n{part_summary}")
-                    logger.info(f"✅ Summary complete for {c['sha']}")
+    def flush(names):
+        try:
+            flush_watched_tasks(job, names, watched, run_state, pipeline, history)
+        except Exception as e:
+            logger.error(f"❌ Updating {len(names)} task(s) failed, will retry: {e}")
+            logger.debug(traceback.format_exc())
+            for name in names:
+                debouncer.touch(name)
+
+    try:
+        while True:
+            until_refresh = max(0.0, next_refresh - time.monotonic())
+            until_due = debouncer.seconds_until_next()
+            wait = until_refresh if until_due is None else min(until_due, until_refresh)
+            try:
+                apply_pushed_commits(pushes.get(timeout=wait), watched, matcher, debouncer)
+            except queue.Empty:
+                pass
+
+            due = debouncer.pop_due()
+            if due:
+                flush(due)
+            if time.monotonic() >= next_refresh:
+                try:
+                    watched, matcher = load_watched_tasks(job, snapshot, run_state, repositories)
                 except Exception as e:
-                    logger.error(f"❌ Summary failed for {c['sha']}: {e}")
-                    summaries.append(f"❌ Commit {c['sha'][:7]} failed: {e}")
+                    logger.error(f"❌ Refreshing watched tasks failed: {e}")
+                next_refresh = time.monotonic() + WATCH_REFRESH_SECONDS
+    except KeyboardInterrupt:
+        logger.info("🛑 Stopping watch mode...")
+    finally:
+        receiver.stop()
+        while True:
+            try:
+                apply_pushed_commits(pushes.get_nowait(), watched, matcher, debouncer)
+            except queue.Empty:
+                break
+        remaining = debouncer.pop_all()
+        if remaining:
+            flush(remaining)
+        pipeline.close()
+        pipeline.report()
+        cache.close()
+        if history is not None:
+            history.close()
+        run_state.save()
+        write_report(f"watch-{job['name']}")
 
-            summary = "\n\n".join(summaries) if summaries else "No relevant commits found."
+def print_history(task_name, since=None):
+    """Print a task's recorded predictions as JSON lines, oldest first, from the local history only."""
+    history = HistoryStore()
+    try:
+        for row in history.task_history(task_name, since=since):
+            print(json.dumps(row, ensure_ascii=False))
+    finally:
+        history.close()
 
-        ai_prediction = predict_delay_status(
-            task_description=task_name,
-            end_date=end_date,
-            commit_summary=summary,
-            openai_api_key=OPENAI_API_KEY
-        )
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Track task progress from GitHub commits.")
+    parser.add_argument("--jobs", help="JSON file listing (sheet, tab, repositories) jobs to run sharded")
+    parser.add_argument("--workers", type=int, default=SHARD_WORKERS, help="worker processes for --jobs")
+    parser.add_argument("--watch", action="store_true",
+                        help="serve GitHub push webhooks and update affected tasks as commits arrive")
+    parser.add_argument("--history", metavar="TASK",
+                        help="print the recorded prediction history of a task and exit (no GitHub/Sheets access)")
+    parser.add_argument("--since", help="with --history: only runs on or after this YYYY-MM-DD date")
+    parser.add_argument("--check-startup", action="store_true",
+                        help="report the import/startup time and exit non-zero if over STARTUP_BUDGET_SECONDS")
+    args = parser.parse_args(argv)
 
-        logger.info(f"📝 Prediction for '{task_name}': {ai_prediction}")
-        task_updates[task_name] = (ai_prediction, summary)
+    startup = time.perf_counter() - _STARTUP_STARTED
+    if args.check_startup:
+        print(json.dumps({"startup_seconds": round(startup, 3), "budget_seconds": STARTUP_BUDGET_SECONDS}))
+        sys.exit(0 if startup <= STARTUP_BUDGET_SECONDS else 1)
+    if startup > STARTUP_BUDGET_SECONDS:
+        logger.warning("🐢 Startup took %.2fs, over the %.2fs budget.", startup, STARTUP_BUDGET_SECONDS)
 
-    write_task_updates(SHEET_ID, "Sheet1", task_updates)
-    logger.info("✅ Sheet updated with AI predictions and summaries.")
+    if args.history:
+        print_history(args.history, since=args.since)
+        return
+
+    if args.watch:
+        if args.jobs:
+            parser.error("--watch runs the single job from the environment; it cannot be combined with --jobs")
+        run_watch(default_job())
+        return
+
+    if not args.jobs:
+        run_shard([default_job()])
+        return
+
+    report = run_sharded(load_jobs(args.jobs), run_shard, workers=args.workers, prefetch_fn=prefetch_repositories)
+    if report["failed"]:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
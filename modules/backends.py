@@ -0,0 +1,91 @@
+import threading
+from modules import github_analyzer
+from modules.git_mirror import GitMirror
+from logger_config import logger
+
+REST_BACKEND = "rest"
+GIT_BACKEND = "git"
+
+
+class GitHubBackend:
+    """Commit source backed by the GitHub REST API."""
+
+    name = REST_BACKEND
+
+    def __init__(self, repo_owner, repo_name, token=None):
+        self.repo_owner = repo_owner
+        self.repo_name = repo_name
+        self.token = token
+
+    def get_branch_sha(self, branch):
+        return github_analyzer.get_branch_sha(self.repo_owner, self.repo_name, branch, self.token)
+
+    def iter_unique_commits(self, base, head, since=None, meta=None):
+        return github_analyzer.iter_unique_commits(
+            self.repo_owner, self.repo_name, base, head, self.token, since=since, meta=meta
+        )
+
+    def count_unique_commits(self, base, head):
+        return github_analyzer.count_unique_commits(self.repo_owner, self.repo_name, base, head, self.token)
+
+    def get_commit_files(self, sha):
+        return github_analyzer.get_commit_files(self.repo_owner, self.repo_name, sha, self.token)
+
+    def get_commit_diff(self, sha):
+        return github_analyzer.get_commit_diff(self.repo_owner, self.repo_name, sha, self.token)
+
+
+class GitMirrorBackend(GitMirror):
+    """Commit source backed by a local bare mirror (see modules/git_mirror.py)."""
+
+    name = GIT_BACKEND
+
+
+_backends = {}
+_lock = threading.Lock()
+
+
+def default_remote(repo):
+    return f"https://github.com/{repo['owner']}/{repo['name']}.git"
+
+
+def register_repositories(repositories, token=None):
+    """
+    Create one backend per configured repository.
+
+    Each REPOSITORIES entry may set 'backend' to "rest" (default) or "git";
+    git entries may set 'remote' to any git URL, defaulting to GitHub.
+    """
+    with _lock:
+        for repo in repositories:
+            key = (repo['owner'], repo['name'])
+            if key in _backends:
+                continue
+            kind = (repo.get('backend') or REST_BACKEND).lower()
+            if kind == GIT_BACKEND:
+                _backends[key] = GitMirrorBackend(
+                    repo['owner'], repo['name'], repo.get('remote') or default_remote(repo), token
+                )
+            else:
+                if kind != REST_BACKEND:
+                    logger.warning(f"⚠️ Unknown backend '{kind}' for {key[0]}/{key[1]}, using REST.")
+                _backends[key] = GitHubBackend(repo['owner'], repo['name'], token)
+
+
+def refresh_mirrors(repo_keys):
+    """Make the git mirrors among `repo_keys` ((owner, name) pairs) fetch again on next use."""
+    with _lock:
+        backends = [_backends.get(key) for key in set(repo_keys)]
+    for backend in backends:
+        if isinstance(backend, GitMirror):
+            backend.mark_stale()
+
+
+def backend_for(repo_owner, repo_name, token=None):
+    """Return the backend registered for a repository, defaulting to REST."""
+    with _lock:
+        backend = _backends.get((repo_owner, repo_name))
+        if backend is None:
+            backend = GitHubBackend(repo_owner, repo_name, token)
+            _backends[(repo_owner, repo_name)] = backend
+        return backend
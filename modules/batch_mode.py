@@ -0,0 +1,80 @@
+from modules.commit_summarizer import build_summary_request, EMPTY_RESPONSE
+from modules.predictor import build_prediction_request, NO_RESPONSE
+from modules.pipeline import format_summary, format_failure, block_failed
+from modules.openai_batch import run_chat_batch
+from logger_config import logger
+
+NO_COMMITS_SUMMARY = "No relevant commits found."
+
+
+def summarize_tasks_batch(pipeline, pending_tasks, openai_api_key):
+    """
+    Summarize the matched commits of every pending task with one Batch API job.
+
+    Diffs are fetched through the pipeline's GitHub stage (cache-aware and
+    concurrent); every distinct change (patch ID) that still needs a model
+    summary becomes one batch request, shared by all commits and tasks it
+    appears under.
+
+    Args:
+        pending_tasks (list): Dicts with 'task_name' and 'matched_commits'.
+
+    Returns:
+        tuple: (summaries, failed) - task_name -> summary text (digested when
+               large, same format as the interactive path), and the set of task
+               names whose summary contains failed commit blocks. Digest
+               roll-ups run interactively.
+    """
+    pipeline.prefetch_stats(c for task in pending_tasks for c in task['matched_commits'])
+    prepared_by_task = {}
+    requests = {}
+    for task in pending_tasks:
+        prepared = pipeline.prepare(task['matched_commits'], queued=requests)
+        prepared_by_task[task['task_name']] = prepared
+        for item in prepared:
+            if item.diff is not None and item.patch_id not in requests:
+                requests[item.patch_id] = build_summary_request(item.diff)
+
+    logger.info(f"🧠 Summarizing {len(requests)} distinct changes in batch mode...")
+    results = run_chat_batch([(f"sum-{patch}", body) for patch, body in requests.items()],
+                             openai_api_key, description="commit summaries")
+    resolved = {}
+    for patch in requests:
+        resolved[patch] = results.get(f"sum-{patch}") or EMPTY_RESPONSE
+        pipeline.store_summary(patch, resolved[patch])
+
+    summaries, failed = {}, set()
+    for task in pending_tasks:
+        blocks = []
+        for item in prepared_by_task[task['task_name']]:
+            sha = item.commit['sha']
+            if item.error is not None:
+                blocks.append(format_failure(sha, item.error))
+                continue
+            part_summary = item.summary if item.summary is not None else resolved[item.patch_id]
+            blocks.append(format_summary(sha, part_summary))
+        if any(block_failed(block) for block in blocks):
+            failed.add(task['task_name'])
+        summaries[task['task_name']] = (
+            pipeline.digest(task['matched_commits'], blocks, task['task_name']) if blocks else NO_COMMITS_SUMMARY
+        )
+    return summaries, failed
+
+
+def predict_tasks_batch(pending_tasks, summaries, openai_api_key):
+    """
+    Predict the status of every pending task with one Batch API job.
+
+    Returns:
+        dict: task_name -> prediction text (or an error message).
+    """
+    requests = [
+        (f"pred-{i}", build_prediction_request(task['task_name'], task['end_date'], summaries[task['task_name']]))
+        for i, task in enumerate(pending_tasks)
+    ]
+    logger.info(f"🔮 Predicting {len(requests)} tasks in batch mode...")
+    results = run_chat_batch(requests, openai_api_key, description="task predictions")
+    return {
+        task['task_name']: results.get(f"pred-{i}") or NO_RESPONSE
+        for i, task in enumerate(pending_tasks)
+    }
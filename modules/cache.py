@@ -0,0 +1,258 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from modules.metrics import incr
+from logger_config import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_PATH = os.getenv("CACHE_PATH", "data/cache.sqlite")
+CACHE_MAX_AGE_DAYS = float(os.getenv("CACHE_MAX_AGE_DAYS", "90"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Version 2: the diffs table stores a JSON list of changed files instead of diff text.
+# Version 3: adds group_summaries (digest roll-ups keyed by a content hash).
+# Version 4: summaries are keyed by patch ID (see modules/patch_id.py) instead of (sha, task).
+# Version 5: file lists keep blob SHAs, and patch IDs of files without a patch hash them.
+_SCHEMA_VERSION = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS diffs (
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (owner, repo, sha)
+);
+CREATE TABLE IF NOT EXISTS patch_ids (
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (owner, repo, sha)
+);
+CREATE TABLE IF NOT EXISTS patch_summaries (
+    patch_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (patch_id, model, prompt_version)
+);
+CREATE TABLE IF NOT EXISTS group_summaries (
+    key TEXT NOT NULL PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_diffs_accessed ON diffs (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_patch_ids_accessed ON patch_ids (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_patch_summaries_accessed ON patch_summaries (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_group_summaries_accessed ON group_summaries (accessed_at);
+"""
+
+_TABLES = ("diffs", "patch_ids", "patch_summaries", "group_summaries")
+
+# Oldest entries read per step while picking what to evict for size.
+_EVICT_BATCH = 500
+
+
+class CommitCache:
+    """
+    Persistent SQLite cache for commit diffs, patch IDs, LLM summaries and group digests.
+
+    Summaries are stored per patch ID, so a change that reappears under
+    another SHA (cherry-pick, rebase, another repository) reuses them.
+    Commit content is immutable, so entries never need invalidation; they
+    are only evicted by age (last access) and by total stored size (LRU).
+    """
+
+    def __init__(self, path=CACHE_PATH, max_age_days=CACHE_MAX_AGE_DAYS, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Shard processes share the cache file; wait for each other's writes.
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._migrate()
+        self._conn.executescript(_SCHEMA)
+        self.evict()
+
+    def _migrate(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < _SCHEMA_VERSION:
+            if version < 2:
+                # Older diff rows are in an incompatible format; they are cheap to refetch.
+                self._conn.execute("DROP TABLE IF EXISTS diffs")
+            if version < 4:
+                # Per-(sha, task) summaries were superseded by per-patch summaries.
+                self._conn.execute("DROP TABLE IF EXISTS summaries")
+            if version < 5:
+                # Patch IDs of commits touching binary or omitted patches could collide.
+                self._conn.execute("DROP TABLE IF EXISTS diffs")
+                self._conn.execute("DROP TABLE IF EXISTS patch_ids")
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            self._conn.commit()
+
+    # --- diffs -------------------------------------------------------------
+
+    def get_files(self, owner, repo, sha):
+        """Return the cached changed-file list of a commit, or None."""
+        value = self._get(
+            "diffs", "diff",
+            "owner = ? AND repo = ? AND sha = ?", (owner, repo, sha)
+        )
+        return json.loads(value) if value is not None else None
+
+    def put_files(self, owner, repo, sha, files):
+        self._put(
+            "diffs", ("owner", "repo", "sha"), (owner, repo, sha), json.dumps(files)
+        )
+
+    # --- patch IDs -----------------------------------------------------------
+
+    def get_patch_id(self, owner, repo, sha):
+        """Return the patch ID computed for a commit earlier, or None."""
+        return self._get(
+            "patch_ids", "patch_id",
+            "owner = ? AND repo = ? AND sha = ?", (owner, repo, sha)
+        )
+
+    def put_patch_id(self, owner, repo, sha, patch_id):
+        self._put("patch_ids", ("owner", "repo", "sha"), (owner, repo, sha), patch_id)
+
+    # --- summaries ---------------------------------------------------------
+
+    def get_summary(self, patch_id, model, prompt_version):
+        return self._get(
+            "patch_summaries", "summary",
+            "patch_id = ? AND model = ? AND prompt_version = ?",
+            (patch_id, model, prompt_version)
+        )
+
+    def put_summary(self, patch_id, model, prompt_version, summary):
+        self._put(
+            "patch_summaries", ("patch_id", "model", "prompt_version"),
+            (patch_id, model, prompt_version), summary
+        )
+
+    # --- group summaries ---------------------------------------------------
+
+    def get_group_summary(self, key):
+        return self._get("group_summaries", "group", "key = ?", (key,))
+
+    def put_group_summary(self, key, summary):
+        self._put("group_summaries", ("key",), (key,), summary)
+
+    # --- maintenance -------------------------------------------------------
+
+    def evict(self):
+        """Drop entries older than max_age_days, then LRU entries above max_bytes."""
+        with self._lock:
+            cutoff = time.time() - self.max_age_days * 86400
+            expired = 0
+            for table in _TABLES:
+                expired += self._conn.execute(
+                    f"DELETE FROM {table} WHERE accessed_at < ?", (cutoff,)
+                ).rowcount
+
+            overflow = self._total_bytes() - self.max_bytes
+            trimmed = 0
+            if overflow > 0:
+                # Oldest entries across all tables go first: walk them once, in batches, until enough
+                # bytes are freed, then delete them together.
+                victims = {table: [] for table in _TABLES}
+                cursor = self._conn.execute(
+                    " UNION ALL ".join(
+                        f"SELECT '{table}', rowid, size, accessed_at FROM {table}" for table in _TABLES
+                    ) + " ORDER BY accessed_at"
+                )
+                while overflow > 0:
+                    rows = cursor.fetchmany(_EVICT_BATCH)
+                    if not rows:
+                        break
+                    for table, rowid, size, _ in rows:
+                        victims[table].append((rowid,))
+                        overflow -= size
+                        if overflow <= 0:
+                            break
+                cursor.close()
+                for table, rowids in victims.items():
+                    if rowids:
+                        self._conn.executemany(f"DELETE FROM {table} WHERE rowid = ?", rowids)
+                        trimmed += len(rowids)
+            self._conn.commit()
+            self.stats["evicted"] += expired + trimmed
+
+        if expired or trimmed:
+            logger.info(f"🧹 Cache eviction: {expired} expired, {trimmed} trimmed for size.")
+
+    def report(self):
+        """Log hit/miss counters for this run."""
+        for kind, label in (("diff", "diffs"), ("patch_id", "patch IDs"), ("summary", "summaries"),
+                            ("group", "group summaries")):
+            hits = self.stats[f"{kind}_hit"]
+            misses = self.stats[f"{kind}_miss"]
+            total = hits + misses
+            rate = (hits / total * 100) if total else 0.0
+            logger.info(f"📊 Cache {label}: {hits} hits, {misses} misses ({rate:.0f}% hit rate)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- internals ---------------------------------------------------------
+
+    def _total_bytes(self):
+        total = 0
+        for table in _TABLES:
+            total += self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+        return total
+
+    def _get(self, table, kind, where, params):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT rowid, value FROM {table} WHERE {where}", params
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    f"UPDATE {table} SET accessed_at = ? WHERE rowid = ?", (time.time(), row[0])
+                )
+                self._conn.commit()
+                self.stats[f"{kind}_hit"] += 1
+                incr("cache_lookups", kind=kind, result="hit")
+                return row[1]
+            self.stats[f"{kind}_miss"] += 1
+            incr("cache_lookups", kind=kind, result="miss")
+            return None
+
+    def _put(self, table, key_columns, key_values, value):
+        now = time.time()
+        columns = ", ".join(key_columns + ("value", "size", "created_at", "accessed_at"))
+        placeholders = ", ".join("?" * (len(key_columns) + 4))
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {table} ({columns}) VALUES ({placeholders})",
+                key_values + (value, len(value.encode("utf-8")), now, now)
+            )
+            self._conn.commit()
@@ -0,0 +1,207 @@
+import os
+from collections import defaultdict
+from modules import github_analyzer
+from modules.backends import backend_for, REST_BACKEND
+from modules.commit_store import compact_commit
+from modules.github_analyzer import SearchOverflow
+from modules.repo_registry import DISCOVERY_FULL, DISCOVERY_SEARCH
+from modules.task_matcher import task_keywords
+from modules.metrics import incr, span
+from logger_config import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "full" downloads every commit of every repository; "search" asks the GitHub
+# commit search for commits mentioning task keywords (see SearchCommitSource).
+COMMIT_DISCOVERY = os.getenv("COMMIT_DISCOVERY", "full").lower()
+# Search repositories of one owner with a single `user:` qualifier once this
+# many of them are tracked, instead of one `repo:` qualifier each.
+SEARCH_OWNER_SCOPE_MIN_REPOS = int(os.getenv("SEARCH_OWNER_SCOPE_MIN_REPOS", "4"))
+# GitHub search limits: 256 characters per query and 5 AND/OR/NOT operators.
+SEARCH_QUERY_MAX_LENGTH = 256
+SEARCH_MAX_KEYWORDS = 6
+
+
+def repo_key(owner, name):
+    """(owner, name) compared case-insensitively, as GitHub does."""
+    return (owner or "").lower(), (name or "").lower()
+
+
+def quote_keyword(keyword):
+    return '"' + keyword.replace('"', " ").strip() + '"'
+
+
+def search_scopes(repositories):
+    """
+    Group repositories into search qualifiers.
+
+    Returns:
+        list: (qualifiers, {(owner, name), ...}) pairs; `qualifiers` is a list
+              of `user:` / `repo:` terms that all fit in one query next to the
+              keywords.
+    """
+    by_owner = defaultdict(list)
+    for repo in repositories:
+        key = repo_key(repo['owner'], repo['name'])
+        by_owner[key[0]].append(key)
+
+    scopes = []
+    budget = SEARCH_QUERY_MAX_LENGTH // 2
+    for owner, keys in by_owner.items():
+        if len(keys) >= SEARCH_OWNER_SCOPE_MIN_REPOS:
+            scopes.append(([f"user:{owner}"], set(keys)))
+            continue
+        qualifiers, covered = [], set()
+        for owner_name in keys:
+            term = "repo:{}/{}".format(*owner_name)
+            if qualifiers and len(" ".join(qualifiers + [term])) > budget:
+                scopes.append((qualifiers, covered))
+                qualifiers, covered = [], set()
+            qualifiers.append(term)
+            covered.add(owner_name)
+        scopes.append((qualifiers, covered))
+    return scopes
+
+
+def build_queries(keywords, qualifiers, since=None):
+    """
+    Pack keywords into as few `"kw1" OR "kw2" ... <qualifiers>` queries as the
+    query length and operator limits allow.
+
+    Returns:
+        list: (keywords, query) pairs.
+    """
+    fixed = list(qualifiers)
+    if since is not None:
+        fixed.append(f"committer-date:>={since.strftime('%Y-%m-%d')}")
+    suffix = " " + " ".join(fixed)
+
+    queries = []
+    group = []
+    for keyword in keywords:
+        candidate = group + [keyword]
+        text = " OR ".join(quote_keyword(k) for k in candidate) + suffix
+        if group and (len(candidate) > SEARCH_MAX_KEYWORDS or len(text) > SEARCH_QUERY_MAX_LENGTH):
+            queries.append((group, " OR ".join(quote_keyword(k) for k in group) + suffix))
+            group = [keyword]
+        else:
+            group = candidate
+    if group:
+        queries.append((group, " OR ".join(quote_keyword(k) for k in group) + suffix))
+    return queries
+
+
+class SearchCommitSource:
+    """
+    Commit source for matching that asks GitHub's commit search for
+    candidates instead of downloading every commit.
+
+    Every task keyword is searched for across all eligible repositories,
+    several keywords and repositories per query, from the earliest task start
+    on. Request volume therefore grows with the number of keywords and
+    matches, not with commit volume. The candidates are then matched exactly
+    as downloaded commits would be.
+
+    A repository is searched only if its entry sets "discovery" to "search",
+    it uses the REST backend and its tracked branch is its default branch
+    (the only branch GitHub indexes). Other repositories, and those in a query whose
+    results overflow the search API even for a single keyword, are served
+    from the full download of `commit_store`.
+
+    Search finds whole-word keyword mentions anywhere in the default branch
+    history, including commits already merged into the base branch, which
+    the compare-based download leaves out; that is why a repository is only
+    searched when its entry opts in. Tasks that match only on name words, or
+    on a keyword inside a longer word, need full discovery.
+
+    Offers the `commits_since`/`unchanged` interface of CommitStore.
+    """
+
+    def __init__(self, commit_store, tasks, repositories, token=None, since=None):
+        self.commit_store = commit_store
+        self.token = token
+        self.since = since
+        self._keywords = sorted({kw for task in tasks for kw in task_keywords(task.keyword)})
+        self._repositories = repositories
+        self._candidates = None
+        self._fallback = set()
+
+    def unchanged(self, repos):
+        # Searching tells nothing about branch heads; per-task fingerprints still skip unchanged work.
+        return False
+
+    def commits_since(self, repo, start):
+        if self._candidates is None:
+            self._discover()
+        key = repo_key(repo['owner'], repo['name'])
+        if key not in self._candidates:
+            return self.commit_store.commits_since(repo, start)
+        return [c for c in self._candidates[key] if start is None or c.date >= start]
+
+    def _searchable(self, repo):
+        if repo.get('discovery', DISCOVERY_FULL) != DISCOVERY_SEARCH:
+            return False
+        if backend_for(repo['owner'], repo['name'], self.token).name != REST_BACKEND:
+            return False
+        try:
+            default_branch = github_analyzer.get_default_branch(repo['owner'], repo['name'], self.token)
+        except Exception as e:
+            logger.warning("⚠️ Could not read the default branch of %s/%s, downloading it in full: %s",
+                           repo['owner'], repo['name'], e)
+            return False
+        if default_branch != repo['branch']:
+            logger.info("📦 %s/%s tracks '%s', not its default branch '%s'; downloading it in full.",
+                        repo['owner'], repo['name'], repo['branch'], default_branch)
+            return False
+        return True
+
+    def _discover(self):
+        searchable = [repo for repo in self._repositories if self._searchable(repo)]
+        by_key = {repo_key(repo['owner'], repo['name']): repo for repo in searchable}
+        found = {key: {} for key in by_key}
+        queries = 0
+
+        with span("github.commit_discovery"):
+            for qualifiers, keys in search_scopes(searchable):
+                pending = build_queries(self._keywords, qualifiers, self.since)
+                while pending:
+                    keywords, query = pending.pop()
+                    try:
+                        queries += 1
+                        items = list(github_analyzer.iter_search_commits(query, self.token))
+                    except SearchOverflow as e:
+                        if len(keywords) > 1:
+                            # Too many hits for the group; search its keywords one by one.
+                            pending.extend(build_queries([kw], qualifiers, self.since)[0] for kw in keywords)
+                            continue
+                        logger.warning("⚠️ Commit search overflowed (%s); downloading %d repo(s) in full.",
+                                       e, len(keys))
+                        self._fallback.update(keys)
+                        break
+                    for item in items:
+                        repository = item.get('repository') or {}
+                        key = repo_key((repository.get('owner') or {}).get('login'), repository.get('name'))
+                        if key in keys:
+                            try:
+                                found[key][item['sha']] = compact_commit(item, by_key[key])
+                            except (KeyError, ValueError, TypeError) as e:
+                                logger.warning(f"⚠️ Commit processing error: {e}")
+
+        self._candidates = {
+            key: sorted(commits.values(), key=lambda c: c.date)
+            for key, commits in found.items() if key not in self._fallback
+        }
+        incr("commit_discovery", len(self._candidates), mode="search")
+        incr("commit_discovery", len(self._repositories) - len(self._candidates), mode="full")
+        logger.info("🔎 Commit search: %d queries for %d keywords found %d candidate commits in %d repos; "
+                    "%d repo(s) downloaded in full.", queries, len(self._keywords),
+                    sum(len(c) for c in self._candidates.values()), len(self._candidates),
+                    len(self._repositories) - len(self._candidates))
+
+
+def commit_source(commit_store, tasks, repositories, token=None, since=None, mode=COMMIT_DISCOVERY):
+    """The commit source to match `tasks` against: the store itself, or a search front for it."""
+    if mode == DISCOVERY_SEARCH:
+        return SearchCommitSource(commit_store, tasks, repositories, token, since)
+    return commit_store
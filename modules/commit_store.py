@@ -0,0 +1,240 @@
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime
+from modules.backends import backend_for
+from modules.utils import parse_github_date
+from logger_config import logger
+
+# Compact per-commit record kept in memory instead of the raw GitHub JSON.
+CompactCommit = namedtuple("CompactCommit", ["sha", "date", "author", "message", "repo_owner", "repo_name"])
+
+
+def compact_commit(raw_commit, repo):
+    """
+    Convert a GitHub commit object into a CompactCommit.
+
+    Args:
+        raw_commit (dict): Commit object as returned by the compare/commits API.
+        repo (dict): Repository config entry with 'owner' and 'name'.
+
+    Returns:
+        CompactCommit: Record with the author date parsed to a datetime.
+    """
+    author = raw_commit['commit']['author']
+    return CompactCommit(
+        sha=raw_commit['sha'],
+        date=parse_github_date(author['date']),
+        author=author['name'],
+        message=raw_commit['commit']['message'].strip(),
+        repo_owner=repo['owner'],
+        repo_name=repo['name'],
+    )
+
+
+def commit_to_row(commit):
+    """Serialise a CompactCommit for the run state file."""
+    return [commit.sha, commit.date.isoformat(), commit.author, commit.message]
+
+
+def commit_from_row(row, repo):
+    sha, date, author, message = row
+    return CompactCommit(sha, datetime.fromisoformat(date), author, message, repo['owner'], repo['name'])
+
+
+def compact_commits(raw_commits, repo):
+    """Compact an iterable of raw commits, consuming it lazily."""
+    commits = []
+    for raw in raw_commits:
+        try:
+            commits.append(compact_commit(raw, repo))
+        except (KeyError, ValueError, TypeError) as e:
+            logger.warning(f"⚠️ Commit processing error: {e}")
+    return commits
+
+
+class RepoCommits:
+    """Date-sorted commits of one base...head comparison."""
+
+    __slots__ = ("commits", "dates")
+
+    def __init__(self, commits):
+        self.commits = sorted(commits, key=lambda c: c.date)
+        self.dates = [c.date for c in self.commits]
+
+    def since(self, start):
+        """Return all commits authored on or after `start` (a datetime)."""
+        return self.commits[bisect_left(self.dates, start):]
+
+    def __len__(self):
+        return len(self.commits)
+
+
+class CommitStore:
+    """
+    Run-scoped store that fetches each repo/branch comparison once and serves
+    every task from memory.
+
+    Commits are streamed page by page and only commits authored on or after
+    `since` (the earliest task start date) are kept.
+
+    With a RunState in incremental mode, only commits added to the head branch
+    since the previous run are fetched; an unchanged base/head pair costs two
+    lightweight SHA lookups and no compare call. New commits are only trusted
+    if the size of the full base...head range grew by exactly their number;
+    otherwise some of them came in from the base (a merge of main into the
+    branch) and the full comparison, which leaves those out, is refetched.
+
+    `prefetched` is a RunState holding comparisons already fetched for this
+    run (repositories shared by several sharded jobs); those are served from
+    it without any request.
+    """
+
+    def __init__(self, token=None, base_branch="main", run_state=None, incremental=False, since=None,
+                 prefetched=None):
+        self.token = token
+        self.base_branch = base_branch
+        self.since = since
+        self.run_state = run_state
+        self.incremental = incremental and run_state is not None
+        self.prefetched = prefetched
+        self._repos = {}
+        self._unchanged = set()
+
+    @staticmethod
+    def repo_key(repo, base_branch):
+        return (repo['owner'], repo['name'], base_branch, repo['branch'])
+
+    def get(self, repo):
+        """
+        Return the RepoCommits for a repository, fetching it on first use.
+
+        Returns None when the comparison could not be fetched; the failure is
+        remembered so it is only logged once per run.
+        """
+        key = self.repo_key(repo, self.base_branch)
+        if key not in self._repos:
+            prefetched = self._from_prefetched(repo)
+            self._repos[key] = prefetched if prefetched is not None else self._fetch(repo)
+        return self._repos[key]
+
+    def _from_prefetched(self, repo):
+        if self.prefetched is None:
+            return None
+        entry = self.prefetched.get_repo(self.prefetched.repo_key(repo['owner'], repo['name'],
+                                                                  self.base_branch, repo['branch']))
+        if not entry or not self._covers_since(entry):
+            return None
+        if self.incremental:
+            previous = self.run_state.get_repo(self._state_key(repo))
+            if previous and (previous['base_sha'], previous['head_sha']) == (entry['base_sha'], entry['head_sha']):
+                self._unchanged.add(self.repo_key(repo, self.base_branch))
+        commits = self._in_window(commit_from_row(row, repo) for row in entry['commits'])
+        self._remember(repo, entry['base_sha'], entry['head_sha'], commits, entry.get('total'))
+        logger.info(f"📥 Using prefetched commits for {repo['owner']}/{repo['name']} ({repo['branch']}).")
+        return RepoCommits(commits)
+
+    def _fetch(self, repo):
+        logger.info(f"\n📦 Analyzing Repo: {repo['name']} ({repo['branch']})")
+        try:
+            if self.incremental:
+                commits = self._fetch_incremental(repo)
+            else:
+                commits = self._fetch_full(repo)
+        except Exception as e:
+            logger.error(f"❌ Failed to fetch commits: {e}")
+            return None
+
+        logger.info(f"✅ Cached {len(commits)} commits for {repo['owner']}/{repo['name']}.")
+        return RepoCommits(commits)
+
+    def _state_key(self, repo):
+        return self.run_state.repo_key(repo['owner'], repo['name'], self.base_branch, repo['branch'])
+
+    def _in_window(self, commits):
+        return [c for c in commits if self.since is None or c.date >= self.since]
+
+    def _remember(self, repo, base_sha, head_sha, commits, total=None):
+        if self.run_state is not None:
+            self.run_state.set_repo(
+                self._state_key(repo), base_sha, head_sha, [commit_to_row(c) for c in commits],
+                since=self.since.isoformat() if self.since else None, total=total
+            )
+
+    def _backend(self, repo):
+        return backend_for(repo['owner'], repo['name'], self.token)
+
+    def _branch_shas(self, repo):
+        backend = self._backend(repo)
+        return backend.get_branch_sha(self.base_branch), backend.get_branch_sha(repo['branch'])
+
+    def _iter_commits(self, repo, base, head, meta=None):
+        return self._backend(repo).iter_unique_commits(base, head, since=self.since, meta=meta)
+
+    def _fetch_full(self, repo, base_sha=None, head_sha=None):
+        if base_sha is None or head_sha is None:
+            base_sha, head_sha = self._branch_shas(repo)
+        # Comparing pinned SHAs keeps every page consistent even if the branch moves mid-run.
+        meta = {}
+        commits = compact_commits(self._iter_commits(repo, base_sha, head_sha, meta), repo)
+        self._remember(repo, base_sha, head_sha, commits, meta.get('total_commits'))
+        return commits
+
+    def _covers_since(self, previous):
+        """True when the stored commits reach back at least as far as `self.since`."""
+        stored = previous.get('since')
+        if stored is None:
+            return True
+        return self.since is not None and self.since >= datetime.fromisoformat(stored)
+
+    def _fetch_incremental(self, repo):
+        previous = self.run_state.get_repo(self._state_key(repo))
+        base_sha, head_sha = self._branch_shas(repo)
+        if not previous or not self._covers_since(previous):
+            return self._fetch_full(repo, base_sha, head_sha)
+
+        if base_sha != previous['base_sha']:
+            # The base moved, so commits may have been merged out of the comparison.
+            logger.info(f"🔁 Base branch of {repo['name']} moved; refreshing full comparison.")
+            return self._fetch_full(repo, base_sha, head_sha)
+
+        known = self._in_window(commit_from_row(row, repo) for row in previous['commits'])
+        if head_sha == previous['head_sha']:
+            logger.info(f"⏭️ No new commits in {repo['name']} since last run.")
+            self._unchanged.add(self.repo_key(repo, self.base_branch))
+            if len(known) < len(previous['commits']):
+                self._remember(repo, base_sha, head_sha, known, previous.get('total'))
+            return known
+
+        meta = {}
+        new_commits = compact_commits(self._iter_commits(repo, previous['head_sha'], head_sha, meta), repo)
+        if meta.get('status') != 'ahead':
+            # Force-push or rebase: the old head is no longer an ancestor.
+            logger.info(f"🔁 {repo['name']} ({repo['branch']}) was rewritten; refreshing full comparison.")
+            return self._fetch_full(repo, base_sha, head_sha)
+
+        # prev_head...head also lists commits merged in from the base, which base...head leaves out.
+        total = self._backend(repo).count_unique_commits(base_sha, head_sha)
+        if previous.get('total') is None or total != previous['total'] + meta.get('total_commits', 0):
+            logger.info(f"🔁 {repo['name']} ({repo['branch']}) took in commits from {self.base_branch}; "
+                        f"refreshing full comparison.")
+            return self._fetch_full(repo, base_sha, head_sha)
+
+        logger.info(f"➕ {len(new_commits)} new commits in {repo['name']} since last run.")
+        commits = known + new_commits
+        self._remember(repo, base_sha, head_sha, commits, total)
+        return commits
+
+    def unchanged(self, repos):
+        """True when every repo comparison was served from run state without changes."""
+        if not self.incremental:
+            return False
+        for repo in repos:
+            self.get(repo)
+        return all(self.repo_key(repo, self.base_branch) in self._unchanged for repo in repos)
+
+    def commits_since(self, repo, start):
+        """Return the commits of `repo` authored on or after `start`."""
+        repo_commits = self.get(repo)
+        if repo_commits is None:
+            return []
+        return repo_commits.since(start)
@@ -1,43 +1,146 @@
-import openai
+import os
+import threading
+import time
+import traceback
 from logger_config import logger
+from modules.utils import retry_after_seconds
+from modules.metrics import timed, incr, record_tokens
 
-def summarize_commit(diff_text, openai_api_key, task_name=""):
+MODEL = "gpt-4"
+# Bump whenever the prompt in build_summary_request changes so cached summaries are not reused.
+# Version 3: summaries no longer mention the task, so one summary serves every task a change matches.
+PROMPT_VERSION = "3"
+ERROR_PREFIX = "Error summarizing commit:"
+EMPTY_RESPONSE = "⚠️ Empty response from OpenAI."
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+# Bump whenever the prompt in build_rollup_request changes so cached group digests are not reused.
+ROLLUP_PROMPT_VERSION = "1"
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def openai_client(openai_api_key):
+    """
+    Return the process-wide OpenAI client for `openai_api_key`.
+
+    SDK retries are off: `complete_chat` does the retrying, so a rate-limited
+    call is not retried twice over with clashing backoff.
+    """
+    from openai import OpenAI  # deferred: the SDK is the single slowest import at startup
+
+    with _clients_lock:
+        client = _clients.get(openai_api_key)
+        if client is None:
+            client = _clients[openai_api_key] = OpenAI(api_key=openai_api_key, max_retries=0)
+        return client
+
+def build_summary_request(diff_text):
+    """Return the chat-completions request body used to summarize a diff."""
+    prompt = (
+        f"You are an expert code reviewer. "
+        f"Analyze the following Git commit diff and summarize what the developer has done.\n\n"
+        f"Diff:\n{diff_text}\n\n"
+        "Provide a concise summary in 1-3 sentences."
+    )
+    return {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": "You are a senior software engineer reviewing Git commits."},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.3,
+        "max_tokens": 200,
+    }
+
+
+def build_rollup_request(summaries_text, task_name="", scope=""):
+    """Return the chat-completions request body used to condense several summaries into one."""
+    prompt = (
+        f"You are an expert code reviewer. "
+        f"Below are summaries of Git commits {scope}.\n\n"
+        f"Task: \"{task_name}\"\n\n"
+        f"Summaries:\n{summaries_text}\n\n"
+        "Condense them into one summary of 2-5 sentences covering what was done, "
+        "what is still in progress, and anything that suggests the task is blocked."
+    )
+    return {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": "You are a senior software engineer reviewing Git commits."},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.3,
+        "max_tokens": 300,
+    }
+
+
+def complete_chat(request, purpose, openai_api_key, empty_response=EMPTY_RESPONSE):
+    """Run a chat completion, retrying rate limits with Retry-After backoff."""
+    import openai
+
+    client = openai_client(openai_api_key)
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        try:
+            response = client.chat.completions.create(**request)
+            incr("http_requests", service="openai", purpose=purpose)
+            break
+        except openai.RateLimitError as e:
+            if attempt == OPENAI_MAX_RETRIES:
+                raise
+            incr("http_retries", service="openai", purpose=purpose)
+            delay = retry_after_seconds(getattr(e.response, "headers", None), attempt)
+            logger.warning("⏳ OpenAI rate limit hit, retrying in %.1fs", delay)
+            time.sleep(delay)
+
+    record_tokens(response.usage, purpose)
+    content = response.choices[0].message.content
+    return content.strip() if content else empty_response
+
+
+@timed("openai.summarize_commit")
+def summarize_commit(diff_text, openai_api_key):
     """
     Summarize a Git commit diff using OpenAI's GPT model.
     
     Args:
         diff_text (str): The Git diff content.
         openai_api_key (str): OpenAI API key.
-        task_name (str): Optional task name associated with the commit.
     
     Returns:
         str: Human-readable summary or error message.
     """
     try:
-        openai.api_key = openai_api_key
-
-        prompt = (
-            f"You are an expert code reviewer. "
-            f"Analyze the following Git commit diff and summarize what the developer has done.\n\n"
-            f"Task: \"{task_name}\"\n\n"
-            f"Diff:\n{diff_text}\n\n"
-            "Provide a concise summary in 1-3 sentences."
-        )
-
-        response = openai.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a senior software engineer reviewing Git commits."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=200
-        )
-
-        content = response.choices[0].message.content
-        return content.strip() if content else "⚠️ Empty response from OpenAI."
+        return complete_chat(build_summary_request(diff_text), "summary", openai_api_key)
 
     except Exception as e:
-        logger.error(f"❌ Error summarizing commit: {e}")
+        logger.error("❌ Error summarizing commit: %s", e)
         logger.debug(traceback.format_exc())
-        return f"Error summarizing commit: {e}"
\ No newline at end of file
+        return f"{ERROR_PREFIX} {e}"
+
+
+@timed("openai.rollup")
+def summarize_summaries(summaries_text, openai_api_key, task_name="", scope=""):
+    """
+    Condense several commit (or group) summaries into one.
+
+    Args:
+        summaries_text (str): The summaries to roll up.
+        scope (str): Short description of what the summaries cover, e.g.
+                     "in owner/repo during 2025-01-06 – 2025-01-12".
+
+    Returns:
+        str: Condensed summary or error message.
+    """
+    try:
+        return complete_chat(build_rollup_request(summaries_text, task_name, scope), "rollup", openai_api_key)
+
+    except Exception as e:
+        logger.error("❌ Error rolling up summaries: %s", e)
+        logger.debug(traceback.format_exc())
+        return f"{ERROR_PREFIX} {e}"
+
+
+def is_cacheable_summary(summary):
+    """Only real model output is worth caching; errors, warnings and empty replies are retried next run."""
+    return bool(summary) and not summary.startswith((ERROR_PREFIX, "⚠️"))
\ No newline at end of file
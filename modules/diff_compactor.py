@@ -0,0 +1,199 @@
+import fnmatch
+import os
+import re
+from collections import namedtuple
+from logger_config import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DIFF_TOKEN_BUDGET = int(os.getenv("DIFF_TOKEN_BUDGET", "6000"))
+MAX_HUNKS_PER_FILE = int(os.getenv("DIFF_MAX_HUNKS_PER_FILE", "8"))
+TOKENIZER_MODEL = os.getenv("DIFF_TOKENIZER_MODEL", "gpt-4")
+MAX_ELIDED_LISTED = 20
+# Smallest slice of the budget worth giving a file; below it the file is dropped.
+MIN_FILE_TOKENS = 64
+
+# Files whose patches carry no useful signal for a summary; they are stubbed.
+LOCK_FILES = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock",
+    "Cargo.lock", "Gemfile.lock", "composer.lock", "go.sum", "mix.lock", "packages.lock.json",
+}
+VENDORED_PATTERNS = (
+    "vendor/*", "*/vendor/*", "node_modules/*", "*/node_modules/*", "third_party/*",
+    "*/third_party/*", "dist/*", "*/dist/*", "build/*", "*/build/*",
+)
+GENERATED_PATTERNS = (
+    "*.min.js", "*.min.css", "*.map", "*.bundle.js", "*_pb2.py", "*.pb.go", "*.snap",
+)
+BINARY_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".ico", ".pdf", ".zip", ".gz", ".jar", ".woff",
+    ".woff2", ".ttf", ".eot", ".mp4", ".mp3", ".so", ".dll", ".exe", ".bin",
+}
+SOURCE_EXTENSIONS = {
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".go", ".rs", ".java", ".kt", ".rb", ".php",
+    ".c", ".h", ".cc", ".cpp", ".hpp", ".cs", ".swift", ".scala", ".sql", ".vue", ".svelte",
+}
+
+_HUNK_SPLIT = re.compile(r"(?m)^(?=@@ )")
+
+CompactDiff = namedtuple("CompactDiff", ["text", "tokens", "elided"])
+
+_encoder = None
+
+
+def count_tokens(text):
+    """Count tokens with tiktoken when available, else estimate at ~4 chars/token."""
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            try:
+                _encoder = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+            except KeyError:
+                _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # Missing package, or the encoding file could not be downloaded.
+            logger.warning(f"⚠️ tiktoken unavailable ({e}); estimating diff tokens from length.")
+            _encoder = False
+    if _encoder is False:
+        return (len(text) + 3) // 4
+    return len(_encoder.encode(text, disallowed_special=()))
+
+
+def classify_file(f):
+    """Return why a file should be stubbed ('lock', 'vendored', ...) or None to keep it."""
+    path = f['filename']
+    name = os.path.basename(path)
+    ext = os.path.splitext(name)[1].lower()
+    if name in LOCK_FILES or ext == ".lock":
+        return "lock file"
+    if any(fnmatch.fnmatch(path, p) for p in VENDORED_PATTERNS):
+        return "vendored"
+    if any(fnmatch.fnmatch(name, p) for p in GENERATED_PATTERNS):
+        return "generated/minified"
+    if f.get('patch_omitted'):
+        return "patch over size cap"
+    if ext in BINARY_EXTENSIONS or not f.get('patch'):
+        return "binary or no patch"
+    return None
+
+
+def _priority(f):
+    """Source files first, then by churn (additions + deletions), largest first."""
+    ext = os.path.splitext(f['filename'])[1].lower()
+    return (0 if ext in SOURCE_EXTENSIONS else 1, -(f.get('additions', 0) + f.get('deletions', 0)))
+
+
+def _stub(f, reason):
+    return f"+++ {f['filename']} ({reason}, +{f.get('additions', 0)}/-{f.get('deletions', 0)} elided)\n"
+
+
+def _hunks(patch, max_hunks):
+    hunks = [h if h.endswith("\n") else h + "\n" for h in _HUNK_SPLIT.split(patch) if h.strip()]
+    return hunks[:max_hunks], max(len(hunks) - max_hunks, 0)
+
+
+def _fit(header, hunks, limit):
+    """
+    Render a file within `limit` tokens: whole hunks while they fit, then the
+    leading lines of the first hunk that does not. Returns (text, tokens, hunks_cut).
+    """
+    parts = [header]
+    used = count_tokens(header)
+    for i, hunk in enumerate(hunks):
+        cost = count_tokens(hunk)
+        if used + cost <= limit:
+            parts.append(hunk)
+            used += cost
+            continue
+        for line in hunk.splitlines(keepends=True):
+            cost = count_tokens(line)
+            if used + cost > limit:
+                break
+            parts.append(line)
+            used += cost
+        return "".join(parts), used, len(hunks) - i
+    return "".join(parts), used, 0
+
+
+def compact_diff(files, token_budget=DIFF_TOKEN_BUDGET, max_hunks=MAX_HUNKS_PER_FILE):
+    """
+    Build a summarization-ready diff that fits `token_budget`.
+
+    Lock, vendored, generated/minified and binary files are reduced to one-line
+    stubs. The remaining files are capped at `max_hunks` hunks and ranked
+    (source before other text, then by churn); files are admitted in that
+    order while each can still get a minimum slice of the budget, and the
+    budget is then shared out so small files are kept whole and large ones are
+    truncated evenly. Everything dropped is listed in a trailing note.
+
+    Args:
+        files (list): Changed-file dicts as returned by `get_commit_files`.
+
+    Returns:
+        CompactDiff: (text, tokens, elided) where `elided` lists
+                     (filename, reason) pairs.
+    """
+    elided = []
+    stubs = []
+    candidates = []
+    for f in files:
+        reason = classify_file(f)
+        if reason:
+            stubs.append((f, reason))
+            continue
+        hunks, capped = _hunks(f['patch'], max_hunks)
+        header = f"+++ {f['filename']}\n"
+        cost = count_tokens(header) + sum(count_tokens(h) for h in hunks)
+        candidates.append({'file': f, 'header': header, 'hunks': hunks, 'capped': capped, 'cost': cost})
+
+    # Stubs are tiny but informative; they are budgeted first and emitted last.
+    stub_parts = []
+    remaining = token_budget
+    for f, reason in stubs:
+        stub = _stub(f, reason)
+        cost = count_tokens(stub)
+        if cost <= remaining:
+            stub_parts.append(stub)
+            remaining -= cost
+            elided.append((f['filename'], reason))
+        else:
+            elided.append((f['filename'], f"{reason}; token budget"))
+
+    candidates.sort(key=lambda c: _priority(c['file']))
+    admitted = []
+    reserved = 0
+    for c in candidates:
+        floor = min(c['cost'], MIN_FILE_TOKENS)
+        if reserved + floor > remaining:
+            elided.append((c['file']['filename'], "token budget"))
+            continue
+        admitted.append(c)
+        reserved += floor
+
+    # Water-fill: smallest files first, each taking at most an even share of what is left.
+    left = remaining
+    for n, c in enumerate(sorted(admitted, key=lambda c: c['cost'])):
+        c['limit'] = min(c['cost'], left // (len(admitted) - n))
+        left -= c['limit']
+
+    parts = []
+    used = token_budget - remaining
+    for c in admitted:
+        text, tokens, cut = _fit(c['header'], c['hunks'], c['limit'])
+        parts.append(text)
+        used += tokens
+        if cut or c['capped']:
+            elided.append((c['file']['filename'], f"{cut + c['capped']} hunk(s) truncated"))
+    parts.extend(stub_parts)
+
+    if elided:
+        listed = "; ".join(f"{name} ({why})" for name, why in elided[:MAX_ELIDED_LISTED])
+        more = len(elided) - MAX_ELIDED_LISTED
+        note = f"[Elided: {listed}{f'; and {more} more' if more > 0 else ''}]\n"
+        # The note may overrun the budget slightly; it is what tells the model what it did not see.
+        parts.append(note)
+        used += count_tokens(note)
+
+    return CompactDiff("".join(parts), used, elided)
@@ -0,0 +1,157 @@
+import hashlib
+import os
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from modules.commit_summarizer import (
+    summarize_summaries, is_cacheable_summary, MODEL as SUMMARY_MODEL, ROLLUP_PROMPT_VERSION
+)
+from modules.diff_compactor import count_tokens
+from logger_config import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Task summaries above this size are rolled up into a digest before prediction.
+DIGEST_TOKEN_BUDGET = int(os.getenv("DIGEST_TOKEN_BUDGET", "2000"))
+DIGEST_WINDOW_DAYS = int(os.getenv("DIGEST_WINDOW_DAYS", "7"))
+# How many group summaries are condensed into one summary at each higher level.
+DIGEST_FANOUT = int(os.getenv("DIGEST_FANOUT", "8"))
+
+_EPOCH = date(1970, 1, 5)  # a Monday, so 7-day windows line up with ISO weeks
+
+
+def _window(day, window_days):
+    start = datetime.strptime(day, "%Y-%m-%d").date()
+    start -= timedelta(days=(start - _EPOCH).days % window_days)
+    return start, start + timedelta(days=window_days - 1)
+
+
+def _key(task_name, parts):
+    digest = hashlib.sha256()
+    for part in (SUMMARY_MODEL, ROLLUP_PROMPT_VERSION, str(task_name)) + tuple(parts):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _truncate(text, limit):
+    """Keep the leading lines of `text` that fit in `limit` tokens."""
+    kept, used = [], 0
+    for line in text.splitlines(keepends=True):
+        cost = count_tokens(line)
+        if used + cost > limit:
+            kept.append("…\n")
+            break
+        kept.append(line)
+        used += cost
+    return "".join(kept).rstrip("\n")
+
+
+def group_commits(matched_commits, blocks, window_days=DIGEST_WINDOW_DAYS):
+    """
+    Group per-commit summary blocks by repository and time window.
+
+    Returns:
+        OrderedDict: (owner, repo, window_start, window_end) -> list of (commit, block),
+                     ordered by repository and window.
+    """
+    groups = {}
+    for commit, block in zip(matched_commits, blocks):
+        start, end = _window(commit['date'], window_days)
+        groups.setdefault((commit['repo_owner'], commit['repo_name'], start, end), []).append((commit, block))
+    return OrderedDict(sorted(groups.items(), key=lambda item: item[0]))
+
+
+class TaskDigester:
+    """
+    Keeps the task summary handed to the predictor at a bounded size.
+
+    Small tasks pass through unchanged. Larger ones are reduced map-reduce
+    style: commit summaries are grouped by repository and time window, each
+    group is condensed, and the group summaries are condensed again in chunks
+    of `fanout` until the result fits the budget. Every condensed summary is
+    cached under a hash of its inputs, so only groups whose commits changed
+    are re-summarized on later runs.
+    """
+
+    def __init__(self, cache, openai_api_key, executor=None, openai_slots=None,
+                 token_budget=DIGEST_TOKEN_BUDGET, window_days=DIGEST_WINDOW_DAYS, fanout=DIGEST_FANOUT):
+        self.cache = cache
+        self.openai_api_key = openai_api_key
+        self.executor = executor
+        self.openai_slots = openai_slots
+        self.token_budget = token_budget
+        self.window_days = window_days
+        self.fanout = max(2, fanout)
+
+    def digest(self, matched_commits, blocks, task_name):
+        """
+        Args:
+            matched_commits (list): Commit dicts with 'sha', 'date', 'repo_owner', 'repo_name'.
+            blocks (list): Formatted per-commit summaries, aligned with `matched_commits`.
+            task_name (str): Task the commits belong to.
+
+        Returns:
+            str: The joined blocks if they fit the budget, otherwise a digest.
+        """
+        full_text = "\n\n".join(blocks)
+        if count_tokens(full_text) <= self.token_budget:
+            return full_text
+
+        task_name = str(task_name)
+        groups = group_commits(matched_commits, blocks, self.window_days)
+        logger.info(f"📚 Digesting {len(blocks)} commit summaries for '{task_name}' "
+                    f"in {len(groups)} repo/window group(s)...")
+
+        nodes = self._map(self._summarize_group, [(task_name, key, members) for key, members in groups.items()])
+        level = 1
+        while len(nodes) > 1 and count_tokens("\n\n".join(nodes)) > self.token_budget:
+            chunks = [nodes[i:i + self.fanout] for i in range(0, len(nodes), self.fanout)]
+            nodes = self._map(self._summarize_chunk, [(task_name, level, chunk) for chunk in chunks])
+            level += 1
+
+        text = "\n\n".join(nodes)
+        if count_tokens(text) > self.token_budget:
+            text = _truncate(text, self.token_budget)
+        header = f"📚 Digest of {len(blocks)} commits in {len(groups)} group(s):"
+        return f"{header}\n\n{text}"
+
+    def _map(self, fn, items):
+        if self.executor is None:
+            return [fn(*item) for item in items]
+        return list(self.executor.map(lambda item: fn(*item), items))
+
+    def _summarize_group(self, task_name, group_key, members):
+        owner, name, start, end = group_key
+        label = f"📦 {owner}/{name}, {start:%Y-%m-%d} – {end:%Y-%m-%d} ({len(members)} commits)"
+        if len(members) == 1:
+            return f"{label}\n{members[0][1]}"
+
+        key = _key(task_name, [owner, name, str(start)] + [c['sha'] + block for c, block in members])
+        scope = f"in {owner}/{name} between {start:%Y-%m-%d} and {end:%Y-%m-%d}"
+        summary = self._condense(key, "\n\n".join(block for _, block in members), task_name, scope)
+        return f"{label}\n{summary}"
+
+    def _summarize_chunk(self, task_name, level, chunk):
+        if len(chunk) == 1:
+            return chunk[0]
+        key = _key(task_name, [f"level-{level}"] + chunk)
+        summary = self._condense(key, "\n\n".join(chunk), task_name, "across several repositories and weeks")
+        return f"🗂️ Roll-up of {len(chunk)} groups:\n{summary}"
+
+    def _condense(self, key, text, task_name, scope):
+        cached = self.cache.get_group_summary(key)
+        if cached is not None:
+            return cached
+
+        if self.openai_slots is not None:
+            with self.openai_slots:
+                summary = summarize_summaries(text, self.openai_api_key, task_name=task_name, scope=scope)
+        else:
+            summary = summarize_summaries(text, self.openai_api_key, task_name=task_name, scope=scope)
+
+        if is_cacheable_summary(summary):
+            self.cache.put_group_summary(key, summary)
+            return summary
+        # Keep the digest informative when the model call fails: fall back to the raw text, trimmed.
+        return _truncate(text, max(self.token_budget // self.fanout, 1))
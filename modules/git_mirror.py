@@ -0,0 +1,219 @@
+import base64
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from logger_config import logger
+from modules.utils import parse_github_date
+from modules.github_analyzer import render_diff, PatchBudget
+from modules.metrics import timed
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GIT_MIRROR_DIR = os.getenv("GIT_MIRROR_DIR", "data/mirrors")
+
+_DIFF_HEADER = re.compile(r"^diff --git a/(.*) b/(.*)$")
+
+
+def _auth_env(remote_url, token):
+    """Pass the token as an HTTP header via env so it never lands in the mirror's config."""
+    if not token or not remote_url.startswith("https://"):
+        return {}
+    basic = base64.b64encode(f"x-access-token:{token}".encode("utf-8")).decode("ascii")
+    return {
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": "http.extraHeader",
+        "GIT_CONFIG_VALUE_0": f"Authorization: Basic {basic}",
+        "GIT_TERMINAL_PROMPT": "0",
+    }
+
+
+_STATUS_MARKERS = (
+    ("new file mode", "added"),
+    ("deleted file mode", "removed"),
+    ("rename from", "renamed"),
+)
+
+
+def _split_patch(diff_text):
+    """
+    Split `git diff --full-index` output into (filename, blob SHA, status, patch)
+    tuples like GitHub's `files` array. Binary files have an empty patch.
+    """
+    files = []
+    current = None
+    for line in diff_text.splitlines():
+        header = _DIFF_HEADER.match(line)
+        if header:
+            current = {'filename': header.group(2), 'sha': "", 'status': "modified", 'hunks': []}
+            files.append(current)
+            continue
+        if current is None:
+            continue
+        if current['hunks'] or line.startswith("@@"):
+            current['hunks'].append(line)
+            continue
+        if line.startswith("index "):
+            old, _, new = line.split()[1].partition("..")
+            # A deleted file's new blob is all zeros; identify it by the old one.
+            current['sha'] = old if not new.strip("0") else new
+            continue
+        for marker, status in _STATUS_MARKERS:
+            if line.startswith(marker):
+                current['status'] = status
+    return [(f['filename'], f['sha'], f['status'], "\n".join(f['hunks'])) for f in files]
+
+
+# Unit/record separators keep multi-line commit messages intact in `git log` output.
+_LOG_FORMAT = "%H%x1f%an%x1f%aI%x1f%cI%x1f%B%x1e"
+
+
+def _utc(iso_date):
+    return datetime.fromisoformat(iso_date).astimezone(timezone.utc)
+
+
+def _to_rest_shape(record):
+    """Render one `git log` record like an item of the REST compare `commits` array."""
+    sha, author, authored, committed, message = record.split("\x1f", 4)
+    return {
+        'sha': sha,
+        'commit': {
+            'message': message,
+            'author': {'name': author, 'date': _utc(authored).strftime("%Y-%m-%dT%H:%M:%SZ")},
+            'committer': {'date': _utc(committed).strftime("%Y-%m-%dT%H:%M:%SZ")},
+        },
+    }
+
+
+class GitMirror:
+    """
+    Bare mirror clone of one remote kept under GIT_MIRROR_DIR.
+
+    The mirror is cloned on first use and refreshed with an incremental
+    `git fetch --prune` once per run, or again after `mark_stale()` (watch
+    mode calls it when a push arrives); commit listing and diffs are then
+    computed locally, so they cost no API quota. Works with any git remote,
+    including `file://` URLs.
+    """
+
+    def __init__(self, repo_owner, repo_name, remote_url, token=None, mirror_dir=GIT_MIRROR_DIR):
+        self.repo_owner = repo_owner
+        self.repo_name = repo_name
+        self.remote_url = remote_url
+        self.token = token
+        self.path = os.path.join(mirror_dir, f"{repo_owner}__{repo_name}.git")
+        self._repo = None
+        self._stale = False
+        self._lock = threading.Lock()
+
+    @property
+    def repo(self):
+        with self._lock:
+            if self._repo is None or self._stale:
+                self._repo = self._sync()
+                self._stale = False
+            return self._repo
+
+    def mark_stale(self):
+        """Fetch the remote again on next use."""
+        with self._lock:
+            self._stale = True
+
+    @timed("git.sync_mirror")
+    def _sync(self):
+        import git
+
+        env = _auth_env(self.remote_url, self.token)
+        if os.path.isdir(self.path):
+            repo = git.Repo(self.path)
+            logger.info(f"🔄 Fetching mirror of {self.repo_owner}/{self.repo_name}...")
+            with repo.git.custom_environment(**env):
+                repo.git.fetch("--prune", "origin")
+        else:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            logger.info(f"📥 Cloning mirror of {self.repo_owner}/{self.repo_name} into {self.path}...")
+            repo = git.Repo.clone_from(self.remote_url, self.path, mirror=True, env=env)
+        return repo
+
+    # Everything below shells out through `repo.git`, which is safe to call from
+    # the pipeline's worker threads (GitPython's object database is not).
+
+    def get_branch_sha(self, branch):
+        return self.repo.git.rev_parse(f"{branch}^{{commit}}")
+
+    def iter_unique_commits(self, base, head, since=None, meta=None):
+        """
+        Yield the commits in `head` that are not in `base` (GitHub's `base...head`),
+        oldest first, in the REST compare shape.
+        """
+        git_cmd = self.repo.git
+        if meta is not None:
+            base_sha = self.get_branch_sha(base)
+            head_sha = self.get_branch_sha(head)
+            merge_base = git_cmd.merge_base(base_sha, head_sha)
+            if base_sha == head_sha:
+                status = 'identical'
+            elif merge_base == base_sha:
+                status = 'ahead'
+            elif merge_base == head_sha:
+                status = 'behind'
+            else:
+                status = 'diverged'
+            meta.update(status=status, base_sha=base_sha, merge_base_sha=merge_base,
+                        total_commits=self.count_unique_commits(base, head))
+
+        args = ["--reverse", f"--format={_LOG_FORMAT}"]
+        if since is not None:
+            args.append(f"--since={since.strftime('%Y-%m-%dT%H:%M:%SZ')}")
+        output = git_cmd.log(*args, f"{base}..{head}", strip_newline_in_stdout=False)
+
+        for record in output.split("\x1e"):
+            record = record.strip("\n")
+            if not record:
+                continue
+            commit = _to_rest_shape(record)
+            # --since filters on committer date; tasks filter on author date.
+            if since is not None and parse_github_date(commit['commit']['author']['date']) < since:
+                continue
+            yield commit
+
+    def get_unique_commits(self, base, head):
+        return list(self.iter_unique_commits(base, head))
+
+    def count_unique_commits(self, base, head):
+        """Number of commits in `base...head`, without listing them."""
+        return int(self.repo.git.rev_list("--count", f"{base}..{head}"))
+
+    def get_commit_files(self, sha):
+        """Return the commit's changed files in the shape of `github_analyzer.get_commit_files`."""
+        git_cmd = self.repo.git
+        parents = git_cmd.rev_list("--parents", "-n", "1", sha).split()[1:]
+        if parents:
+            # GitHub diffs merges against the first parent as well.
+            diff_text = git_cmd.diff(parents[0], sha, full_index=True)
+        else:
+            diff_text = git_cmd.show(sha, format="", patch=True, full_index=True)
+
+        budget = PatchBudget()
+        files = []
+        for filename, blob_sha, status, patch in _split_patch(diff_text):
+            lines = patch.splitlines()
+            files.append(budget.admit({
+                'filename': filename,
+                'sha': blob_sha,
+                'status': status,
+                'additions': sum(1 for line in lines if line.startswith("+")),
+                'deletions': sum(1 for line in lines if line.startswith("-")),
+                'patch': patch,
+            }))
+        budget.report(f"Commit {sha[:12]} in {self.repo_owner}/{self.repo_name}")
+        return files
+
+    def get_commit_diff(self, sha):
+        """Return the commit's patch in the same format as `github_analyzer.get_commit_diff`."""
+        files = self.get_commit_files(sha)
+        if not files:
+            logger.warning(f"No files found for commit {sha}")
+            return ""
+        return render_diff(files)
@@ -1,20 +1,107 @@
-import requests
+import os
+from functools import partial
 from logger_config import logger
+from modules.github_client import get_client
+from modules.json_stream import select_json
+from modules.utils import parse_github_date
+from modules.metrics import incr, span, timed
+from dotenv import load_dotenv
 
+load_dotenv()
 
-def get_github_commits(repo_owner, repo_name, keywords, token=None, branch='main'):
-    headers = {}
-    if token:
-        headers['Authorization'] = f'token {token}'
+PAGE_SIZE = 100
+# The search API returns at most this many results per query, however many match.
+SEARCH_RESULT_LIMIT = 1000
+# Patch text kept per commit; patches past it are dropped (the file is still listed).
+COMMIT_PATCH_MAX_CHARS = int(os.getenv("COMMIT_PATCH_MAX_CHARS", "500000"))
+
+# Only these fields are kept from streamed responses; everything else is skipped while parsing.
+_COMMIT_FIELDS = ("sha", "commit.message", "commit.author.name", "commit.author.date", "commit.committer.date")
+_FILE_FIELDS = ("filename", "sha", "status", "additions", "deletions", "patch")
+_parse_commit_list = partial(select_json, items="", item_fields=_COMMIT_FIELDS)
+_parse_compare = partial(
+    select_json, fields=("status", "total_commits", "base_commit.sha", "merge_base_commit.sha"),
+    items="commits", item_fields=_COMMIT_FIELDS
+)
+_parse_compare_total = partial(select_json, fields=("total_commits",))
+_parse_search = partial(
+    select_json, fields=("total_count", "incomplete_results"),
+    items="items", item_fields=_COMMIT_FIELDS + ("repository.name", "repository.owner.login")
+)
+
+
+class SearchOverflow(Exception):
+    """A search matched more results than the API will return."""
+
+
+class PatchBudget:
+    """
+    Caps the patch text kept for one commit at COMMIT_PATCH_MAX_CHARS.
+
+    Files are admitted in order as they are read; a patch that no longer fits
+    the remaining budget is dropped and its file flagged 'patch_omitted', so
+    the summary still lists it with its line counts.
+    """
+
+    def __init__(self, limit=COMMIT_PATCH_MAX_CHARS):
+        self.left = limit
+        self.omitted = 0
+
+    def admit(self, f):
+        patch = f.get('patch') or ""
+        if len(patch) > self.left:
+            f['patch'] = ""
+            f['patch_omitted'] = True
+            self.omitted += 1
+        else:
+            self.left -= len(patch)
+        return f
+
+    def report(self, label):
+        if self.omitted:
+            incr("patches_omitted", self.omitted)
+            logger.warning("✂️ %s: dropped %d patch(es) past the %d-char cap", label, self.omitted,
+                           COMMIT_PATCH_MAX_CHARS)
 
-    url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/commits"
-    params = {'sha': branch, 'per_page': 100}
-    response = requests.get(url, headers=headers, params=params)
-    response.raise_for_status()
-    data = response.json()
 
+def _iter_pages(client, path, parse, params=None, span_name="github.page", resource="core"):
+    """
+    Yield the parsed pages of a listing, following the `Link: rel="next"` header.
+
+    Each page is streamed through `parse` and yielded as its (values, items).
+    """
+    url = path
+    while url:
+        with span(span_name):
+            page, response = client.get_json(url, parse, params=params, resource=resource)
+        yield page
+        url = response.links.get('next', {}).get('url')
+        # The next link already carries the full query string.
+        params = None
+
+
+def iter_branch_commits(repo_owner, repo_name, branch, token=None, since=None):
+    """
+    Yield the commits reachable from `branch`, newest first, across all pages.
+
+    With `since` (a datetime) the listing is filtered server-side and the
+    generator stops as soon as it walks past that date.
+    """
+    params = {'sha': branch, 'per_page': PAGE_SIZE}
+    if since:
+        params['since'] = since.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    for _, items in _iter_pages(get_client(token), f"/repos/{repo_owner}/{repo_name}/commits",
+                                _parse_commit_list, params, "github.list_commits"):
+        for item in items:
+            if since and parse_github_date(item['commit']['committer']['date']) < since:
+                return
+            yield item
+
+
+def get_github_commits(repo_owner, repo_name, keywords, token=None, branch='main'):
     matches = []
-    for item in data:
+    for item in iter_branch_commits(repo_owner, repo_name, branch, token):
         msg = item['commit']['message']
         for keyword in keywords:
             if keyword.lower() in msg.lower():
@@ -29,32 +116,142 @@ def get_github_commits(repo_owner, repo_name, keywords, token=None, branch='main
     return matches
 
 
+def iter_unique_commits(repo_owner, repo_name, base, head, token=None, since=None, meta=None):
+    """
+    Yield the commits of `base...head` lazily, page by page.
+
+    Pages are streamed and only the commit fields we use are kept; the
+    compare's `files` array is skipped while parsing. Commits authored
+    before `since` are skipped. If GitHub stops short of `total_commits` (the
+    unpaginated compare is capped at 250), the remainder is recovered from the
+    commit listing of `head` minus the commits of `base`, bounded by `since`.
+
+    Args:
+        meta (dict): Optional dict filled from the first page with 'status',
+            'total_commits', 'base_sha' and 'merge_base_sha'.
+    """
+    client = get_client(token)
+    path = f"/repos/{repo_owner}/{repo_name}/compare/{base}...{head}"
+    seen = set()
+    total = None
+
+    for values, commits in _iter_pages(client, path, _parse_compare, {'per_page': PAGE_SIZE}, "github.compare"):
+        if total is None:
+            total = values.get('total_commits', 0)
+            if meta is not None:
+                meta.update(
+                    status=values.get('status'),
+                    total_commits=total,
+                    base_sha=values.get('base_commit.sha'),
+                    merge_base_sha=values.get('merge_base_commit.sha'),
+                )
+        for commit in commits:
+            seen.add(commit['sha'])
+            if since is None or parse_github_date(commit['commit']['author']['date']) >= since:
+                yield commit
+
+    if total and len(seen) < total:
+        logger.warning(
+            f"⚠️ Compare {base}...{head} in {repo_name} returned {len(seen)} of {total} commits; "
+            f"falling back to the commit listing."
+        )
+        base_shas = {c['sha'] for c in iter_branch_commits(repo_owner, repo_name, base, token, since)}
+        for commit in iter_branch_commits(repo_owner, repo_name, head, token, since):
+            if commit['sha'] in base_shas or commit['sha'] in seen:
+                continue
+            if since is None or parse_github_date(commit['commit']['author']['date']) >= since:
+                yield commit
+
+
 def get_unique_commits(repo_owner, repo_name, base_branch, head_branch, token=None):
-    url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/compare/{base_branch}...{head_branch}"
-    headers = {"Authorization": f"token {token}"} if token else {}
+    return list(iter_unique_commits(repo_owner, repo_name, base_branch, head_branch, token))
 
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json()['commits']
 
+@timed("github.count_unique_commits")
+def count_unique_commits(repo_owner, repo_name, base, head, token=None):
+    """Number of commits in `base...head`, from a one-commit compare page."""
+    (values, _), _ = get_client(token).get_json(
+        f"/repos/{repo_owner}/{repo_name}/compare/{base}...{head}", _parse_compare_total, params={'per_page': 1}
+    )
+    return values.get('total_commits', 0)
 
-def get_commit_diff(repo_owner, repo_name, sha, token=None):
-    url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/commits/{sha}"
-    headers = {"Authorization": f"token {token}"} if token else {}
 
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
+@timed("github.get_branch_sha")
+def get_branch_sha(repo_owner, repo_name, branch, token=None):
+    """Resolve a branch to its head SHA using the lightweight sha media type."""
+    response = get_client(token).get(
+        f"/repos/{repo_owner}/{repo_name}/commits/{branch}",
+        headers={"Accept": "application/vnd.github.sha"}
+    )
+    return response.text.strip()
+
+
+@timed("github.get_default_branch")
+def get_default_branch(repo_owner, repo_name, token=None):
+    """Return the repository's default branch (the only one the commit search indexes)."""
+    return get_client(token).get(f"/repos/{repo_owner}/{repo_name}").json().get("default_branch")
+
+
+def iter_search_commits(query, token=None):
+    """
+    Yield the commits matching a commit search query, across all pages.
+
+    Raises:
+        SearchOverflow: Before yielding anything, if the query matches more
+            than SEARCH_RESULT_LIMIT commits or GitHub reports incomplete
+            results; narrow the query instead.
+    """
+    params = {'q': query, 'per_page': PAGE_SIZE}
+    first = True
+    for values, items in _iter_pages(get_client(token), "/search/commits", _parse_search, params,
+                                     "github.search_commits", "search"):
+        if first and (values.get("total_count", 0) > SEARCH_RESULT_LIMIT or values.get("incomplete_results")):
+            raise SearchOverflow(f"{values.get('total_count')} results for: {query}")
+        first = False
+        yield from items
 
-    files = response.json().get("files", [])
+
+@timed("github.get_commit_files")
+def get_commit_files(repo_owner, repo_name, sha, token=None):
+    """
+    Return the changed files of a commit.
+
+    The response is streamed and each file is reduced to the fields below as
+    it is read, with patches capped per commit (see PatchBudget). Commits are
+    immutable and their files cached by the pipeline, so the result is not
+    kept for ETag revalidation.
+
+    Returns:
+        list: Dicts with 'filename', 'sha' (blob), 'status', 'additions',
+              'deletions' and 'patch' ('' for binary or oversized files GitHub
+              omits, or past the cap, in which case 'patch_omitted' is set).
+    """
+    budget = PatchBudget()
+
+    def file_entry(f):
+        return budget.admit({
+            'filename': f.get("filename", ""),
+            'sha': f.get("sha", ""),
+            'status': f.get("status", "modified"),
+            'additions': f.get("additions", 0),
+            'deletions': f.get("deletions", 0),
+            'patch': f.get("patch", ""),
+        })
+
+    parse = partial(select_json, items="files", item_fields=_FILE_FIELDS, on_item=file_entry)
+    (_, files), _ = get_client(token).get_json(f"/repos/{repo_owner}/{repo_name}/commits/{sha}", parse, cache=False)
+    budget.report(f"Commit {sha[:12]} in {repo_owner}/{repo_name}")
+    return files
+
+
+def render_diff(files):
+    """Join per-file patches into one diff text (linear time, real newlines)."""
+    return "".join(f"+++ {f['filename']}\n{f['patch']}\n" for f in files if f.get('patch'))
+
+
+def get_commit_diff(repo_owner, repo_name, sha, token=None):
+    files = get_commit_files(repo_owner, repo_name, sha, token)
     if not files:
         logger.warning(f"No files found for commit {sha}")
         return ""
-    
-    diff_output = ""
-    for f in files:
-        filename = f.get("filename", "")
-        patch = f.get("patch", "")
-        if patch:
-            diff_output += f"+++ {filename}\\n{patch}\\n"
-
-    return diff_output
+    return render_diff(files)
@@ -0,0 +1,264 @@
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from logger_config import logger
+from modules.utils import retry_after_seconds
+from modules.metrics import incr, set_gauge
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "3"))
+GITHUB_POOL_SIZE = int(os.getenv("GITHUB_POOL_SIZE", "10"))
+GITHUB_ETAG_CACHE_SIZE = int(os.getenv("GITHUB_ETAG_CACHE_SIZE", "512"))
+# Below this many remaining requests, calls are spread evenly until the reset.
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "100"))
+# The search API has its own, much smaller quota (30 requests/minute with a token).
+GITHUB_SEARCH_RESERVE = int(os.getenv("GITHUB_SEARCH_RESERVE", "10"))
+GITHUB_TIMEOUT = float(os.getenv("GITHUB_TIMEOUT", "30"))
+
+
+def _is_rate_limited(response):
+    if response.status_code == 429:
+        return True
+    return response.status_code == 403 and (
+        "Retry-After" in response.headers or response.headers.get("X-RateLimit-Remaining") == "0"
+    )
+
+
+class _CountingReader:
+    """Decoded view of a streamed response body that counts the bytes read."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes = 0
+
+    def read(self, size=-1):
+        chunk = self.raw.read(None if size is None or size < 0 else size, decode_content=True)
+        self.bytes += len(chunk)
+        return chunk
+
+
+class GitHubClient:
+    """
+    Shared GitHub REST client.
+
+    - One keep-alive `requests.Session` with a connection pool sized for the
+      pipeline's worker threads.
+    - Conditional requests: responses carrying an ETag are kept in a bounded
+      LRU and replayed on `304 Not Modified`, which GitHub does not count
+      against the rate limit.
+    - Streamed JSON: `get_json` parses bodies as they arrive and keeps only
+      the fields the caller selects, so large compares and commits do not
+      sit in memory whole.
+    - Rate-limit scheduling: `X-RateLimit-Remaining`/`X-RateLimit-Reset` are
+      tracked from every response, per quota (`core` REST calls and `search`
+      separately); once a quota's remaining calls drop below its reserve
+      (GITHUB_RATE_LIMIT_RESERVE, GITHUB_SEARCH_RESERVE) requests against it
+      are paced evenly across the rest of the window, and an exhausted quota
+      waits for the reset instead of failing mid-run.
+    """
+
+    def __init__(self, token=None, base_url=GITHUB_API_URL, pool_size=GITHUB_POOL_SIZE,
+                 etag_cache_size=GITHUB_ETAG_CACHE_SIZE, reserve=GITHUB_RATE_LIMIT_RESERVE,
+                 max_retries=GITHUB_MAX_RETRIES, search_reserve=GITHUB_SEARCH_RESERVE):
+        self.base_url = base_url
+        self.reserve = reserve
+        self.reserves = {"core": reserve, "search": search_reserve}
+        self.max_retries = max_retries
+        self.etag_cache_size = etag_cache_size
+        self.stats = Counter()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept"] = "application/vnd.github.v3+json"
+        if token:
+            self.session.headers["Authorization"] = f"token {token}"
+
+        self._etags = OrderedDict()
+        self._etag_lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        # quota name -> [remaining, reset epoch]
+        self._buckets = {}
+
+    def url(self, path):
+        return path if path.startswith("http") else f"{self.base_url}{path}"
+
+    def get(self, path, params=None, headers=None, resource="core"):
+        """
+        GET a GitHub API path (or absolute URL) and return the response.
+
+        `resource` names the rate-limit quota the call is paced against
+        ("core", or "search" for /search endpoints).
+        A `304 Not Modified` is transparently replaced by the cached response.
+        Raises `requests.HTTPError` for non-success responses.
+        """
+        url = self.url(path)
+        key = (url, tuple(sorted((params or {}).items())), (headers or {}).get("Accept"))
+        cached = self._cached(key)
+
+        request_headers = dict(headers or {})
+        if cached is not None:
+            request_headers["If-None-Match"] = cached.headers["ETag"]
+
+        response = self._send("GET", url, resource, params=params, headers=request_headers)
+        if response.status_code == 304 and cached is not None:
+            self.stats["not_modified"] += 1
+            incr("github_not_modified")
+            return cached
+
+        response.raise_for_status()
+        if response.headers.get("ETag"):
+            self._store(key, response)
+        return response
+
+    def get_json(self, path, parse, params=None, headers=None, resource="core", cache=True):
+        """
+        GET a JSON resource and return `(parse(body), response)`.
+
+        The body is streamed into `parse` (a callable taking a binary file
+        object, see `json_stream.select_json`) instead of being loaded whole,
+        so only what `parse` keeps is held in memory. The returned response's
+        body is consumed; use its headers and links only.
+
+        With `cache`, the parsed value is kept for ETag revalidation and
+        returned again on `304 Not Modified`; `parse` must then be the same
+        object on every call for the resource.
+        """
+        url = self.url(path)
+        key = (url, tuple(sorted((params or {}).items())), (headers or {}).get("Accept"), parse)
+        cached = self._cached(key) if cache else None
+
+        request_headers = dict(headers or {})
+        if cached is not None:
+            request_headers["If-None-Match"] = cached[1].headers["ETag"]
+
+        response = self._send("GET", url, resource, params=params, headers=request_headers, stream=True)
+        try:
+            if response.status_code == 304 and cached is not None:
+                self.stats["not_modified"] += 1
+                incr("github_not_modified")
+                return cached
+
+            response.raise_for_status()
+            body = _CountingReader(response.raw)
+            value = parse(body)
+            incr("http_bytes", body.bytes, service="github")
+        finally:
+            response.close()
+        if cache and response.headers.get("ETag"):
+            self._store(key, (value, response))
+        return value, response
+
+    def post(self, path, json_body):
+        """POST a JSON body (used for GraphQL) with the same pacing and retries as `get`."""
+        response = self._send("POST", self.url(path), "graphql", json=json_body)
+        response.raise_for_status()
+        return response
+
+    def _send(self, method, url, resource="core", stream=False, **kwargs):
+        """
+        Send a request, waiting and retrying on 429/403 rate-limit responses.
+
+        With `stream` the body is left unread (and uncounted) for the caller.
+        """
+        for attempt in range(self.max_retries + 1):
+            self._pace(resource)
+            response = self.session.request(method, url, timeout=GITHUB_TIMEOUT, stream=stream, **kwargs)
+            self.stats["requests"] += 1
+            incr("http_requests", service="github", method=method, status=response.status_code)
+            if not stream:
+                incr("http_bytes", len(response.content), service="github")
+            self._update_rate_limit(response.headers)
+            if not _is_rate_limited(response) or attempt == self.max_retries:
+                return response
+            response.close()
+            self.stats["rate_limited"] += 1
+            incr("http_retries", service="github")
+            delay = retry_after_seconds(response.headers, attempt)
+            logger.warning("⏳ GitHub rate limit hit for %s, retrying in %.1fs", url, delay)
+            time.sleep(delay)
+
+    # --- conditional request cache ----------------------------------------
+
+    def _cached(self, key):
+        with self._etag_lock:
+            response = self._etags.get(key)
+            if response is not None:
+                self._etags.move_to_end(key)
+            return response
+
+    def _store(self, key, response):
+        with self._etag_lock:
+            self._etags[key] = response
+            self._etags.move_to_end(key)
+            while len(self._etags) > self.etag_cache_size:
+                self._etags.popitem(last=False)
+
+    # --- rate-limit scheduling ---------------------------------------------
+
+    def _update_rate_limit(self, headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        resource = headers.get("X-RateLimit-Resource", "core")
+        with self._rate_lock:
+            try:
+                self._buckets[resource] = [int(remaining), float(reset)]
+            except ValueError:
+                return
+        if resource == "core":
+            set_gauge("github_rate_limit_remaining", int(remaining))
+        else:
+            set_gauge("github_rate_limit_remaining", int(remaining), resource=resource)
+
+    def _pace(self, resource="core"):
+        reserve = self.reserves.get(resource)
+        if reserve is None:
+            # GraphQL is point-based; its calls are few and not paced here.
+            return
+        with self._rate_lock:
+            bucket = self._buckets.get(resource)
+            if bucket is None or bucket[0] > reserve:
+                return
+            remaining, reset_at = bucket
+            window = max(reset_at - time.time(), 0.0)
+            if window == 0.0:
+                # The window has rolled over; the next response refreshes the counters.
+                del self._buckets[resource]
+                return
+            if remaining <= 0:
+                delay = window + 1.0
+                logger.warning("⏳ GitHub %s rate limit exhausted, waiting %.0fs for reset", resource, delay)
+            else:
+                delay = window / remaining
+            # Reserve this slot before releasing the lock so threads queue up.
+            bucket[0] = max(remaining - 1, 0)
+        self.stats["paced"] += 1
+        time.sleep(delay)
+
+    @property
+    def rate_limit_remaining(self):
+        bucket = self._buckets.get("core")
+        return bucket[0] if bucket else None
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(token=None):
+    """Return the process-wide client for `token`, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get(token)
+        if client is None:
+            client = GitHubClient(token=token)
+            _clients[token] = client
+        return client
@@ -0,0 +1,80 @@
+import os
+from logger_config import logger
+from modules.github_client import get_client
+from modules.metrics import span
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", "https://api.github.com/graphql")
+# Off by default: the stats only let commits with no line changes skip their REST diff,
+# which saves requests only when such commits outnumber the run's GraphQL queries.
+GITHUB_GRAPHQL_ENABLED = os.getenv("GITHUB_GRAPHQL", "false").lower() in ("1", "true", "yes")
+GRAPHQL_BATCH_SIZE = int(os.getenv("GITHUB_GRAPHQL_BATCH_SIZE", "100"))
+
+_COMMIT_FIELDS = """
+      ... on Commit {
+        additions
+        deletions
+      }"""
+
+
+def build_commit_stats_query(shas):
+    """Build one query that aliases an `object(oid:)` lookup per SHA."""
+    lookups = "\n".join(
+        f'    c{i}: object(oid: "{sha}") {{{_COMMIT_FIELDS}\n    }}'
+        for i, sha in enumerate(shas)
+    )
+    return (
+        "query($owner: String!, $name: String!) {\n"
+        "  repository(owner: $owner, name: $name) {\n"
+        f"{lookups}\n"
+        "  }\n"
+        "  rateLimit { cost remaining }\n"
+        "}"
+    )
+
+
+def fetch_commit_stats(repo_owner, repo_name, shas, token=None, batch_size=GRAPHQL_BATCH_SIZE, url=GITHUB_GRAPHQL_URL):
+    """
+    Fetch the line stats of many commits with batched GraphQL queries.
+
+    Args:
+        shas (list): Commit SHAs in the repository.
+        batch_size (int): SHAs aliased into a single query.
+        url (str): GraphQL endpoint; point it at a local stub server for tests.
+
+    Returns:
+        dict: sha -> {'additions', 'deletions'}. SHAs GitHub could not
+              resolve are left out.
+    """
+    client = get_client(token)
+    stats = {}
+    unique_shas = list(dict.fromkeys(shas))
+
+    for start in range(0, len(unique_shas), batch_size):
+        batch = unique_shas[start:start + batch_size]
+        with span("github.graphql_commit_stats"):
+            response = client.post(url, {
+                "query": build_commit_stats_query(batch),
+                "variables": {"owner": repo_owner, "name": repo_name},
+            })
+        payload = response.json()
+        if payload.get("errors"):
+            logger.warning(f"⚠️ GraphQL errors for {repo_owner}/{repo_name}: {payload['errors']}")
+
+        repository = (payload.get("data") or {}).get("repository") or {}
+        for i, sha in enumerate(batch):
+            node = repository.get(f"c{i}")
+            if not node:
+                continue
+            stats[sha] = {
+                'additions': node.get("additions") or 0,
+                'deletions': node.get("deletions") or 0,
+            }
+
+    logger.info(
+        f"✅ GraphQL stats for {len(stats)}/{len(unique_shas)} commits in {repo_name} "
+        f"({(len(unique_shas) + batch_size - 1) // batch_size if unique_shas else 0} requests)."
+    )
+    return stats
@@ -0,0 +1,72 @@
+import os
+import pickle
+import threading
+from logger_config import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# The writer needs read/write access; the reader shares the same token.
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+CREDENTIALS_PATH = os.getenv("CREDENTIALS_PATH", "config/credentials.json")
+TOKEN_PATH = os.getenv("GOOGLE_TOKEN_PATH", "config/token.pickle")
+# Overrides https://sheets.googleapis.com/, e.g. to point at the benchmark's fake Sheets server.
+SHEETS_API_ENDPOINT = os.getenv("SHEETS_API_ENDPOINT")
+
+_service = None
+_lock = threading.Lock()
+
+
+def get_oauth_credentials(credentials_path=CREDENTIALS_PATH, token_path=TOKEN_PATH):
+    # Imported on first use: the Google client libraries take a noticeable
+    # share of process startup and many runs never reach the sheet.
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+
+    creds = None
+    if os.path.exists(token_path):
+        with open(token_path, 'rb') as token:
+            creds = pickle.load(token)
+            logger.info("✅ Loaded credentials from token.")
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+            logger.info("🔄 Refreshed expired credentials.")
+        else:
+            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
+            creds = flow.run_local_server(port=0)
+            logger.info("🆕 Obtained new credentials.")
+        with open(token_path, 'wb') as token:
+            pickle.dump(creds, token)
+            logger.info("💾 Saved new credentials to token file.")
+    return creds
+
+
+def get_sheets_service(credentials_path=CREDENTIALS_PATH, token_path=TOKEN_PATH, credentials=None):
+    """
+    Return the process-wide Sheets v4 service, building it on first use.
+
+    httplib2 connections are not thread-safe, so every request gets its own
+    authorized Http object; the discovery document, credentials and service
+    object itself are built once and shared. `credentials` skips the OAuth
+    token file on first use (the benchmarks pass anonymous credentials).
+    """
+    global _service
+    with _lock:
+        if _service is None:
+            import httplib2
+            import google_auth_httplib2
+            from googleapiclient.discovery import build
+            from googleapiclient.http import HttpRequest
+
+            if credentials is None:
+                credentials = get_oauth_credentials(credentials_path, token_path)
+
+            def request_builder(http, *args, **kwargs):
+                return HttpRequest(google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http()),
+                                   *args, **kwargs)
+
+            options = {"api_endpoint": SHEETS_API_ENDPOINT} if SHEETS_API_ENDPOINT else None
+            _service = build('sheets', 'v4', credentials=credentials, requestBuilder=request_builder,
+                             client_options=options, cache_discovery=False)
+        return _service
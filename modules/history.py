@@ -0,0 +1,299 @@
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from logger_config import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HISTORY_PATH = os.getenv("HISTORY_PATH", "data/history.sqlite")
+HISTORY_ENABLED = os.getenv("HISTORY_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Prediction source besides the tiers: the previous run's result was carried over.
+SOURCE_REUSED = "reused"
+
+_SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job TEXT NOT NULL,
+    run_date TEXT NOT NULL,
+    started_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS commits (
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    date TEXT NOT NULL,
+    author TEXT NOT NULL,
+    message TEXT NOT NULL,
+    first_run_id INTEGER NOT NULL,
+    PRIMARY KEY (owner, repo, sha)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS task_commits (
+    job TEXT NOT NULL,
+    task_name TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    first_run_id INTEGER NOT NULL,
+    PRIMARY KEY (job, task_name, owner, repo, sha)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS predictions (
+    run_id INTEGER NOT NULL,
+    job TEXT NOT NULL,
+    task_name TEXT NOT NULL,
+    run_date TEXT NOT NULL,
+    source TEXT NOT NULL,
+    status TEXT,
+    score INTEGER,
+    hours_min REAL,
+    hours_max REAL,
+    completion_pct INTEGER,
+    commit_count INTEGER,
+    raw TEXT NOT NULL,
+    PRIMARY KEY (run_id, task_name)
+);
+CREATE INDEX IF NOT EXISTS idx_commits_date ON commits (date);
+CREATE INDEX IF NOT EXISTS idx_task_commits_sha ON task_commits (owner, repo, sha);
+CREATE INDEX IF NOT EXISTS idx_predictions_task ON predictions (task_name, run_date);
+CREATE INDEX IF NOT EXISTS idx_predictions_latest ON predictions (job, task_name, run_id, run_date);
+CREATE INDEX IF NOT EXISTS idx_predictions_date ON predictions (run_date, status);
+"""
+
+_STATUS = re.compile(r"Status\**\s*:\**\s*(.+)", re.IGNORECASE)
+_SCORE = re.compile(r"Score\**\s*:\**\s*\(?(\d{1,3})", re.IGNORECASE)
+_HOURS = re.compile(
+    r"Completion Time\**\s*:\**\s*~?(\d+(?:\.\d+)?)(?:\s*(?:[–—-]|to)\s*(\d+(?:\.\d+)?))?\s*h", re.IGNORECASE
+)
+_COMPLETION = re.compile(r"(\d{1,3}(?:\.\d+)?)\s*%\s*complete", re.IGNORECASE)
+
+
+def _commit_day(date):
+    # Regular runs pass CompactCommit datetimes, watch flushes matched-commit 'YYYY-MM-DD' strings;
+    # both are stored as the day so the first insert of a commit never depends on which path saw it.
+    return date.strftime('%Y-%m-%d') if isinstance(date, datetime) else str(date)[:10]
+
+
+def _clean_status(text):
+    # Drop emoji/markdown around the label: "😩  Risk of Delay  " -> "Risk of Delay".
+    return re.sub(r"^[^\w(]+|[\s*]+$", "", text)
+
+
+def parse_prediction(text):
+    """
+    Extract the structured fields of a prediction.
+
+    Model predictions follow the numbered format of `build_prediction_request`;
+    rule-tier statuses ("🟡 Upcoming", "❌ Delayed by 3 day(s)") are a single
+    line and only have a status. Fields that are missing come back as None.
+
+    Returns:
+        dict: 'status', 'score', 'hours_min', 'hours_max' and 'completion_pct'.
+    """
+    text = text or ""
+    status = _STATUS.search(text)
+    if status:
+        status = _clean_status(status.group(1))
+    else:
+        first_line = text.strip().splitlines()[0] if text.strip() else ""
+        status = _clean_status(first_line) or None
+
+    score = _SCORE.search(text)
+    hours = _HOURS.search(text)
+    completion = _COMPLETION.search(text)
+    hours_min = float(hours.group(1)) if hours else None
+    return {
+        'status': status,
+        'score': min(int(score.group(1)), 100) if score else None,
+        'hours_min': hours_min,
+        'hours_max': float(hours.group(2)) if hours and hours.group(2) else hours_min,
+        'completion_pct': min(round(float(completion.group(1))), 100) if completion else None,
+    }
+
+
+class HistoryStore:
+    """
+    Append-only local history of runs, commits, task matches and predictions.
+
+    Every run adds one row per task prediction, with the status, score,
+    estimated hours and completion % parsed out of the text, so trends can be
+    queried without GitHub or the sheet. Commits and task/commit matches are
+    recorded once, tagged with the run that first saw them. Indexed SQLite
+    keeps per-task and per-day scans over months of runs in the millisecond
+    range.
+    """
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Sharded runs append from several processes; wait for each other's writes.
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if 0 < version < 2:
+            # Version 1 stored full ISO timestamps for commits seen by regular runs.
+            self._conn.execute("UPDATE commits SET date = substr(date, 1, 10) WHERE length(date) > 10")
+        self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def record_run(self, job_name, task_updates, sources, matches, commits=(), run_date=None):
+        """
+        Append one run of a job.
+
+        Args:
+            job_name (str): The job (sheet) the run belongs to.
+            task_updates (dict): task_name -> (prediction, summary), as written to the sheet.
+            sources (dict): task_name -> 'rules' / 'llm'; tasks missing here were reused.
+            matches (dict): task_name -> matched commit dicts of this run.
+            commits (iterable): CompactCommits seen in the job's repositories.
+            run_date (str): 'YYYY-MM-DD' of the sheet columns; defaults to today.
+
+        Returns:
+            int: The new run id.
+        """
+        run_date = run_date or datetime.today().strftime('%Y-%m-%d')
+        with self._lock, self._conn:
+            run_id = self._conn.execute(
+                "INSERT INTO runs (job, run_date, started_at) VALUES (?, ?, ?)",
+                (job_name, run_date, datetime.now().isoformat(timespec="seconds"))
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((c.repo_owner, c.repo_name, c.sha, _commit_day(c.date), c.author, c.message, run_id)
+                 for c in commits)
+            )
+            for task_name, matched in matches.items():
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    ((c['repo_owner'], c['repo_name'], c['sha'], _commit_day(c['date']), c['author'],
+                      c['message'], run_id)
+                     for c in matched)
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO task_commits VALUES (?, ?, ?, ?, ?, ?)",
+                    ((job_name, task_name, c['repo_owner'], c['repo_name'], c['sha'], run_id) for c in matched)
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._prediction_rows(run_id, job_name, run_date, task_updates, sources, matches)
+            )
+        logger.debug("🗄️ Recorded run %d of job '%s' (%d predictions) in %s",
+                     run_id, job_name, len(task_updates), self.path)
+        return run_id
+
+    @staticmethod
+    def _prediction_rows(run_id, job_name, run_date, task_updates, sources, matches):
+        for task_name, (prediction, _summary) in task_updates.items():
+            fields = parse_prediction(prediction)
+            matched = matches.get(task_name)
+            yield (run_id, job_name, task_name, run_date, sources.get(task_name, SOURCE_REUSED),
+                   fields['status'], fields['score'], fields['hours_min'], fields['hours_max'],
+                   fields['completion_pct'], len(matched) if matched is not None else None, prediction)
+
+    # --- queries -----------------------------------------------------------
+
+    def task_history(self, task_name, since=None, until=None, job=None):
+        """
+        Predictions of one task over time, oldest first.
+
+        Returns:
+            list: Dicts with 'run_date', 'job', 'source', 'status', 'score',
+                  'hours_min', 'hours_max', 'completion_pct' and 'commit_count'.
+        """
+        return self._query(
+            "SELECT run_date, job, source, status, score, hours_min, hours_max, completion_pct, commit_count"
+            " FROM predictions WHERE task_name = ?", (task_name,),
+            since, until, job, order="run_date, run_id"
+        )
+
+    def latest_statuses(self, as_of=None, job=None):
+        """The most recent prediction of every task on or before `as_of` (default: all time)."""
+        # The inner scan is answered from idx_predictions_latest alone.
+        latest = "SELECT job, task_name, MAX(run_id) AS run_id FROM predictions WHERE 1 = 1"
+        params = []
+        if as_of:
+            latest += " AND run_date <= ?"
+            params.append(as_of)
+        if job:
+            latest += " AND job = ?"
+            params.append(job)
+        rows = self._conn.execute(
+            "SELECT p.task_name, p.job, p.run_date, p.source, p.status, p.score, p.hours_min, p.hours_max,"
+            f" p.completion_pct FROM ({latest} GROUP BY job, task_name) AS l"
+            " JOIN predictions p ON p.run_id = l.run_id AND p.task_name = l.task_name"
+            " ORDER BY p.task_name, p.job", params
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def status_counts(self, since=None, until=None, job=None):
+        """Number of tasks per (run_date, status), for status-mix trends."""
+        return self._query(
+            "SELECT run_date, status, COUNT(*) AS tasks FROM predictions WHERE 1 = 1", (),
+            since, until, job, group="run_date, status", order="run_date, status"
+        )
+
+    def task_commits(self, task_name, job=None):
+        """Every commit ever matched to a task, oldest first."""
+        sql = ("SELECT c.owner, c.repo, c.sha, c.date, c.author, c.message FROM task_commits t"
+               " JOIN commits c ON c.owner = t.owner AND c.repo = t.repo AND c.sha = t.sha"
+               " WHERE t.task_name = ?")
+        params = [task_name]
+        if job:
+            sql += " AND t.job = ?"
+            params.append(job)
+        return [dict(row) for row in self._conn.execute(sql + " ORDER BY c.date, c.sha", params)]
+
+    def commit_activity(self, since=None, until=None, owner=None, repo=None):
+        """Commits per day and repository; `since`/`until` are 'YYYY-MM-DD' (inclusive)."""
+        where, params = ["1 = 1"], []
+        if since:
+            where.append("date >= ?")
+            params.append(since)
+        if until:
+            where.append("date < ?")
+            params.append((datetime.strptime(until, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d"))
+        if owner:
+            where.append("owner = ?")
+            params.append(owner)
+        if repo:
+            where.append("repo = ?")
+            params.append(repo)
+        rows = self._conn.execute(
+            "SELECT date AS day, owner, repo, COUNT(*) AS commits FROM commits"
+            f" WHERE {' AND '.join(where)} GROUP BY day, owner, repo ORDER BY day, owner, repo", params
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- internals ---------------------------------------------------------
+
+    def _query(self, select, params, since, until, job, group=None, order=None):
+        sql, params = [select], list(params)
+        if since:
+            sql.append("AND run_date >= ?")
+            params.append(since)
+        if until:
+            sql.append("AND run_date <= ?")
+            params.append(until)
+        if job:
+            sql.append("AND job = ?")
+            params.append(job)
+        if group:
+            sql.append(f"GROUP BY {group}")
+        if order:
+            sql.append(f"ORDER BY {order}")
+        return [dict(row) for row in self._conn.execute(" ".join(sql), params)]
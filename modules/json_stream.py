@@ -0,0 +1,128 @@
+import json
+from logger_config import logger
+
+_SCALAR_EVENTS = frozenset(("string", "number", "boolean", "null"))
+
+_ijson = None
+
+
+def _streaming_parser():
+    """Return the ijson module, or None (once warned) when it is not installed."""
+    global _ijson
+    if _ijson is None:
+        try:
+            import ijson
+            _ijson = ijson
+        except ImportError as e:
+            logger.warning(f"⚠️ ijson unavailable ({e}); GitHub responses are parsed whole.")
+            _ijson = False
+    return _ijson or None
+
+
+def _assign(target, path, value):
+    *parents, leaf = path.split(".")
+    for key in parents:
+        target = target.setdefault(key, {})
+    target[leaf] = value
+
+
+def _lookup(data, path):
+    for key in path.split("."):
+        if not isinstance(data, dict) or key not in data:
+            raise KeyError(path)
+        data = data[key]
+    return data
+
+
+def _select(data, paths):
+    """Copy only the dotted `paths` of a decoded JSON object; missing paths are left out."""
+    selected = {}
+    for path in paths:
+        try:
+            value = _lookup(data, path)
+        except KeyError:
+            continue
+        if not isinstance(value, (dict, list)):
+            _assign(selected, path, value)
+    return selected
+
+
+def select_json(fp, fields=(), items=None, item_fields=(), on_item=None):
+    """
+    Read a JSON document, keeping only the values asked for.
+
+    With ijson installed the document is parsed as a stream of events and
+    everything else (nested objects, arrays such as a compare's `files`) is
+    discarded as it goes past, so memory is bounded by what is kept rather
+    than by the payload size. Without ijson the document is decoded whole and
+    the same selection is applied.
+
+    Args:
+        fp: Binary file-like object positioned at the start of the document.
+        fields (iterable): Dotted paths of scalar values to keep, e.g.
+            'total_commits' or 'base_commit.sha'.
+        items (str): Dotted path of the array whose elements are wanted
+            ('commits', 'files'); '' for a top-level array, None for none.
+        item_fields (iterable): Dotted paths of the scalar values kept from
+            every element, e.g. 'sha' or 'commit.author.date'.
+        on_item (callable): Applied to each element as soon as it is read; its
+            return value is kept, or the element dropped if it returns None.
+
+    Returns:
+        tuple: (values, elements) - a dict of the `fields` found keyed by
+               path, and the list of selected elements.
+    """
+    ijson = _streaming_parser()
+    if ijson is None:
+        return _select_decoded(json.load(fp), fields, items, item_fields, on_item)
+
+    fields = frozenset(fields)
+    item_fields = frozenset(item_fields)
+    item_prefix = f"{items}.item" if items else "item"
+    item_dot = item_prefix + "."
+    values, elements = {}, []
+    current = None
+
+    for prefix, event, value in ijson.parse(fp, use_float=True):
+        if current is not None and prefix.startswith(item_dot):
+            if event in _SCALAR_EVENTS:
+                path = prefix[len(item_dot):]
+                if path in item_fields:
+                    _assign(current, path, value)
+        elif prefix == item_prefix and items is not None:
+            if event == "start_map":
+                current = {}
+            elif event == "end_map":
+                element = on_item(current) if on_item else current
+                if element is not None:
+                    elements.append(element)
+                current = None
+        elif prefix in fields and event in _SCALAR_EVENTS:
+            values[prefix] = value
+    return values, elements
+
+
+def _select_decoded(data, fields, items, item_fields, on_item):
+    values = {}
+    for path in fields:
+        try:
+            value = _lookup(data, path)
+        except KeyError:
+            continue
+        if not isinstance(value, (dict, list)):
+            values[path] = value
+
+    elements = []
+    if items is not None:
+        try:
+            array = _lookup(data, items) if items else data
+        except KeyError:
+            array = []
+        for raw in array if isinstance(array, list) else []:
+            if not isinstance(raw, dict):
+                continue
+            element = _select(raw, item_fields)
+            element = on_item(element) if on_item else element
+            if element is not None:
+                elements.append(element)
+    return values, elements
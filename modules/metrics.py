@@ -0,0 +1,206 @@
+import functools
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from logger_config import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+METRICS_DIR = os.getenv("METRICS_DIR", "logs")
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+PROMETHEUS_PREFIX = "commit_tracker"
+
+
+class Metrics:
+    """
+    Process-wide, thread-safe run instrumentation.
+
+    - Spans: named timings aggregated into count / total / max seconds / errors.
+    - Counters: monotonically increasing values, optionally labelled
+      (e.g. http_requests{service="github",status="200"}).
+    - Gauges: last observed value (e.g. GitHub rate-limit remaining).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.spans = {}
+            self.counters = {}
+            self.gauges = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def observe(self, name, seconds, error=False):
+        with self._lock:
+            span = self.spans.setdefault(name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0, "errors": 0})
+            span["count"] += 1
+            span["seconds"] += seconds
+            span["max_seconds"] = max(span["max_seconds"], seconds)
+            if error:
+                span["errors"] += 1
+
+    def incr(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def snapshot(self):
+        """JSON-serialisable copy of everything recorded since the last reset."""
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "finished_at": time.time(),
+                "spans": {name: dict(span, seconds=round(span["seconds"], 4),
+                                     max_seconds=round(span["max_seconds"], 4))
+                          for name, span in sorted(self.spans.items())},
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self.counters.items())],
+                "gauges": [{"name": name, "labels": dict(labels), "value": value}
+                           for (name, labels), value in sorted(self.gauges.items())],
+            }
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def span(name):
+    """Time a block under `name`; exceptions are counted as errors and re-raised."""
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        metrics.observe(name, time.perf_counter() - started, error)
+
+
+def timed(name):
+    """Decorator form of `span`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def incr(name, amount=1, **labels):
+    metrics.incr(name, amount, **labels)
+
+
+def set_gauge(name, value, **labels):
+    metrics.set_gauge(name, value, **labels)
+
+
+def _prom_name(name):
+    return f"{PROMETHEUS_PREFIX}_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _prom_escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_prom_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def to_prometheus(report, run_label):
+    """Render a snapshot in the Prometheus text exposition format."""
+    job = {"run": run_label}
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_prom_labels(dict(job, **labels))} {value}")
+
+    spans = report["spans"]
+    family(_prom_name("span_seconds_total"), "counter", "Time spent in each instrumented stage.",
+           [({"span": n}, s["seconds"]) for n, s in spans.items()])
+    family(_prom_name("span_calls_total"), "counter", "Calls of each instrumented stage.",
+           [({"span": n}, s["count"]) for n, s in spans.items()])
+    family(_prom_name("span_errors_total"), "counter", "Failed calls of each instrumented stage.",
+           [({"span": n}, s["errors"]) for n, s in spans.items()])
+    family(_prom_name("span_max_seconds"), "gauge", "Slowest call of each instrumented stage.",
+           [({"span": n}, s["max_seconds"]) for n, s in spans.items()])
+
+    by_name = {}
+    for counter in report["counters"]:
+        by_name.setdefault(counter["name"], []).append((counter["labels"], counter["value"]))
+    for name, samples in by_name.items():
+        family(_prom_name(f"{name}_total"), "counter", f"Run counter {name}.", samples)
+
+    by_name = {}
+    for gauge in report["gauges"]:
+        by_name.setdefault(gauge["name"], []).append((gauge["labels"], gauge["value"]))
+    for name, samples in by_name.items():
+        family(_prom_name(name), "gauge", f"Last observed {name}.", samples)
+
+    family(_prom_name("run_duration_seconds"), "gauge", "Wall time of the last run.",
+           [({}, round(report["finished_at"] - report["started_at"], 3))])
+    family(_prom_name("run_finished_timestamp_seconds"), "gauge", "When the last run finished.",
+           [({}, int(report["finished_at"]))])
+    return "\n".join(lines) + "\n"
+
+
+def write_report(run_label="default", directory=METRICS_DIR):
+    """
+    Write the run's metrics as logs/metrics_<label>_<timestamp>.json and
+    refresh logs/commit_tracker_<label>.prom for a node_exporter textfile
+    collector. Returns the snapshot.
+    """
+    report = metrics.snapshot()
+    report["run"] = run_label
+    if not METRICS_ENABLED:
+        return report
+
+    safe_label = re.sub(r"[^a-zA-Z0-9_.-]", "_", run_label)
+    try:
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(report["finished_at"]))
+        json_path = os.path.join(directory, f"metrics_{safe_label}_{stamp}.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        prom_path = os.path.join(directory, f"{PROMETHEUS_PREFIX}_{safe_label}.prom")
+        tmp_path = f"{prom_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(to_prometheus(report, run_label))
+        os.replace(tmp_path, prom_path)
+        logger.info(f"📈 Run metrics written to {json_path} and {prom_path}.")
+    except OSError as e:
+        logger.warning(f"⚠️ Could not write run metrics: {e}")
+    return report
+
+
+def record_tokens(usage, purpose):
+    """Count prompt/completion tokens from an OpenAI `usage` object or dict."""
+    if not usage:
+        return
+    get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, None)
+    for kind in ("prompt", "completion"):
+        value = get(f"{kind}_tokens")
+        if value:
+            metrics.incr("openai_tokens", value, kind=kind, purpose=purpose)
@@ -0,0 +1,109 @@
+import io
+import json
+import os
+import time
+from modules.metrics import span, incr, record_tokens
+from logger_config import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OPENAI_BATCH_POLL_SECONDS = float(os.getenv("OPENAI_BATCH_POLL_SECONDS", "30"))
+OPENAI_BATCH_TIMEOUT_SECONDS = float(os.getenv("OPENAI_BATCH_TIMEOUT_SECONDS", str(24 * 3600)))
+# The Batch API accepts at most 50,000 requests per input file.
+OPENAI_BATCH_MAX_REQUESTS = int(os.getenv("OPENAI_BATCH_MAX_REQUESTS", "50000"))
+
+CHAT_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+BATCH_ERROR_PREFIX = "⚠️ Batch request failed:"
+
+
+def _to_jsonl(requests):
+    lines = (
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": CHAT_ENDPOINT, "body": body})
+        for custom_id, body in requests
+    )
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _parse_output(text, results):
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        custom_id = item.get("custom_id")
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code", 200) >= 400:
+            error = item.get("error") or (response.get("body") or {}).get("error")
+            results[custom_id] = f"{BATCH_ERROR_PREFIX} {error}"
+            continue
+        record_tokens((response.get("body") or {}).get("usage"), "batch")
+        choices = (response.get("body") or {}).get("choices") or []
+        content = choices[0]["message"]["content"] if choices else None
+        results[custom_id] = content.strip() if content else None
+
+
+def _run_one_batch(client, chunk, description):
+    input_file = client.files.create(file=("batch.jsonl", io.BytesIO(_to_jsonl(chunk))), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=CHAT_ENDPOINT,
+        completion_window="24h",
+        metadata={"description": description},
+    )
+    logger.info(f"📤 Submitted OpenAI batch {batch.id} with {len(chunk)} requests ({description}).")
+
+    deadline = time.monotonic() + OPENAI_BATCH_TIMEOUT_SECONDS
+    while batch.status not in TERMINAL_STATUSES:
+        if time.monotonic() > deadline:
+            logger.error(f"❌ OpenAI batch {batch.id} timed out; cancelling.")
+            client.batches.cancel(batch.id)
+            break
+        time.sleep(OPENAI_BATCH_POLL_SECONDS)
+        batch = client.batches.retrieve(batch.id)
+        counts = batch.request_counts
+        if counts is not None:
+            logger.info(f"⏳ Batch {batch.id}: {batch.status} ({counts.completed}/{counts.total} done)")
+
+    results = {}
+    if batch.output_file_id:
+        _parse_output(client.files.content(batch.output_file_id).text, results)
+    if batch.error_file_id:
+        _parse_output(client.files.content(batch.error_file_id).text, results)
+    if batch.status != "completed":
+        logger.error(f"❌ OpenAI batch {batch.id} ended as '{batch.status}'.")
+    return results
+
+
+def run_chat_batch(requests, openai_api_key, description="commit-tracker"):
+    """
+    Run chat-completion requests through the OpenAI Batch API and wait for them.
+
+    Args:
+        requests (list): (custom_id, request_body) pairs; bodies are the same
+            dicts passed to `chat.completions.create`.
+        openai_api_key (str): OpenAI API key. OPENAI_BASE_URL is honoured, so a
+            local fake batch endpoint can be used for tests.
+
+    Returns:
+        dict: custom_id -> response text, None for an empty reply, or a
+              BATCH_ERROR_PREFIX message for requests that failed or never ran.
+    """
+    if not requests:
+        return {}
+
+    from openai import OpenAI  # deferred: slow to import, only batch mode needs it
+
+    client = OpenAI(api_key=openai_api_key)
+    results = {}
+    for start in range(0, len(requests), OPENAI_BATCH_MAX_REQUESTS):
+        chunk = requests[start:start + OPENAI_BATCH_MAX_REQUESTS]
+        try:
+            with span("openai.batch"):
+                results.update(_run_one_batch(client, chunk, description))
+            incr("openai_batch_requests", len(chunk))
+        except Exception as e:
+            logger.error(f"❌ OpenAI batch submission failed: {e}")
+        for custom_id, _ in chunk:
+            results.setdefault(custom_id, f"{BATCH_ERROR_PREFIX} no result returned")
+    return results
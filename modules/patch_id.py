@@ -0,0 +1,45 @@
+import hashlib
+
+# Value stored for commits whose diff has no content to summarize.
+EMPTY_PATCH_ID = ""
+
+
+def patch_id(files):
+    """
+    Content identity of a commit's changes, in the spirit of `git patch-id --stable`.
+
+    The same change cherry-picked, rebased or pushed to another repository
+    gets a new SHA but keeps its patch ID: hunk headers (line numbers),
+    context lines and all whitespace are ignored, and files are hashed in
+    name order. Files without a patch (binary, or patch omitted by GitHub or
+    the patch budget) count by name, status, blob SHA, line counts and
+    whether the patch was omitted.
+
+    Args:
+        files (list): Changed files as returned by `get_commit_files`.
+
+    Returns:
+        str: Hex digest, or EMPTY_PATCH_ID if no file carries any change.
+    """
+    digest = hashlib.sha1()
+    changed = False
+    for f in sorted(files, key=lambda f: f.get('filename', "")):
+        patch = f.get('patch') or ""
+        lines = [
+            "".join(line.split())
+            for line in patch.splitlines()
+            if line[:1] in ("+", "-")
+        ]
+        if not patch:
+            lines = [
+                f"nopatch {f.get('status', '')} {f.get('sha', '')} +{f.get('additions', 0)} -{f.get('deletions', 0)}"
+                f"{' omitted' if f.get('patch_omitted') else ''}"
+            ] if f.get('filename') else []
+        if not lines:
+            continue
+        changed = True
+        # surrogateescape: git output that is not valid UTF-8 is hashed as its original bytes.
+        digest.update(f"{f.get('filename', '')}\0".encode("utf-8", "surrogateescape"))
+        for line in lines:
+            digest.update(f"{line}\n".encode("utf-8", "surrogateescape"))
+    return digest.hexdigest() if changed else EMPTY_PATCH_ID
@@ -0,0 +1,348 @@
+import os
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from modules.backends import backend_for, REST_BACKEND
+from modules.diff_compactor import compact_diff
+from modules.digest import TaskDigester
+from modules.github_graphql import fetch_commit_stats, GITHUB_GRAPHQL_ENABLED
+from modules.commit_summarizer import summarize_commit, is_cacheable_summary, MODEL as SUMMARY_MODEL, PROMPT_VERSION
+from modules.metrics import set_gauge
+from modules.patch_id import patch_id, EMPTY_PATCH_ID
+from logger_config import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GITHUB_CONCURRENCY = int(os.getenv("GITHUB_CONCURRENCY", "4"))
+OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "4"))
+
+EMPTY_DIFF_SUMMARY = "⚠️ Empty diff or no content to summarize."
+
+
+class PreparedCommit:
+    """A matched commit after the GitHub stage of the pipeline."""
+
+    __slots__ = ("commit", "summary", "diff", "error", "patch_id")
+
+    def __init__(self, commit, summary, diff, error=None, patch_id=None):
+        self.commit = commit
+        self.summary = summary
+        self.diff = diff
+        self.error = error
+        self.patch_id = patch_id
+
+
+def format_summary(sha, part_summary):
+    return f"🔹 Commit {sha[:7]}:\n{part_summary}"
+
+
+def format_failure(sha, error):
+    return f"❌ Commit {sha[:7]} failed: {error}"
+
+
+def block_failed(block):
+    """
+    True when a formatted commit block records an error instead of a summary
+    (failed diff fetch, failed or empty model reply). Results built from such
+    blocks must not be reused, so the next run retries them.
+    """
+    if block.startswith("❌ Commit "):
+        return True
+    _, _, part_summary = block.partition("\n")
+    return part_summary != EMPTY_DIFF_SUMMARY and not is_cacheable_summary(part_summary)
+
+
+class SummaryPipeline:
+    """
+    Fetches diffs and summarizes matched commits concurrently.
+
+    GitHub and OpenAI calls are bounded by separate semaphores so a slow model
+    cannot starve diff fetching (or vice versa). Results are always returned
+    in the order of the input commits, matching the sequential output.
+
+    Work is deduplicated by content: every commit is resolved to a patch ID
+    once, and every patch ID is summarized once for the lifetime of the
+    pipeline, however many tasks, SHAs or repositories it shows up under.
+    Concurrent requests for the same commit or change wait for the first.
+    """
+
+    def __init__(self, cache, github_token, openai_api_key,
+                 github_concurrency=GITHUB_CONCURRENCY, openai_concurrency=OPENAI_CONCURRENCY,
+                 use_graphql=GITHUB_GRAPHQL_ENABLED):
+        self.cache = cache
+        self.use_graphql = use_graphql
+        self.github_token = github_token
+        self.openai_api_key = openai_api_key
+        self._github_slots = threading.BoundedSemaphore(max(1, github_concurrency))
+        self._openai_slots = threading.BoundedSemaphore(max(1, openai_concurrency))
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, github_concurrency) + max(1, openai_concurrency),
+            thread_name_prefix="summary"
+        )
+        self.digester = TaskDigester(cache, openai_api_key, self._executor, self._openai_slots)
+        self._lock = threading.Lock()
+        # (owner, repo, sha) -> Future of the patch ID; patch ID -> Future of the summary.
+        self._patch_ids = {}
+        self._summaries = {}
+        # (owner, repo, sha) -> GraphQL line stats, filled once per run by `prefetch_stats`.
+        self._stats = {}
+        self._seen_commits = set()
+        self._seen_patches = set()
+        self.stats = Counter()
+
+    def summarize(self, matched_commits):
+        """
+        Summarize every matched commit of a task.
+
+        Args:
+            matched_commits (list): Commit dicts with 'sha', 'repo_owner' and 'repo_name'.
+
+        Returns:
+            list: One formatted summary block per commit, in input order.
+        """
+        self._lookup(matched_commits)
+        return list(self._executor.map(
+            lambda c: self._summarize_one(c, self._stats.get(self._key(c))),
+            matched_commits
+        ))
+
+    def prepare(self, matched_commits, queued=()):
+        """
+        Run only the GitHub side of the pipeline: resolve patch IDs and known
+        summaries, and fetch/compact the diffs of the rest, without calling the model.
+
+        Args:
+            matched_commits (list): Commit dicts as for `summarize`.
+            queued (container): Patch IDs the caller already has a diff for;
+                their commits get neither a summary nor a diff.
+
+        Returns:
+            list: PreparedCommit per commit, in input order. Apart from failed
+                  and queued commits, exactly one of `summary` (already final)
+                  or `diff` (needs summarizing, then `store_summary`) is set.
+        """
+        self._lookup(matched_commits)
+        return list(self._executor.map(
+            lambda c: self._prepare_one(c, self._stats.get(self._key(c)), queued),
+            matched_commits
+        ))
+
+    def prefetch_stats(self, matched_commits):
+        """
+        Look up GraphQL line stats for the commits of every task of the run
+        at once, before they are summarized, so commits without content
+        changes never need a REST diff request. One query covers up to
+        GITHUB_GRAPHQL_BATCH_SIZE commits of a repository; a no-op unless
+        GITHUB_GRAPHQL is on.
+
+        Args:
+            matched_commits (iterable): Commit dicts of all tasks, duplicates allowed.
+        """
+        if not self.use_graphql:
+            return
+        by_repo = defaultdict(dict)
+        for c in self._lookup(matched_commits):
+            if backend_for(c['repo_owner'], c['repo_name'], self.github_token).name == REST_BACKEND:
+                by_repo[(c['repo_owner'], c['repo_name'])][c['sha']] = None
+
+        for (owner, name), shas in by_repo.items():
+            try:
+                with self._github_slots:
+                    stats = fetch_commit_stats(owner, name, list(shas), self.github_token)
+            except Exception as e:
+                logger.warning(f"⚠️ GraphQL stats failed for {owner}/{name}, using REST diffs: {e}")
+                continue
+            with self._lock:
+                self._stats.update(((owner, name, sha), value) for sha, value in stats.items())
+
+    def digest(self, matched_commits, blocks, task_name):
+        """Join the summary blocks of a task, rolling them up if they exceed the digest budget."""
+        return self.digester.digest(matched_commits, blocks, task_name)
+
+    def store_summary(self, patch, part_summary):
+        """Remember the summary of a change produced outside the pipeline (batch mode)."""
+        if is_cacheable_summary(part_summary):
+            self.cache.put_summary(patch, SUMMARY_MODEL, PROMPT_VERSION, part_summary)
+            self._remember(self._summaries, patch, part_summary)
+
+    def report(self):
+        """
+        Log and export how much work content deduplication saved.
+
+        Returns:
+            dict: Counts of commit 'references' (task, commit pairs), distinct
+                  'commits' and distinct 'changes' (patch IDs) seen so far.
+        """
+        references = self.stats["references"]
+        commits, changes = len(self._seen_commits), len(self._seen_patches)
+        counts = {"references": references, "commits": commits, "changes": changes}
+        if not references:
+            return counts
+        set_gauge("summary_dedup", references, level="references")
+        set_gauge("summary_dedup", commits, level="commits")
+        set_gauge("summary_dedup", changes, level="changes")
+        logger.info("🧬 Dedup: %d commit references -> %d distinct commits -> %d distinct changes "
+                    "(%.1fx fewer summaries).", references, commits, changes, references / max(1, changes))
+        return counts
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def _key(self, commit):
+        return commit['repo_owner'], commit['repo_name'], commit['sha']
+
+    def _lookup(self, matched_commits):
+        """
+        Seed patch IDs known from earlier runs.
+
+        Returns:
+            list: The commits whose patch ID is still unknown.
+        """
+        pending = []
+        for c in matched_commits:
+            key = self._key(c)
+            with self._lock:
+                if key in self._patch_ids or key in self._stats:
+                    continue
+            cached = self.cache.get_patch_id(*key)
+            if cached is None:
+                pending.append(c)
+            else:
+                self._remember(self._patch_ids, key, cached)
+        return pending
+
+    def _once(self, memo, key, compute, keep=None):
+        """
+        Return `compute()` for `key`, running it at most once at a time.
+
+        Callers arriving while it runs wait for its result. Failures, and
+        results `keep` rejects, are forgotten so the next caller retries.
+        """
+        with self._lock:
+            future = memo.get(key)
+            owner = future is None
+            if owner:
+                future = memo[key] = Future()
+        if owner:
+            try:
+                result = compute()
+            except Exception as e:
+                with self._lock:
+                    del memo[key]
+                future.set_exception(e)
+                raise
+            if keep is not None and not keep(result):
+                with self._lock:
+                    del memo[key]
+            future.set_result(result)
+        return future.result()
+
+    def _remember(self, memo, key, value):
+        future = Future()
+        future.set_result(value)
+        with self._lock:
+            memo[key] = future
+
+    def _count(self, commit, patch):
+        with self._lock:
+            self.stats["references"] += 1
+            self._seen_commits.add(self._key(commit))
+            self._seen_patches.add(patch)
+
+    def _files(self, commit):
+        """Return the commit's changed files, from the cache or the repository backend."""
+        files = self.cache.get_files(*self._key(commit))
+        if files is None:
+            with self._github_slots:
+                backend = backend_for(commit['repo_owner'], commit['repo_name'], self.github_token)
+                files = backend.get_commit_files(commit['sha'])
+            self.cache.put_files(commit['repo_owner'], commit['repo_name'], commit['sha'], files)
+        return files
+
+    def _patch_id(self, commit, stats=None):
+        def resolve():
+            if stats is not None and not (stats['additions'] or stats['deletions']):
+                # GraphQL already told us there is nothing to diff.
+                patch = EMPTY_PATCH_ID
+            else:
+                patch = patch_id(self._files(commit))
+            self.cache.put_patch_id(*self._key(commit), patch)
+            return patch
+
+        patch = self._once(self._patch_ids, self._key(commit), resolve)
+        self._count(commit, patch)
+        return patch
+
+    def _fetch_diff(self, commit):
+        """Return the commit's diff compacted to the summarization token budget."""
+        compacted = compact_diff(self._files(commit))
+        if compacted.elided:
+            logger.debug("✂️ Compacted diff of %.7s to %d tokens, elided %d item(s).",
+                         commit['sha'], compacted.tokens, len(compacted.elided))
+        return compacted.text
+
+    def _known_summary(self, patch):
+        """The summary of a change if this run or an earlier one produced it, else None."""
+        with self._lock:
+            future = self._summaries.get(patch)
+        if future is not None and future.done() and future.exception() is None:
+            return future.result()
+        summary = self.cache.get_summary(patch, SUMMARY_MODEL, PROMPT_VERSION)
+        if summary is not None:
+            self._remember(self._summaries, patch, summary)
+        return summary
+
+    def _prepare_one(self, commit, stats=None, queued=()):
+        try:
+            patch = self._patch_id(commit, stats)
+            if patch == EMPTY_PATCH_ID:
+                return PreparedCommit(commit, EMPTY_DIFF_SUMMARY, None, patch_id=patch)
+            part_summary = self._known_summary(patch)
+            if part_summary is not None:
+                return PreparedCommit(commit, part_summary, None, patch_id=patch)
+            if patch in queued:
+                return PreparedCommit(commit, None, None, patch_id=patch)
+            diff = self._fetch_diff(commit)
+        except Exception as e:
+            logger.error("❌ Diff fetch failed for %s: %s", commit['sha'], e)
+            return PreparedCommit(commit, None, None, error=e)
+        if not diff.strip():
+            return PreparedCommit(commit, EMPTY_DIFF_SUMMARY, None, patch_id=patch)
+        return PreparedCommit(commit, None, diff, patch_id=patch)
+
+    def _summarize_patch(self, commit, patch):
+        """Summarize a change from the diff of one of its commits (cache first)."""
+        part_summary = self.cache.get_summary(patch, SUMMARY_MODEL, PROMPT_VERSION)
+        if part_summary is not None:
+            return part_summary
+        diff = self._fetch_diff(commit)
+        if not diff.strip():
+            return EMPTY_DIFF_SUMMARY
+        logger.debug("🧠 Summarizing change %.12s via commit %s from %s...",
+                     patch, commit['sha'], commit['repo_name'])
+        with self._openai_slots:
+            part_summary = summarize_commit(diff, self.openai_api_key)
+        if is_cacheable_summary(part_summary):
+            self.cache.put_summary(patch, SUMMARY_MODEL, PROMPT_VERSION, part_summary)
+        return part_summary
+
+    def _summarize_one(self, commit, stats=None):
+        sha = commit['sha']
+        try:
+            patch = self._patch_id(commit, stats)
+        except Exception as e:
+            logger.error("❌ Diff fetch failed for %s: %s", sha, e)
+            return format_failure(sha, e)
+        if patch == EMPTY_PATCH_ID:
+            return format_summary(sha, EMPTY_DIFF_SUMMARY)
+
+        try:
+            part_summary = self._once(self._summaries, patch, lambda: self._summarize_patch(commit, patch),
+                                      keep=is_cacheable_summary)
+        except Exception as e:
+            logger.error("❌ Summary failed for %s: %s", sha, e)
+            return format_failure(sha, e)
+
+        logger.debug("✅ Summary complete for %s", sha)
+        return format_summary(sha, part_summary)
@@ -1,7 +1,41 @@
-from openai import OpenAI
+import os
+from modules.timeline_checker import check_timeline_status, ON_TRACK
+from modules.commit_summarizer import complete_chat
+from modules.metrics import timed
 from logger_config import logger
+from dotenv import load_dotenv
 
-def predict_delay_status(task_description, end_date, commit_summary, openai_api_key):
+load_dotenv()
+
+MODEL = "gpt-4"
+NO_RESPONSE = "⚠️ No response generated"
+# Settle tasks with the rule-based timeline checker first and call the model only when it cannot.
+TIERED_PREDICTION = os.getenv("TIERED_PREDICTION", "true").lower() in ("1", "true", "yes")
+TIER_RULES = "rules"
+TIER_LLM = "llm"
+
+
+def rule_based_status(task, matched_commits):
+    """
+    Deterministic first tier of the prediction.
+
+    Tasks without related commits (upcoming, idle, overdue), with missing or
+    invalid dates, or whose commits landed after the end date are settled by
+    `check_timeline_status`. Only when commits exist and all fall within the
+    timeline is the outcome ambiguous, since how much is done can only be
+    judged from their content.
+
+    Returns:
+        str: The status, or None when the task must go to the model.
+    """
+    if not TIERED_PREDICTION:
+        return None
+    status = check_timeline_status(task, matched_commits)
+    return None if status == ON_TRACK else status
+
+
+def build_prediction_request(task_description, end_date, commit_summary):
+    """Return the chat-completions request body used to predict a task's status."""
     prompt = f"""
 You are a senior technical project manager and developer.
 
@@ -28,37 +62,38 @@ Respond in this format:
 5. Completion: Z% complete ✅, R% remaining ⏳
 """
 
+    return {
+        "model": MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": (
+                    "You are an AI project reviewer evaluating software task progress based on commit summaries."
+                    " Analyze the commits, understand what parts of the task are complete, and estimate what remains."
+                    " Your completion percentage must reflect actual progress based on code-level summaries — not just assumptions."
+                    "\n\n"
+                    "Be honest and realistic. If only partial work is seen, say so clearly. Do not assume things are done unless the commits confirm it."
+                    "\n\n"
+                    "Provide completion as a percent. If nothing has been committed that touches core functionality, say 0–10%."
+                    " If only UI is built but no logic or API, say 30–40%. If most of it is done, say 80–95%."
+                    " Combine this with your best estimate of how many hours of work remain to finish it properly."
+                )
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        "temperature": 0.3,
+        "max_tokens": 400,
+    }
+
+
+@timed("openai.predict")
+def predict_delay_status(task_description, end_date, commit_summary, openai_api_key):
     try:
-        client = OpenAI(api_key=openai_api_key)
-
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an AI project reviewer evaluating software task progress based on commit summaries."
-                        " Analyze the commits, understand what parts of the task are complete, and estimate what remains."
-                        " Your completion percentage must reflect actual progress based on code-level summaries — not just assumptions."
-                        "\n\n"
-                        "Be honest and realistic. If only partial work is seen, say so clearly. Do not assume things are done unless the commits confirm it."
-                        "\n\n"
-                        "Provide completion as a percent. If nothing has been committed that touches core functionality, say 0–10%."
-                        " If only UI is built but no logic or API, say 30–40%. If most of it is done, say 80–95%."
-                        " Combine this with your best estimate of how many hours of work remain to finish it properly."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.3,
-            max_tokens=400
-        )
-
-        content = response.choices[0].message.content
-        return content.strip() if content else "⚠️ No response generated"
+        return complete_chat(build_prediction_request(task_description, end_date, commit_summary),
+                             "prediction", openai_api_key, NO_RESPONSE)
 
     except Exception as e:
         logger.error(f"AI prediction failed: {e}")
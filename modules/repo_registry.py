@@ -0,0 +1,65 @@
+import json
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# JSON file listing the tracked repositories; replaces REPO_1_* .. REPO_3_* when set.
+REPOSITORIES_FILE = os.getenv("REPOSITORIES_FILE", "")
+
+DISCOVERY_FULL = "full"
+DISCOVERY_SEARCH = "search"
+
+
+def normalize_repository(raw):
+    """
+    Fill in the defaults of one repository entry.
+
+    Keys: owner, name, branch ("main"), backend ("rest" or "git"), remote
+    (git URL for the git backend) and discovery ("full" to download its
+    whole history, the default; "search" to opt in to commit search when
+    COMMIT_DISCOVERY=search).
+    """
+    return {
+        "owner": str(raw.get("owner") or ""),
+        "name": str(raw.get("name") or ""),
+        "branch": str(raw.get("branch") or "main"),
+        "backend": str(raw.get("backend") or "rest"),
+        "remote": str(raw.get("remote") or ""),
+        "discovery": str(raw.get("discovery") or DISCOVERY_FULL),
+    }
+
+
+def load_repositories(path):
+    """
+    Load a repository registry: a JSON array of repository entries, or an
+    object with a "repositories" array. "owner/name" strings are accepted
+    as shorthand for an entry with the default branch and backend.
+
+    Returns:
+        list: Normalized entries, duplicates (same owner/name/branch) dropped.
+
+    Raises:
+        ValueError: If an entry has no owner or name, or uses an unknown discovery mode.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("repositories", [])
+
+    repositories = []
+    seen = set()
+    for i, raw in enumerate(data):
+        if isinstance(raw, str):
+            owner, _, name = raw.partition("/")
+            raw = {"owner": owner, "name": name}
+        repo = normalize_repository(raw)
+        if not repo["owner"] or not repo["name"]:
+            raise ValueError(f"Repository #{i + 1} in {path} needs an owner and a name")
+        if repo["discovery"] not in (DISCOVERY_FULL, DISCOVERY_SEARCH):
+            raise ValueError(f"Unknown discovery mode '{repo['discovery']}' for {repo['owner']}/{repo['name']}")
+        key = (repo["owner"], repo["name"], repo["branch"])
+        if key not in seen:
+            seen.add(key)
+            repositories.append(repo)
+    return repositories
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+from logger_config import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RUN_STATE_PATH = os.getenv("RUN_STATE_PATH", "data/run_state.json")
+INCREMENTAL_MODE = os.getenv("INCREMENTAL_MODE", "false").lower() in ("1", "true", "yes")
+
+
+def task_fingerprint(task_name, end_date, matched_shas):
+    """Stable hash of everything that feeds a task's prediction."""
+    payload = json.dumps([str(task_name), str(end_date), sorted(matched_shas)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RunState:
+    """
+    State persisted between runs for incremental mode.
+
+    Holds, per repo comparison, the base/head SHAs seen last time together
+    with the compact commits of that comparison, per task the fingerprint
+    of its inputs plus the status/summary it produced.
+    """
+
+    def __init__(self, path=RUN_STATE_PATH):
+        self.path = path
+        self.repos = {}
+        self.tasks = {}
+        self._load()
+
+    @staticmethod
+    def repo_key(owner, name, base_branch, head_branch):
+        return f"{owner}/{name}:{base_branch}...{head_branch}"
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.repos = data.get("repos", {})
+            self.tasks = data.get("tasks", {})
+            logger.info(f"✅ Loaded run state for {len(self.repos)} repos and {len(self.tasks)} tasks.")
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable run state {self.path}: {e}")
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"repos": self.repos, "tasks": self.tasks}, f)
+        os.replace(tmp_path, self.path)
+        logger.info(f"💾 Saved run state to {self.path}.")
+
+    # --- repos -------------------------------------------------------------
+
+    def get_repo(self, key):
+        return self.repos.get(key)
+
+    def set_repo(self, key, base_sha, head_sha, commits, since=None, total=None):
+        """
+        `commits` is a list of JSON-serialisable compact commit rows kept from
+        `since` onwards; `total` is the size of the whole base...head range.
+        """
+        self.repos[key] = {"base_sha": base_sha, "head_sha": head_sha, "commits": commits, "since": since,
+                           "total": total}
+
+    def keep_repos(self, keys):
+        """Forget every repo comparison not listed in `keys`."""
+        keys = set(keys)
+        self.repos = {key: entry for key, entry in self.repos.items() if key in keys}
+
+    # --- tasks -------------------------------------------------------------
+
+    # Rule-tier statuses ("Upcoming", "No progress", ...) move with today's date
+    # and cost no model call, so they are never reused; only model results are.
+
+    def get_task_result(self, task_name, fingerprint):
+        """Return the stored (status, summary) if the task's inputs are unchanged."""
+        entry = self.tasks.get(str(task_name))
+        if entry and entry.get("fingerprint") == fingerprint and entry.get("tier") != "rules":
+            return entry["status"], entry["summary"]
+        return None
+
+    def get_last_task_result(self, task_name):
+        """
+        Return the stored (status, summary) regardless of fingerprint, or None.
+
+        Only valid while the task's repos are unchanged: a run whose prediction
+        for the task failed drops its entry, so what is stored always belongs
+        to the latest commits the task was matched against.
+        """
+        entry = self.tasks.get(str(task_name))
+        return (entry["status"], entry["summary"]) if entry and entry.get("tier") != "rules" else None
+
+    def drop_tasks(self, task_names):
+        for task_name in task_names:
+            self.tasks.pop(str(task_name), None)
+
+    def set_task_result(self, task_name, fingerprint, status, summary, tier="llm"):
+        """`tier` records what produced the status: "rules" (timeline checker) or "llm"."""
+        self.tasks[str(task_name)] = {"fingerprint": fingerprint, "status": status, "summary": summary,
+                                      "tier": tier}
@@ -0,0 +1,151 @@
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from modules.pipeline import GITHUB_CONCURRENCY, OPENAI_CONCURRENCY
+from modules.repo_registry import load_repositories, normalize_repository
+from logger_config import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", str(os.cpu_count() or 2)))
+JOB_STATE_DIR = os.getenv("JOB_STATE_DIR", "data/jobs")
+SHARD_STATE_DIR = os.getenv("SHARD_STATE_DIR", "data/shards")
+SHARD_REPORT_PATH = os.getenv("SHARD_REPORT_PATH", "data/shard_report.json")
+PREFETCH_STATE_PATH = os.path.join(SHARD_STATE_DIR, "prefetch", "run_state.json")
+
+
+def load_jobs(path):
+    """
+    Load the job list: a JSON array of
+    {"name", "sheet_id", "sheet_range", "worksheet", "repositories": [...]}.
+
+    `sheet_range` defaults to "Sheet1!A:E", `worksheet` to the tab of
+    `sheet_range`, and each repository takes the same keys as a repository
+    registry entry (owner, name, branch, optional backend, remote and
+    discovery). `repositories` may also be the path of a registry file,
+    relative to the job file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw_jobs = json.load(f)
+
+    jobs = []
+    names = set()
+    for i, raw in enumerate(raw_jobs):
+        name = str(raw.get("name") or f"job-{i + 1}")
+        if name in names:
+            raise ValueError(f"Duplicate job name in {path}: {name}")
+        if not raw.get("sheet_id"):
+            raise ValueError(f"Job '{name}' has no sheet_id")
+        names.add(name)
+        sheet_range = raw.get("sheet_range", "Sheet1!A:E")
+        repositories = raw.get("repositories", [])
+        if isinstance(repositories, str):
+            repositories = load_repositories(os.path.join(os.path.dirname(path), repositories))
+        jobs.append({
+            "name": name,
+            "sheet_id": raw["sheet_id"],
+            "sheet_range": sheet_range,
+            "worksheet": raw.get("worksheet") or sheet_range.split("!")[0],
+            "repositories": [normalize_repository(repo) for repo in repositories],
+            "state_dir": raw.get("state_dir") or os.path.join(JOB_STATE_DIR, name),
+        })
+    return jobs
+
+
+def plan_shards(jobs):
+    """
+    One shard per job, so every job runs in parallel. Repositories shared by
+    several jobs are fetched once before the shards start (see
+    `shared_repositories`) rather than by serialising those jobs.
+    """
+    # Jobs with the most repositories first so they start before the pool fills up with small ones.
+    return [[job] for job in sorted(jobs, key=lambda job: len(job["repositories"]), reverse=True)]
+
+
+def shared_repositories(jobs):
+    """Repository entries (owner/name/branch) listed by more than one job, in first-seen order."""
+    counts = Counter()
+    first = {}
+    for job in jobs:
+        keys = [(r["owner"], r["name"], r["branch"]) for r in job["repositories"]]
+        counts.update(set(keys))
+        for key, repo in zip(keys, job["repositories"]):
+            first.setdefault(key, repo)
+    return [repo for key, repo in first.items() if counts[key] > 1]
+
+
+def run_sharded(jobs, shard_fn, workers=SHARD_WORKERS,
+                github_concurrency=GITHUB_CONCURRENCY, openai_concurrency=OPENAI_CONCURRENCY,
+                report_path=SHARD_REPORT_PATH, prefetch_fn=None):
+    """
+    Run `shard_fn(shard_jobs, github_concurrency, openai_concurrency, prefetched)`
+    for every shard in a process pool and aggregate the per-job results it returns.
+
+    When `prefetch_fn` is given, it is called first with the repositories
+    shared by several jobs and returns the path of a run state holding their
+    comparisons (or None); that path is passed to every shard as `prefetched`
+    so each shared repository is fetched once instead of once per job.
+
+    Workers are capped at the smaller of the GitHub/OpenAI concurrency
+    budgets, and each budget is split evenly across them, so the total in
+    flight never exceeds what a single process would use.
+
+    Returns:
+        dict: The report written to `report_path`: per shard, the jobs it ran
+              and each job's result ({"status": "ok" | "skipped" | "failed", ...}).
+    """
+    shards = plan_shards(jobs)
+    shared = shared_repositories(jobs)
+    prefetched = None
+    if prefetch_fn is not None and shared:
+        logger.info(f"📥 Prefetching {len(shared)} repositories shared by several jobs...")
+        try:
+            prefetched = prefetch_fn(shared)
+        except Exception as e:
+            logger.error(f"❌ Prefetch failed, every job fetches its own repositories: {e}")
+    workers = max(1, min(workers, len(shards), github_concurrency, openai_concurrency))
+    github_budget = max(1, github_concurrency // workers)
+    openai_budget = max(1, openai_concurrency // workers)
+    logger.info(f"🚀 Running {len(jobs)} jobs in {len(shards)} shards on {workers} workers "
+                f"(per worker: {github_budget} GitHub / {openai_budget} OpenAI).")
+
+    started = time.monotonic()
+    report = {"started_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "shards": []}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(shard_fn, shard, github_budget, openai_budget, prefetched): (index, shard)
+            for index, shard in enumerate(shards)
+        }
+        for future in as_completed(futures):
+            index, shard = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                logger.error(f"❌ Shard {index} crashed: {e}")
+                results = {job["name"]: {"status": "failed", "error": str(e)} for job in shard}
+            report["shards"].append({
+                "shard": index,
+                "jobs": [job["name"] for job in shard],
+                "results": results,
+            })
+            for name, result in results.items():
+                icon = "✅" if result["status"] == "ok" else "⚠️" if result["status"] == "skipped" else "❌"
+                logger.info(f"{icon} Job '{name}' (shard {index}): {result['status']}"
+                            f"{' - ' + result['error'] if result.get('error') else ''}")
+
+    report["shards"].sort(key=lambda s: s["shard"])
+    report["seconds"] = round(time.monotonic() - started, 1)
+    failed = [name for s in report["shards"] for name, r in s["results"].items() if r["status"] == "failed"]
+    report["failed"] = failed
+
+    directory = os.path.dirname(report_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"📋 {len(jobs) - len(failed)}/{len(jobs)} jobs succeeded in {report['seconds']}s; "
+                f"report written to {report_path}.")
+    return report
@@ -1,37 +1,75 @@
+import hashlib
+import json
 import os
-import pandas as pd
-import pickle
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from collections import namedtuple
+from modules.google_service import get_sheets_service
+from modules.utils import column_letter, a1_sheet
+from modules.metrics import timed
 from logger_config import logger
 from dotenv import load_dotenv
 
 load_dotenv()
 
-SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+TASK_COLUMNS = ("Task Name", "Start Date", "End Date", "Git Keyword")
+SHEET_SNAPSHOT_PATH = os.getenv("SHEET_SNAPSHOT_PATH", "data/sheet_snapshot.json")
 
+SheetTasks = namedtuple("SheetTasks", ["tasks", "columns", "hashes", "added", "changed", "removed"])
 
 
-TOKEN_PATH = os.getenv("GOOGLE_TOKEN_PATH", "config/token.pickle")
+class TaskRecord:
+    """
+    One task row with the TASK_COLUMNS as slots.
 
-def read_google_sheet(sheet_id, sheet_range):
+    Much lighter than a dict or DataFrame row; indexing by sheet column name
+    (`task["Task Name"]`, `task.get("Git Keyword")`) still works.
+    """
+
+    __slots__ = ("name", "start_date", "end_date", "keyword")
+    _FIELDS = dict(zip(TASK_COLUMNS, __slots__))
+
+    def __init__(self, name="", start_date="", end_date="", keyword=""):
+        self.name = name
+        self.start_date = start_date
+        self.end_date = end_date
+        self.keyword = keyword
+
+    @classmethod
+    def from_row(cls, header, row):
+        """Build a record from one sheet row given its header; other columns are ignored."""
+        values = dict(zip(header, row))
+        return cls(*(values.get(column, "") for column in TASK_COLUMNS))
+
+    def __getitem__(self, column):
+        return getattr(self, self._FIELDS[column])
+
+    def get(self, column, default=None):
+        field = self._FIELDS.get(column)
+        return getattr(self, field) if field else default
+
+    def __eq__(self, other):
+        return isinstance(other, TaskRecord) and all(
+            getattr(self, field) == getattr(other, field) for field in self.__slots__
+        )
+
+    def __repr__(self):
+        return f"TaskRecord({self.name!r}, {self.start_date!r}, {self.end_date!r}, {self.keyword!r})"
+
+
+@timed("sheet.read")
+def read_google_sheet(sheet_id, sheet_range, as_dataframe=False):
+    """
+    Read a whole sheet range.
+
+    Returns:
+        list: TaskRecord per data row, or with `as_dataframe` a pandas
+              DataFrame of every column (pandas is imported only then).
+    """
+    empty = []
+    if as_dataframe:
+        import pandas as pd
+        empty = pd.DataFrame()
     try:
-        creds = None
-        token_path = os.getenv("GOOGLE_TOKEN_PATH", "config/token.pickle")
-
-        if os.path.exists(token_path):
-            with open(token_path, 'rb') as token:
-                creds = pickle.load(token)
-                logger.info("✅ Loaded credentials from token.pickle.")
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                'config/client_secret.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-            with open(token_path, 'wb') as token:
-                pickle.dump(creds, token)
-
-        service = build('sheets', 'v4', credentials=creds)
-        sheet = service.spreadsheets()
+        sheet = get_sheets_service().spreadsheets()
 
         result = sheet.values().get(spreadsheetId=sheet_id,
                                     range=sheet_range).execute()
@@ -39,11 +77,128 @@ def read_google_sheet(sheet_id, sheet_range):
 
         if not values:
             logger.warning("⚠️ No data found in the sheet.")
-            return pd.DataFrame()
+            return empty
 
         headers = values[0]
         rows = values[1:]
-        return pd.DataFrame(rows, columns=headers)
+        if as_dataframe:
+            return pd.DataFrame(rows, columns=headers)
+        return [TaskRecord.from_row(headers, row) for row in rows]
+    except Exception as e:
+        logger.error(f"❌ Failed to read Google Sheet: {e}")
+        return empty
+
+
+def row_hash(task):
+    payload = json.dumps([task.get(column, "") for column in TASK_COLUMNS])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SheetSnapshot:
+    """
+    Locally stored view of the task sheet from the last completed run: where
+    the task columns were, and a hash of every task row.
+    """
+
+    def __init__(self, path=SHEET_SNAPSHOT_PATH):
+        self.path = path
+        self.columns = {}
+        self.rows = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.columns = data.get("columns", {})
+            self.rows = data.get("rows", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable sheet snapshot {self.path}: {e}")
+
+    def update(self, columns, rows):
+        self.columns = dict(columns)
+        self.rows = dict(rows)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"columns": self.columns, "rows": self.rows}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _fetch_columns(sheet, sheet_id, sheet_ref, columns):
+    """One batchGet for the header row plus each task column at its expected position."""
+    ranges = [f"{sheet_ref}!1:1"] + [
+        f"{sheet_ref}!{column_letter(index)}2:{column_letter(index)}" for index in columns.values()
+    ]
+    result = sheet.values().batchGet(
+        spreadsheetId=sheet_id, ranges=ranges, majorDimension="COLUMNS"
+    ).execute()
+    value_ranges = result.get('valueRanges', [])
+    header = [cells[0] if cells else "" for cells in value_ranges[0].get('values', [])] if value_ranges else []
+    data = {
+        name: (value_ranges[i + 1].get('values') or [[]])[0]
+        for i, name in enumerate(columns)
+    }
+    return header, data
+
+
+@timed("sheet.read")
+def read_task_sheet(sheet_id, sheet_range, snapshot):
+    """
+    Read only the task columns of the sheet and compare them with `snapshot`.
+
+    Column positions remembered in the snapshot are fetched together with the
+    header row in one batchGet; if the header shows the columns moved, they
+    are fetched again from their new positions.
+
+    Returns:
+        SheetTasks: `tasks` is a list of TaskRecord, `columns`
+                    maps each task column to its index, `hashes` maps task
+                    name to row hash, and `added`/`changed`/`removed` are sets
+                    of task names relative to the snapshot. On failure
+                    `tasks` is empty.
+    """
+    try:
+        sheet = get_sheets_service().spreadsheets()
+        sheet_ref = a1_sheet(sheet_range.split("!")[0])
+
+        columns = {name: snapshot.columns[name] for name in TASK_COLUMNS if name in snapshot.columns}
+        header, data = _fetch_columns(sheet, sheet_id, sheet_ref, columns)
+        if not header:
+            logger.warning("⚠️ No data found in the sheet.")
+            return SheetTasks([], {}, {}, set(), set(), set())
+
+        missing = [name for name in TASK_COLUMNS if name not in header]
+        if missing:
+            logger.error(f"❌ Task sheet is missing columns: {', '.join(missing)}")
+            return SheetTasks([], {}, {}, set(), set(), set())
+
+        actual = {name: header.index(name) for name in TASK_COLUMNS}
+        if actual != columns:
+            header, data = _fetch_columns(sheet, sheet_id, sheet_ref, actual)
+
+        row_count = max(len(values) for values in data.values())
+        tasks = []
+        hashes = {}
+        for i in range(row_count):
+            task = TaskRecord(*(data[name][i] if i < len(data[name]) else "" for name in TASK_COLUMNS))
+            if not task.name:
+                continue
+            if task.name in hashes:
+                logger.warning(f"⚠️ Duplicate task name in sheet: {task.name}")
+            tasks.append(task)
+            hashes[task.name] = row_hash(task)
+
+        added = set(hashes) - set(snapshot.rows)
+        removed = set(snapshot.rows) - set(hashes)
+        changed = {name for name in hashes if name in snapshot.rows and snapshot.rows[name] != hashes[name]}
+        return SheetTasks(tasks, actual, hashes, added, changed, removed)
     except Exception as e:
         logger.error(f"❌ Failed to read Google Sheet: {e}")
-        return pd.DataFrame()
+        return SheetTasks([], {}, {}, set(), set(), set())
@@ -1,94 +1,102 @@
 from datetime import datetime
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-import os
-import pickle
+from modules.sheet_reader import TASK_COLUMNS
+from modules.google_service import get_sheets_service, CREDENTIALS_PATH
+from modules.utils import column_letter, a1_sheet
+from modules.metrics import timed
 from logger_config import logger
 from dotenv import load_dotenv
 
 load_dotenv()
 
-SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
-CREDENTIALS_PATH = os.getenv("GOOGLE_TOKEN_PATH", "config/credentials.json")
-TOKEN_PATH = os.getenv("GOOGLE_TOKEN_PATH", "config/token.json")
-def get_oauth_credentials(credentials_path=CREDENTIALS_PATH, token_path=TOKEN_PATH):
-    creds = None
-    if os.path.exists(token_path):
-        with open(token_path, 'rb') as token:
-            creds = pickle.load(token)
-            logger.info("✅ Loaded credentials from token.")
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            logger.info("🔄 Refreshed expired credentials.")
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
-            creds = flow.run_local_server(port=0)
-            logger.info("🆕 Obtained new credentials.")
-        with open(token_path, 'wb') as token:
-            pickle.dump(creds, token)
-            logger.info("💾 Saved new credentials to token file.")
-    return creds
-
-def write_task_updates(sheet_id, worksheet_name, task_updates, credentials_path='config/credentials.json'):
-    try:
-        credentials = get_oauth_credentials(credentials_path)
 
-        service = build('sheets', 'v4', credentials=credentials)
-        sheet = service.spreadsheets()
+def _row_ranges(sheet_ref, column, rows):
+    """Yield one ValueRange per run of consecutive sheet rows in a single column."""
+    run = []
+    for row_number, value in sorted(rows):
+        if run and row_number != run[-1][0] + 1:
+            yield _value_range(sheet_ref, column, run)
+            run = []
+        run.append((row_number, value))
+    if run:
+        yield _value_range(sheet_ref, column, run)
+
+
+def _value_range(sheet_ref, column, run):
+    return {
+        "range": f"{sheet_ref}!{column}{run[0][0]}:{column}{run[-1][0]}",
+        "values": [[value] for _, value in run],
+    }
+
 
-        # Fetch header row
-        result = sheet.values().get(spreadsheetId=sheet_id, range=f"{worksheet_name}!A1:Z1").execute()
-        header = result.get('values', [])[0]
+@timed("sheet.write")
+def write_task_updates(sheet_id, worksheet_name, task_updates, credentials_path=CREDENTIALS_PATH):
+    """
+    Write today's status/summary columns with one batchGet and one batchUpdate.
+
+    Only rows of tasks present in `task_updates` are written, and rows whose
+    status/summary cells already hold exactly those values are skipped.
+    """
+    try:
+        sheet = get_sheets_service(credentials_path).spreadsheets()
+        sheet_ref = a1_sheet(worksheet_name)
+
+        # Header row and task rows, including any cells already written today, in one round trip
+        result = sheet.values().batchGet(spreadsheetId=sheet_id, ranges=[sheet_ref]).execute()
+        value_ranges = result.get('valueRanges', [])
+        values = value_ranges[0].get('values', []) if value_ranges else []
+        header = list(values[0]) if values else []
+        rows = values[1:]
+        task_column = TASK_COLUMNS[0]
+        if task_column not in header:
+            logger.error(f"❌ No '{task_column}' column in worksheet '{worksheet_name}'; nothing written.")
+            return
+        # The reader follows task columns wherever they move; so does the writer.
+        name_index = header.index(task_column)
 
         today = datetime.today().strftime('%Y-%m-%d')
         status_col = f"{today} Status"
         summary_col = f"{today} Summary"
 
+        data = []
         # Add columns if missing
-        modified = False
-        if status_col not in header:
-            header.append(status_col)
-            modified = True
-        if summary_col not in header:
-            header.append(summary_col)
-            modified = True
-
-        if modified:
-            sheet.values().update(
-                spreadsheetId=sheet_id,
-                range=f"{worksheet_name}!A1",
-                valueInputOption="RAW",
-                body={"values": [header]}
-            ).execute()
-
-        # Get all task rows
-        result = sheet.values().get(spreadsheetId=sheet_id, range=f"{worksheet_name}!A2:{chr(65+len(header))}").execute()
-        rows = result.get('values', [])
+        for column_name in (status_col, summary_col):
+            if column_name not in header:
+                header.append(column_name)
+                letter = column_letter(len(header) - 1)
+                data.append({"range": f"{sheet_ref}!{letter}1", "values": [[column_name]]})
 
         status_index = header.index(status_col)
         summary_index = header.index(summary_col)
+        status_letter = column_letter(status_index)
+        summary_letter = column_letter(summary_index)
+
+        status_cells, summary_cells = [], []
+        skipped = 0
+        for offset, row in enumerate(rows):
+            task_name = row[name_index] if name_index < len(row) else ""
+            if task_name not in task_updates:
+                continue
+            status, summary = task_updates[task_name]
+            # The API trims trailing empty cells, so short rows read as blank
+            current = (row[status_index] if status_index < len(row) else "",
+                       row[summary_index] if summary_index < len(row) else "")
+            if current == (status, summary):
+                skipped += 1
+                continue
+            row_number = offset + 2
+            status_cells.append((row_number, status))
+            summary_cells.append((row_number, summary))
+
+        data.extend(_row_ranges(sheet_ref, status_letter, status_cells))
+        data.extend(_row_ranges(sheet_ref, summary_letter, summary_cells))
+
+        if data:
+            sheet.values().batchUpdate(
+                spreadsheetId=sheet_id,
+                body={"valueInputOption": "RAW", "data": data}
+            ).execute()
 
-        updates = []
-        for row in rows:
-            task_name = row[0] if len(row) > 0 else ""
-            status, summary = task_updates.get(task_name, ("", ""))
-            updates.append([status, summary])  # ✅ Clean and flat row with two values
-
-        # Write only the new two columns
-        col_start = chr(65 + status_index)
-        col_end = chr(65 + summary_index)
-        range_to_update = f"{worksheet_name}!{col_start}2:{col_end}{1 + len(rows)}"
-
-        sheet.values().update(
-            spreadsheetId=sheet_id,
-            range=range_to_update,
-            valueInputOption="RAW",
-            body={"values": updates}
-        ).execute()
-
-        logger.info(f"✅ Successfully updated {len(updates)} tasks to Google Sheet.")
+        logger.info(f"✅ Successfully updated {len(status_cells)} tasks to Google Sheet "
+                    f"({skipped} unchanged rows skipped).")
     except Exception as e:
-        logger.error(f"❌ Failed to write task updates to Google Sheet: {e}")
\ No newline at end of file
+        logger.error(f"❌ Failed to write task updates to Google Sheet: {e}")
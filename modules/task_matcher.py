@@ -0,0 +1,128 @@
+import re
+from collections import deque, namedtuple
+
+# A task matches on its keyword alone, or on at least this many name tokens.
+MIN_NAME_SCORE = 2
+# Shorter task-name words ("a", "to", "of") are ignored.
+NAME_TOKEN_MIN_LENGTH = 3
+
+TaskMatch = namedtuple("TaskMatch", ["task", "score", "keyword"])
+
+
+def name_tokens(task_name):
+    """Lowercase words of a task name that count towards its score."""
+    return [w for w in re.findall(r'\w+', str(task_name).lower()) if len(w) >= NAME_TOKEN_MIN_LENGTH]
+
+
+def task_keywords(keyword_string):
+    """Lowercase comma-separated entries of a 'Git Keyword' cell."""
+    if not isinstance(keyword_string, str):
+        return []
+    return [kw.strip().lower() for kw in keyword_string.split(",") if kw.strip()]
+
+
+class _Automaton:
+    """Aho-Corasick automaton reporting which of a set of strings occur in a text."""
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for index, pattern in enumerate(patterns):
+            node = 0
+            for ch in pattern:
+                child = self._goto[node].get(ch)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][ch] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = child
+            self._out[node].append(index)
+
+        # Breadth-first, so every failure target is finished before it is used.
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text):
+        """Return the set of pattern indices occurring anywhere in `text`."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+class TaskMatcher:
+    """
+    Match commit messages against many tasks in one pass per message.
+
+    Every task's name tokens and keywords are compiled once into a single
+    Aho-Corasick automaton, so each message is scanned once regardless of how
+    many tasks there are. Matching is case-insensitive substring matching:
+
+    - each name token (word of 3+ characters) found in the message adds 1 to
+      the task's score; a word repeated in the name counts each time;
+    - each comma-separated keyword of the task is looked for as a whole;
+    - a task matches if any keyword occurs or its score is >= MIN_NAME_SCORE.
+
+    Args:
+        tasks (iterable): (task_id, task_name, keyword_string) triples; the
+            ids are returned as-is in TaskMatch.task.
+    """
+
+    def __init__(self, tasks):
+        patterns = {}
+        self._token_tasks = []
+        self._keyword_tasks = []
+
+        def pattern_index(text):
+            if text not in patterns:
+                patterns[text] = len(patterns)
+                self._token_tasks.append({})
+                self._keyword_tasks.append([])
+            return patterns[text]
+
+        for task_id, task_name, keyword_string in tasks:
+            for token in name_tokens(task_name):
+                weights = self._token_tasks[pattern_index(token)]
+                weights[task_id] = weights.get(task_id, 0) + 1
+            for keyword in task_keywords(keyword_string):
+                self._keyword_tasks[pattern_index(keyword)].append(task_id)
+
+        self._patterns = list(patterns)
+        self._automaton = _Automaton(self._patterns)
+
+    def match(self, message):
+        """
+        Return a TaskMatch for every task `message` relates to.
+
+        `score` is the task's name-token score and `keyword` one of its
+        keywords found in the message (None if matched on name tokens only).
+        """
+        scores = {}
+        keywords = {}
+        for index in sorted(self._automaton.find(message.lower())):
+            for task_id, weight in self._token_tasks[index].items():
+                scores[task_id] = scores.get(task_id, 0) + weight
+            for task_id in self._keyword_tasks[index]:
+                keywords.setdefault(task_id, self._patterns[index])
+
+        matches = [TaskMatch(task_id, scores.get(task_id, 0), keyword) for task_id, keyword in keywords.items()]
+        matches.extend(TaskMatch(task_id, score, None) for task_id, score in scores.items()
+                       if score >= MIN_NAME_SCORE and task_id not in keywords)
+        return matches
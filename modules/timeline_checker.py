@@ -1,6 +1,9 @@
 from datetime import datetime
 from logger_config import logger
 
+# Latest related commit landed before the end date; says nothing about how much is done.
+ON_TRACK = "✅ On Track"
+
 def check_timeline_status(task_row, matched_commits):
     task_keyword = task_row['Git Keyword']
     today = datetime.today()
@@ -13,7 +16,7 @@ def check_timeline_status(task_row, matched_commits):
     try:
         start_date = datetime.strptime(task_row['Start Date'], "%Y-%m-%d")
         end_date = datetime.strptime(task_row['End Date'], "%Y-%m-%d")
-    except Exception:
+    except Exception as e:
         logger.error(f"Date parsing error: {e}")
         return "❌ Invalid date format"
 
@@ -34,7 +37,7 @@ def check_timeline_status(task_row, matched_commits):
         return "❌ Error in commit dates"
 
     if latest_commit_date <= end_date:
-        return "✅ On Track"
+        return ON_TRACK
     else:
         days_late = (latest_commit_date - end_date).days
         return f"❌ Delayed by {days_late} day(s)"
@@ -1,4 +1,6 @@
 import re
+import time
+from datetime import datetime, timezone
 from logger_config import logger
 
 def compile_task_pattern(keyword_string):
@@ -17,3 +19,64 @@ def compile_task_pattern(keyword_string):
     except re.error as e:
         logger.error(f"❌ Failed to compile regex pattern: {e}")
         return None
+
+
+
+def retry_after_seconds(headers, attempt, base_delay=1.0, max_delay=60.0):
+    """
+    Work out how long to wait before retrying a rate-limited request.
+
+    Honours OpenAI's `retry-after-ms` and `Retry-After` first, then GitHub's
+    `X-RateLimit-Reset` when the remaining quota is exhausted, and otherwise
+    backs off exponentially.
+    """
+    headers = headers or {}
+    retry_after_ms = headers.get("retry-after-ms") or headers.get("Retry-After-Ms")
+    if retry_after_ms:
+        try:
+            return min(max(float(retry_after_ms) / 1000.0, 0.0), max_delay)
+        except ValueError:
+            pass
+    retry_after = headers.get("Retry-After") or headers.get("retry-after")
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), max_delay)
+        except ValueError:
+            pass
+
+    if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+        try:
+            return min(max(float(headers["X-RateLimit-Reset"]) - time.time(), 0.0) + 1.0, max_delay)
+        except ValueError:
+            pass
+
+    return min(base_delay * (2 ** attempt), max_delay)
+
+
+def parse_github_date(value):
+    """
+    Parse a GitHub ISO-8601 timestamp to a naive UTC datetime. Most endpoints
+    use UTC ('2025-06-19T10:04:13Z'); the search API keeps the committer's
+    offset ('2025-06-19T12:04:13.000+02:00').
+    """
+    if len(value) <= 20:
+        return datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S")
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def column_letter(index):
+    """Convert a 0-based column index to its A1 letters (0 -> 'A', 25 -> 'Z', 26 -> 'AA')."""
+    letters = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def a1_sheet(worksheet_name):
+    """Quote a worksheet name for use in an A1 range ('My Sheet' -> "'My Sheet'")."""
+    return "'" + worksheet_name.replace("'", "''") + "'"
@@ -0,0 +1,214 @@
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from modules.commit_store import CompactCommit
+from modules.metrics import incr
+from logger_config import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8787"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+# Shared secret configured on the GitHub webhook; payloads are rejected unless signed with it.
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+# Watch mode re-predicts a task once no push touched it for this long.
+WATCH_DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS", "120"))
+# ...and re-reads the sheet and repositories this often (edited tasks, missed deliveries).
+WATCH_REFRESH_SECONDS = float(os.getenv("WATCH_REFRESH_SECONDS", "900"))
+# GitHub caps webhook payloads at 25 MB.
+WEBHOOK_MAX_BYTES = 25 * 1024 * 1024
+
+
+def verify_signature(secret, body, signature_header):
+    """Check GitHub's `X-Hub-Signature-256: sha256=<hex>` HMAC of the raw body."""
+    if not signature_header or not signature_header.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature_header[len("sha256="):])
+
+
+def _utc(timestamp):
+    """Webhook timestamps carry an offset ('2025-06-19T12:04:13+02:00'); return naive UTC."""
+    parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def push_commits(payload, repositories):
+    """
+    Extract the commits of a `push` payload if it targets a tracked repo/branch.
+
+    Args:
+        payload (dict): The decoded webhook body.
+        repositories (list): Repository config entries ('owner', 'name', 'branch').
+
+    Returns:
+        list: CompactCommit per pushed commit; empty for untracked refs,
+              branch deletions and pushes without commits.
+    """
+    repository = payload.get("repository") or {}
+    owner = (repository.get("owner") or {}).get("login") or (repository.get("owner") or {}).get("name")
+    name = repository.get("name")
+    ref = payload.get("ref", "")
+    repo = next((r for r in repositories
+                 if r['owner'] == owner and r['name'] == name and ref == f"refs/heads/{r['branch']}"), None)
+    if repo is None or payload.get("deleted"):
+        return []
+
+    commits = []
+    for commit in payload.get("commits") or []:
+        try:
+            commits.append(CompactCommit(
+                sha=commit['id'],
+                date=_utc(commit['timestamp']),
+                author=(commit.get('author') or {}).get('name', ""),
+                message=commit.get('message', "").strip(),
+                repo_owner=repo['owner'],
+                repo_name=repo['name'],
+            ))
+        except (KeyError, ValueError) as e:
+            logger.warning("⚠️ Skipping malformed commit in push to %s/%s: %s", owner, name, e)
+    return commits
+
+
+class Debouncer:
+    """
+    Trailing per-key debounce: a key becomes due `delay` seconds after it was
+    last touched, so a burst of pushes for one task triggers one update.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._due = {}
+
+    def touch(self, key, now=None):
+        self._due[key] = (now if now is not None else time.monotonic()) + self.delay
+
+    def pop_due(self, now=None):
+        """Remove and return the keys whose quiet period has passed."""
+        now = now if now is not None else time.monotonic()
+        due = [key for key, at in self._due.items() if at <= now]
+        for key in due:
+            del self._due[key]
+        return due
+
+    def pop_all(self):
+        keys = list(self._due)
+        self._due.clear()
+        return keys
+
+    def seconds_until_next(self, now=None):
+        """Seconds until the earliest key is due, or None when nothing is pending."""
+        if not self._due:
+            return None
+        now = now if now is not None else time.monotonic()
+        return max(0.0, min(self._due.values()) - now)
+
+    def __len__(self):
+        return len(self._due)
+
+
+class WebhookReceiver:
+    """
+    Small HTTP server for GitHub webhooks.
+
+    `push` events for tracked repositories are turned into CompactCommits and
+    handed to `on_commits` from the request thread; callers should only
+    enqueue there. `ping` is acknowledged, other events are ignored, and
+    `GET /healthz` answers 200 for liveness probes.
+    """
+
+    def __init__(self, on_commits, repositories, host=WEBHOOK_HOST, port=WEBHOOK_PORT,
+                 path=WEBHOOK_PATH, secret=WEBHOOK_SECRET):
+        self.on_commits = on_commits
+        self.repositories = repositories
+        self.host = host
+        self.port = port
+        self.path = path
+        self.secret = secret
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/healthz":
+                    receiver._respond(self, 200, {"status": "ok"})
+                else:
+                    receiver._respond(self, 404, {"error": "not found"})
+
+            def do_POST(self):
+                receiver._handle_post(self)
+
+            def log_message(self, format, *args):
+                logger.debug("webhook %s - " + format, self.address_string(), *args)
+
+        if not self.secret:
+            logger.warning("⚠️ WEBHOOK_SECRET is not set; webhook signatures are NOT verified.")
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="webhook-receiver", daemon=True)
+        self._thread.start()
+        logger.info("👂 Listening for GitHub webhooks on http://%s:%d%s", self.host, self.port, self.path)
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @staticmethod
+    def _respond(handler, status, body):
+        data = json.dumps(body).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _handle_post(self, handler):
+        event = handler.headers.get("X-GitHub-Event", "")
+        if handler.path.split("?")[0] != self.path:
+            return self._respond(handler, 404, {"error": "not found"})
+
+        length = int(handler.headers.get("Content-Length") or 0)
+        if length <= 0 or length > WEBHOOK_MAX_BYTES:
+            incr("webhook_events", event=event or "unknown", result="rejected")
+            return self._respond(handler, 413 if length else 400, {"error": "bad payload size"})
+        body = handler.rfile.read(length)
+
+        if self.secret and not verify_signature(self.secret, body, handler.headers.get("X-Hub-Signature-256")):
+            incr("webhook_events", event=event or "unknown", result="bad_signature")
+            logger.warning("🚫 Rejected webhook with an invalid signature from %s", handler.client_address[0])
+            return self._respond(handler, 401, {"error": "invalid signature"})
+
+        if event == "ping":
+            incr("webhook_events", event=event, result="ok")
+            return self._respond(handler, 200, {"status": "pong"})
+        if event != "push":
+            incr("webhook_events", event=event or "unknown", result="ignored")
+            return self._respond(handler, 202, {"accepted": 0})
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            incr("webhook_events", event=event, result="rejected")
+            return self._respond(handler, 400, {"error": "invalid JSON"})
+
+        commits = push_commits(payload, self.repositories)
+        incr("webhook_events", event=event, result="accepted" if commits else "ignored")
+        if commits:
+            self.on_commits(commits)
+        return self._respond(handler, 202, {"accepted": len(commits)})